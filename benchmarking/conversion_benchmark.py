@@ -0,0 +1,60 @@
+'''
+Sparse-to-dense promotion latency for b = 10..18.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.conversion_benchmark
+'''
+import random
+import time
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.dense import DenseHyperLogLog
+from hyperloglog.compression import pack_registers
+
+REPEATS = 5
+
+
+def make_sparse(b):
+    """Builds a sparse HLL filled right up to its promotion threshold."""
+    hll = HyperLogLog(b=b, mode='sparse')
+    threshold = hll.impl.sparse_threshold
+    rng = random.Random(b)
+    indices = rng.sample(range(hll.m), threshold)
+    hll.impl.registers = {idx: rng.randint(1, 20) for idx in indices}
+    return hll
+
+
+def legacy_convert(hll):
+    """The previous promotion path: dense list -> pack_registers -> unpack_registers."""
+    dense_registers = [0] * hll.m
+    for idx, rho in hll.impl.registers.items():
+        dense_registers[idx] = rho
+    packed = pack_registers(dense_registers, 6)
+    return DenseHyperLogLog(hll.b, packed)
+
+
+def best_of(fn, hll):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(hll)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_direct(hll):
+    # convert_to_dense mutates, so work on a fresh copy of the wrapper each time
+    clone = HyperLogLog(b=hll.b, mode='sparse')
+    clone.impl.registers = hll.impl.registers
+    clone.convert_to_dense()
+
+
+print(f"{'b':>3} {'entries':>8} {'direct (ms)':>12} {'legacy (ms)':>12}")
+for b in range(10, 19):
+    hll = make_sparse(b)
+    direct = best_of(run_direct, hll) * 1000
+    try:
+        legacy = f"{best_of(legacy_convert, hll) * 1000:12.2f}"
+    except OverflowError:
+        legacy = f"{'overflow':>12}"
+    print(f"{b:>3} {len(hll.impl.registers):>8} {direct:12.2f} {legacy}")
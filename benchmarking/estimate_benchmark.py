@@ -0,0 +1,75 @@
+'''
+Repeated estimate() calls at b=16: recomputed from the registers every time
+vs the cached estimate, plus the cost of snapshot() and of the one register
+copy the first write after it makes.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.estimate_benchmark
+'''
+import time
+
+from hyperloglog.core import HyperLogLog
+
+B = 16
+SECONDS = 1.0
+
+
+def rate(fn):
+    # Calls per second of fn over about SECONDS
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+
+def per_call_us(fn, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+cases = [("sparse", 5_000), ("dense", 1_000_000), ("dense4", 1_000_000)]
+
+print(f"b={B}, unchanged sketch")
+print(f"{'mode':<8} {'recomputed/s':>13} {'cached/s':>12} {'speedup':>9}")
+for mode, items in cases:
+    hll = HyperLogLog(b=B, mode=mode)
+    hll.add_many(range(items))
+    uncached = rate(hll.impl._estimate)
+    cached = rate(hll.estimate)
+    print(f"{mode:<8} {uncached:>13,.0f} {cached:>12,.0f} {cached / uncached:>8.0f}x")
+
+# A writer adding items that mostly land on registers already as high,
+# with a reader estimating after every 100 adds
+hll = HyperLogLog(b=B, mode='dense')
+hll.add_many(range(1_000_000))
+seen = list(range(0, 1_000_000, 7))[:20_000]
+recomputed = 0
+start = time.perf_counter()
+for i in range(0, len(seen), 100):
+    hll.add_many(seen[i:i + 100])
+    recomputed += hll.impl.cached_estimate is None
+    hll.estimate()
+elapsed = time.perf_counter() - start
+print(f"\nre-adding {len(seen)} seen items, estimate every 100: "
+      f"{recomputed} of {len(seen) // 100} estimates recomputed, {elapsed * 1e3:.0f} ms")
+
+print("\nsnapshot cost (dense)")
+hll = HyperLogLog(b=B, mode='dense')
+hll.add_many(range(1_000_000))
+
+
+def snapshot_then_write():
+    hll.snapshot()
+    hll.add("x")
+
+
+snap_us = per_call_us(hll.snapshot)
+cow_us = per_call_us(snapshot_then_write) - snap_us
+blob = hll.to_bytes()
+copy_us = per_call_us(lambda: HyperLogLog.from_bytes(blob)) + per_call_us(hll.to_bytes)
+print(f"snapshot(): {snap_us:.1f} us, first write after it (register copy): {cow_us:.1f} us, "
+      f"to_bytes/from_bytes copy: {copy_us:.1f} us")
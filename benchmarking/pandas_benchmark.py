@@ -0,0 +1,57 @@
+'''
+Distinct counts over 10^7 rows: approx_nunique / groupby_sketch vs exact
+pandas nunique, comparing wall time and peak traced memory. Requires pandas.
+
+Each case runs twice: once untimed under tracemalloc for the peak, once
+untraced for the time, since tracing slows allocation-heavy code down.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.pandas_benchmark
+'''
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from hyperloglog.dataframe import approx_nunique, groupby_sketch
+
+NUM_ROWS = 10_000_000
+NUM_GROUPS = 100
+NUM_USERS = 2_000_000
+
+rng = np.random.default_rng(42)
+df = pd.DataFrame({
+    "group": rng.integers(0, NUM_GROUPS, NUM_ROWS),
+    "user": rng.integers(0, NUM_USERS, NUM_ROWS),
+})
+
+
+def measure(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    return result, elapsed, peak / 2**20
+
+
+cases = [
+    ("nunique", lambda: df["user"].nunique()),
+    ("approx_nunique", lambda: approx_nunique(df["user"])),
+    ("groupby nunique", lambda: df.groupby("group")["user"].nunique()),
+    ("groupby_sketch", lambda: groupby_sketch(df, "group", "user").to_series()),
+]
+
+print(f"{NUM_ROWS} rows, {NUM_GROUPS} groups")
+print(f"{'case':<18} {'time (s)':>10} {'peak (MiB)':>12}")
+results = {}
+for name, fn in cases:
+    results[name], elapsed, peak = measure(fn)
+    print(f"{name:<18} {elapsed:>10.2f} {peak:>12.1f}")
+
+exact, approx = results["groupby nunique"], results["groupby_sketch"]
+print(f"\nnunique {results['nunique']} vs approx {results['approx_nunique']:.0f}")
+print(f"max per-group relative error: {((approx - exact).abs() / exact).max():.4f}")
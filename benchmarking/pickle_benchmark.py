@@ -0,0 +1,79 @@
+'''
+Pickle size and time of sketches: the compact __reduce_ex__ form (in-band
+and with protocol-5 out-of-band buffers) vs the default object pickling
+it replaced.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.pickle_benchmark
+'''
+import io
+import pickle
+import time
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.dense import DenseHyperLogLog
+from hyperloglog.sparse import SparseHyperLogLog
+
+REPEATS = 500
+COMPACT_TYPES = (HyperLogLog, DenseHyperLogLog, SparseHyperLogLog)
+
+
+class DefaultPickler(pickle.Pickler):
+    # Pickles sketches the way they were pickled before __reduce_ex__
+    def reducer_override(self, obj):
+        if isinstance(obj, COMPACT_TYPES):
+            state = dict(obj.__dict__)
+            state.pop("add", None)  # the buffered add() shadow, if any
+            return object.__new__, (type(obj),), state
+        return NotImplemented
+
+
+def default_dumps(obj):
+    out = io.BytesIO()
+    DefaultPickler(out, protocol=5).dump(obj)
+    return out.getvalue()
+
+
+def compact_dumps(obj):
+    return pickle.dumps(obj, protocol=5)
+
+
+def out_of_band_dumps(obj):
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return data, buffers
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / REPEATS * 1e6
+
+
+def sketch(b, mode, items):
+    hll = HyperLogLog(b=b, mode=mode)
+    hll.add_many(range(items))
+    return hll
+
+
+cases = [
+    ("sparse b=14", sketch(14, "sparse", 2000)),
+    ("dense b=14", sketch(14, "dense", 200_000)),
+    ("dense b=18", sketch(18, "dense", 2_000_000)),
+]
+
+print(f"{'sketch':<13} {'method':<12} {'bytes':>9} {'dumps (us)':>11} {'loads (us)':>11}")
+for name, hll in cases:
+    data, dump_us = timed(default_dumps, hll)
+    _, load_us = timed(pickle.loads, data)
+    print(f"{name:<13} {'default':<12} {len(data):>9} {dump_us:>11.1f} {load_us:>11.1f}")
+
+    data, dump_us = timed(compact_dumps, hll)
+    _, load_us = timed(pickle.loads, data)
+    print(f"{name:<13} {'compact':<12} {len(data):>9} {dump_us:>11.1f} {load_us:>11.1f}")
+
+    (data, buffers), dump_us = timed(out_of_band_dumps, hll)
+    _, load_us = timed(lambda: pickle.loads(data, buffers=buffers))
+    size = f"{len(data)}+{sum(memoryview(b).nbytes for b in buffers)}"
+    print(f"{name:<13} {'out-of-band':<12} {size:>9} {dump_us:>11.1f} {load_us:>11.1f}")
@@ -0,0 +1,81 @@
+'''
+"Distinct users across these N days x these regions" queries over a year
+of daily per-region sketches: UnionQueryEngine (LRU cache of registers
+and partial unions) vs loading and merging every sketch per query.
+Reports cache hit ratios and p50/p99 latency. The uncached baseline is
+slow, so it only runs the first BASELINE_QUERIES queries.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.query_benchmark
+'''
+import time
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.query import UnionQueryEngine
+
+B = 14
+DAYS = 365
+REGIONS = [f"r{i}" for i in range(10)]
+USERS_PER_SKETCH = 5000
+NUM_QUERIES = 500
+BASELINE_QUERIES = 50
+CACHE_BYTES = 64 << 20
+
+rng = np.random.default_rng(42)
+store = {}
+for day in range(DAYS):
+    for region in REGIONS:
+        hll = HyperLogLog(b=B, mode='dense')
+        hll.add_hashes(rng.integers(0, 1 << 64, size=USERS_PER_SKETCH, dtype=np.uint64))
+        store[(day, region)] = hll.to_bytes()
+
+
+def load(key):
+    return store.get(key)
+
+
+def workload(count):
+    # Dashboards: 7/30/90-day windows ending on recent days, over a few
+    # popular region sets
+    region_sets = [REGIONS[:5], REGIONS[:3], REGIONS[5:], REGIONS, REGIONS[2:7]]
+    queries = []
+    for _ in range(count):
+        span = int(rng.choice([7, 30, 90], p=[0.5, 0.35, 0.15]))
+        end = DAYS - int(rng.zipf(1.5)) % 60
+        regions = region_sets[int(rng.zipf(1.8)) % len(region_sets)]
+        queries.append([(day, region) for day in range(max(0, end - span), end) for region in regions])
+    return queries
+
+
+def merge_all(keys):
+    result = HyperLogLog(b=B, mode='dense')
+    for key in keys:
+        result.merge(HyperLogLog.from_bytes(store[key]))
+    return result.estimate()
+
+
+def latencies(fn, queries):
+    times = []
+    for keys in queries:
+        start = time.perf_counter()
+        fn(keys)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+queries = workload(NUM_QUERIES)
+engine = UnionQueryEngine(load, b=B, max_bytes=CACHE_BYTES, group_by=lambda key: key[1])
+engine_ms = latencies(engine.estimate, queries)
+baseline_ms = latencies(merge_all, queries[:BASELINE_QUERIES])
+
+print(f"{len(store)} sketches (b={B}), {NUM_QUERIES} queries, "
+      f"mean {np.mean([len(q) for q in queries]):.0f} sketches per query, cache {CACHE_BYTES >> 20} MiB")
+print(f"{'method':<22} {'p50 (ms)':>9} {'p99 (ms)':>9} {'mean (ms)':>10}")
+for name, ms in (("merge per query", baseline_ms), ("UnionQueryEngine", engine_ms)):
+    print(f"{name:<22} {np.percentile(ms, 50):>9.2f} {np.percentile(ms, 99):>9.2f} {ms.mean():>10.2f}")
+stats = engine.stats()
+print(f"\nhit ratios: query {stats['query_hit_ratio']:.2f}, partial union {stats['partial_hit_ratio']:.2f}, "
+      f"sketch {stats['sketch_hit_ratio']:.2f}; {stats['evictions']} evictions, "
+      f"{stats['cached_bytes'] / 2**20:.1f} MiB cached")
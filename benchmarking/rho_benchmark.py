@@ -0,0 +1,69 @@
+'''
+Cost of rho on typical and worst-case inputs: the shared 128-bit kernel vs
+the per-class rehash fallback it replaced (reproduced below), plus the
+vectorized kernel. Worst-case inputs are hashes whose suffix after the
+index bits is all zero.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.rho_benchmark
+'''
+import random
+import time
+
+import numpy as np
+
+from hyperloglog.hash_utils import index_and_rho, index_and_rho_scalar, murmurhash128, murmurhash64a
+
+B = 14
+N = 200_000
+MASK64 = (1 << 64) - 1
+
+
+def legacy_rho(w: int, max_bits: int) -> int:
+    # The removed DenseHyperLogLog/SparseHyperLogLog._rho
+    def clzll(x): return 64 - x.bit_length() if x != 0 else 64
+    rho = clzll(w) + 1
+    if rho >= 64:
+        max_val = min(1 << 6, max_bits)
+        safety_counter = 0
+        while rho < max_val:
+            w = murmurhash64a(str(w))
+            addn = clzll(w) + 1
+            if addn <= 0:
+                break
+            rho += addn
+            safety_counter += 1
+            if safety_counter > max_bits:
+                break
+    return min(rho, max_bits)
+
+
+def legacy(pairs):
+    for low, _ in pairs:
+        legacy_rho((low << B) & MASK64, 64 - B)
+
+
+def kernel(pairs):
+    for low, high in pairs:
+        index_and_rho_scalar(low, high, B)
+
+
+rng = random.Random(42)
+typical = [murmurhash128(str(i)) for i in range(N)]
+worst = [(rng.getrandbits(B) << (64 - B), rng.getrandbits(64)) for _ in range(N)]
+
+print(f"{N} hashes, b={B}")
+print(f"{'input':<10} {'legacy (s)':>12} {'kernel (s)':>12} {'vectorized (s)':>16}")
+for name, pairs in (("typical", typical), ("worst", worst)):
+    lows = np.array([low for low, _ in pairs], dtype=np.uint64)
+    highs = np.array([high for _, high in pairs], dtype=np.uint64)
+    times = []
+    for fn in (lambda: legacy(pairs), lambda: kernel(pairs), lambda: index_and_rho(lows, B, highs)):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    print(f"{name:<10} {times[0]:>12.3f} {times[1]:>12.3f} {times[2]:>16.4f}")
+
+_, rho = index_and_rho(np.array([w for w, _ in worst], dtype=np.uint64), B,
+                       np.array([h for _, h in worst], dtype=np.uint64))
+print(f"\nworst-case rho: legacy always {64 - B}, kernel mean {rho.mean():.2f} (max {rho.max()})")
@@ -0,0 +1,82 @@
+'''
+Rollup cube over 90 days of hourly x per-city sketches (hour -> day ->
+week, city -> region -> country): build time, query latency and cells
+merged per query vs merging the covered leaves directly, and the cost of
+updating one leaf.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.rollup_benchmark
+'''
+import time
+
+import numpy as np
+
+from hyperloglog.hash_utils import index_and_rho
+from hyperloglog.rollup import At, Hierarchy, RollupCube
+
+B = 10
+DAYS = 90
+CITIES = [f"{country}{region}{city}" for country in "AB" for region in "wxyz" for city in "12"]
+ITEMS_PER_LEAF = 200
+NUM_QUERIES = 200
+
+time_dim = Hierarchy("time", ["hour", "day", "week"], [lambda hour: hour // 24, lambda day: day // 7])
+geo_dim = Hierarchy("geo", ["city", "region", "country"], [lambda city: city[:2], lambda region: region[:1]])
+
+rng = np.random.default_rng(42)
+leaves = {}
+for hour in range(DAYS * 24):
+    for city in CITIES:
+        idx, rho = index_and_rho(rng.integers(0, 1 << 64, size=ITEMS_PER_LEAF, dtype=np.uint64), B)
+        registers = np.zeros(1 << B, dtype=np.uint8)
+        np.maximum.at(registers, idx, rho)
+        leaves[(hour, city)] = registers
+
+print(f"{len(leaves)} leaves (b={B}): {DAYS * 24} hours x {len(CITIES)} cities")
+for workers in (1, 4):
+    start = time.perf_counter()
+    cube = RollupCube([time_dim, geo_dim], b=B).build(leaves, workers=workers)
+    print(f"build with {workers} worker(s): {time.perf_counter() - start:.2f} s")
+cells = sum(len(c) for c in cube.cells.values())
+print(f"{cells} cells, {cells * (1 << B) / 2**20:.0f} MiB")
+
+regions = sorted({city[:2] for city in CITIES})
+queries = []
+for _ in range(NUM_QUERIES):
+    first = int(rng.integers(0, DAYS - 30))
+    span = int(rng.choice([1, 7, 30]))
+    chosen = list(rng.choice(regions, size=int(rng.integers(1, len(regions) + 1)), replace=False))
+    queries.append({"time": At("day", range(first, first + span)), "geo": At("region", chosen)})
+
+
+def leaf_keys(selection):
+    days = set(selection["time"].values)
+    chosen = set(selection["geo"].values)
+    return [(hour, city) for day in days for hour in range(day * 24, day * 24 + 24)
+            for city in CITIES if city[:2] in chosen]
+
+
+def naive(selection):
+    result = np.zeros(1 << B, dtype=np.uint8)
+    for key in leaf_keys(selection):
+        np.maximum(result, leaves[key], out=result)
+    return result
+
+
+for name, fn, size in (("merge leaves", naive, lambda q: len(leaf_keys(q))),
+                       ("rollup cube", cube.registers, lambda q: len(cube.cover(q)))):
+    times = []
+    for selection in queries:
+        start = time.perf_counter()
+        fn(selection)
+        times.append(time.perf_counter() - start)
+    ms = np.array(times) * 1000
+    print(f"{name:<13} p50 {np.percentile(ms, 50):7.3f} ms  p99 {np.percentile(ms, 99):7.3f} ms  "
+          f"mean arrays merged {np.mean([size(q) for q in queries]):7.1f}")
+
+assert all((naive(q) == cube.registers(q)).all() for q in queries[:20])
+
+start = time.perf_counter()
+for hour in range(100):
+    cube.update((hour, CITIES[0]), leaves[(hour + 1, CITIES[1])])
+print(f"update one leaf: {(time.perf_counter() - start) / 100 * 1000:.3f} ms ({len(cube.cells)} ancestors)")
@@ -0,0 +1,41 @@
+'''
+Bulk round-trip of many sketches: raw binary container vs the base64 path.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.serialization_benchmark
+'''
+import random
+import time
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.serialization import serialize_hll, deserialize_hll, dumps_many, loads_many
+
+NUM_SKETCHES = 100_000
+
+# Mostly small keyed counters, as in production
+rng = random.Random(42)
+sketches = []
+for n in range(NUM_SKETCHES):
+    hll = HyperLogLog(b=14)
+    for i in range(rng.randint(1, 50)):
+        hll.add(f"user{rng.randint(0, 10**6)}")
+    sketches.append(hll)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+b64_rows, b64_dump = timed(lambda: [serialize_hll(h) for h in sketches])
+_, b64_load = timed(lambda: [deserialize_hll(s) for s in b64_rows])
+b64_size = sum(len(s) for s in b64_rows)
+
+container, raw_dump = timed(lambda: dumps_many(sketches))
+_, raw_load = timed(lambda: loads_many(container))
+
+print(f"{NUM_SKETCHES} sketches")
+print(f"{'path':<10} {'bytes':>12} {'dump (s)':>10} {'load (s)':>10}")
+print(f"{'base64':<10} {b64_size:>12} {b64_dump:>10.3f} {b64_load:>10.3f}")
+print(f"{'binary':<10} {len(container):>12} {raw_dump:>10.3f} {raw_load:>10.3f}")
@@ -0,0 +1,86 @@
+'''
+Multi-process ingestion of 10^8 synthetic hashes: every worker adding to
+one SharedDenseHyperLogLog vs every worker building its own HyperLogLog
+and sending it back pickled to be merged, for 1..N processes.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.shared_benchmark
+'''
+import multiprocessing
+import os
+import pickle
+import time
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.shared import SharedDenseHyperLogLog
+
+NUM_HASHES = 100_000_000
+CHUNK = 1 << 20
+B = 14
+MAX_PROCESSES = max(os.cpu_count() or 1, 4)
+
+
+def chunks(worker: int, workers: int):
+    # This worker's share of the stream, as uint64 hash chunks
+    rng = np.random.default_rng(worker)
+    remaining = NUM_HASHES // workers
+    while remaining:
+        size = min(CHUNK, remaining)
+        yield rng.integers(0, 1 << 64, size=size, dtype=np.uint64)
+        remaining -= size
+
+
+def shared_worker(sketch, worker, workers):
+    for hashes in chunks(worker, workers):
+        sketch.add_hashes(hashes)
+    sketch.close()
+
+
+def merging_worker(queue, worker, workers):
+    hll = HyperLogLog(b=B, mode='dense')
+    for hashes in chunks(worker, workers):
+        hll.add_hashes(hashes)
+    queue.put(pickle.dumps(hll))
+
+
+def run_shared(workers):
+    with SharedDenseHyperLogLog(b=B) as sketch:
+        procs = [multiprocessing.Process(target=shared_worker, args=(sketch, w, workers))
+                 for w in range(workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        return sketch.estimate()
+
+
+def run_merging(workers):
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=merging_worker, args=(queue, w, workers))
+             for w in range(workers)]
+    for p in procs:
+        p.start()
+    total = None
+    for _ in procs:
+        hll = pickle.loads(queue.get())
+        total = hll if total is None else total.merge(hll)
+    for p in procs:
+        p.join()
+    return total.estimate()
+
+
+if __name__ == "__main__":
+    print(f"{NUM_HASHES} hashes, b={B}, {os.cpu_count()} CPUs")
+    print(f"{'processes':>9} {'shared (s)':>11} {'pickle+merge (s)':>17} {'estimate':>14}")
+    workers = 1
+    while workers <= MAX_PROCESSES:
+        start = time.perf_counter()
+        estimate = run_shared(workers)
+        shared = time.perf_counter() - start
+        start = time.perf_counter()
+        run_merging(workers)
+        merging = time.perf_counter() - start
+        print(f"{workers:>9} {shared:>11.2f} {merging:>17.2f} {estimate:>14.0f}")
+        workers *= 2
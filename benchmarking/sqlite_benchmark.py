@@ -0,0 +1,61 @@
+'''
+Per-group distinct counts in SQLite: in-database hll_add aggregate vs
+fetching every row into Python and sketching there.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.sqlite_benchmark
+'''
+import random
+import sqlite3
+import time
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog import sqlite
+
+NUM_ROWS = 1_000_000
+NUM_COUNTRIES = 50
+NUM_USERS = 200_000
+
+rng = random.Random(42)
+conn = sqlite3.connect(":memory:")
+sqlite.register(conn)
+conn.execute("CREATE TABLE events (country TEXT, user_id INTEGER)")
+conn.executemany(
+    "INSERT INTO events VALUES (?, ?)",
+    ((f"c{rng.randrange(NUM_COUNTRIES)}", rng.randrange(NUM_USERS)) for _ in range(NUM_ROWS)),
+)
+
+
+def in_database():
+    return dict(conn.execute(
+        "SELECT country, hll_cardinality(hll_add(user_id)) FROM events GROUP BY country"))
+
+
+def fetch_all_python():
+    sketches = {}
+    for country, user_id in conn.execute("SELECT country, user_id FROM events"):
+        hll = sketches.get(country)
+        if hll is None:
+            hll = sketches[country] = HyperLogLog(b=14)
+        hll.add(user_id)
+    return {country: hll.estimate() for country, hll in sketches.items()}
+
+
+def exact():
+    return dict(conn.execute("SELECT country, COUNT(DISTINCT user_id) FROM events GROUP BY country"))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+truth, exact_time = timed(exact)
+print(f"{NUM_ROWS} rows, {NUM_COUNTRIES} groups")
+print(f"{'path':<22} {'time (s)':>10} {'max rel. error':>16}")
+for name, fn in (("hll_add in SQLite", in_database), ("fetch-all + Python", fetch_all_python)):
+    result, elapsed = timed(fn)
+    error = max(abs(result[c] - truth[c]) / truth[c] for c in truth)
+    print(f"{name:<22} {elapsed:>10.3f} {error:>16.4f}")
+print(f"{'COUNT(DISTINCT)':<22} {exact_time:>10.3f} {0:>16.4f}")
@@ -0,0 +1,54 @@
+'''
+Recovery time of a SketchStore: replaying the full segment history vs
+loading the compacted snapshot, for growing amounts of history over the
+same set of keys.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.store_benchmark
+'''
+import os
+import random
+import tempfile
+import time
+
+from hyperloglog.store import SketchStore
+
+NUM_KEYS = 1000
+KEYS_PER_ROUND = 100
+ITEMS_PER_KEY = 50
+HISTORY_ROUNDS = (100, 400, 1600)
+B = 12
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def recover(path):
+    start = time.perf_counter()
+    store = SketchStore(path, b=B, fsync=False, compact_bytes=None)
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed
+
+
+print(f"{NUM_KEYS} keys, {KEYS_PER_ROUND} keys x {ITEMS_PER_KEY} items per checkpoint, b={B}")
+print(f"{'checkpoints':>11} {'log (MiB)':>10} {'replay (s)':>11} {'snapshot (MiB)':>15} {'load (s)':>9}")
+for rounds in HISTORY_ROUNDS:
+    with tempfile.TemporaryDirectory() as path:
+        rng = random.Random(42)
+        store = SketchStore(path, b=B, fsync=False, compact_bytes=None)
+        for _ in range(rounds):
+            for key in rng.sample(range(NUM_KEYS), KEYS_PER_ROUND):
+                store.add_many(f"key{key}", (rng.getrandbits(64) for _ in range(ITEMS_PER_KEY)))
+            store.checkpoint()
+        store.close()
+        log_size = directory_bytes(path)
+        replay = recover(path)
+
+        store = SketchStore(path, b=B, fsync=False, compact_bytes=None)
+        store.compact()
+        store.close()
+        snapshot_size = directory_bytes(path)
+        load = recover(path)
+        print(f"{rounds:>11} {log_size / 2**20:>10.1f} {replay:>11.3f} {snapshot_size / 2**20:>15.1f} {load:>9.3f}")
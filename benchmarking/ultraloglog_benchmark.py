@@ -0,0 +1,67 @@
+'''
+UltraLogLog vs HyperLogLog: relative error and serialized size at the same
+precision, and their memory-variance product (bits x relative variance,
+lower is better). Both sketches get the same random hashes in each trial.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.ultraloglog_benchmark
+'''
+import time
+
+import numpy as np
+
+from hyperloglog import HyperLogLog, UltraLogLog
+
+TRIALS = 50
+PRECISIONS = (10, 12, 14)
+CARDINALITIES = (1_000, 100_000, 1_000_000)
+
+
+def rmse(errors):
+    return float(np.sqrt(np.mean(np.square(errors))))
+
+
+rng = np.random.default_rng(2023)
+print(f"{TRIALS} trials per row; sizes are to_bytes() without compression")
+print(f"{'b':>3} {'n':>9} {'HLL err':>8} {'ULL err':>8} {'HLL bytes':>10} {'ULL bytes':>10} "
+      f"{'HLL MVP':>8} {'ULL MVP':>8}")
+for b in PRECISIONS:
+    for n in CARDINALITIES:
+        hll_errors, ull_errors = [], []
+        for _ in range(TRIALS):
+            hashes = rng.integers(0, 2 ** 64, size=n, dtype=np.uint64)
+            hll = HyperLogLog(b=b, mode='dense')
+            hll.add_hashes(hashes)
+            ull = UltraLogLog(b=b)
+            ull.add_hashes(hashes)
+            hll_errors.append(hll.estimate() / n - 1)
+            ull_errors.append(ull.estimate() / n - 1)
+        hll_bytes, ull_bytes = len(hll.to_bytes()) - 10, len(ull.to_bytes()) - 10
+        hll_err, ull_err = rmse(hll_errors), rmse(ull_errors)
+        print(f"{b:>3} {n:>9} {hll_err:>8.2%} {ull_err:>8.2%} {hll_bytes:>10} {ull_bytes:>10} "
+              f"{8 * hll_bytes * hll_err ** 2:>8.2f} {8 * ull_bytes * ull_err ** 2:>8.2f}")
+
+# Bytes needed for about 1% error: HLL b=14 vs ULL b=13
+print()
+for name, make in (("HLL b=14", lambda: HyperLogLog(b=14, mode='dense')), ("ULL b=13", lambda: UltraLogLog(b=13))):
+    errors = []
+    for _ in range(TRIALS):
+        sketch = make()
+        sketch.add_hashes(rng.integers(0, 2 ** 64, size=200_000, dtype=np.uint64))
+        errors.append(sketch.estimate() / 200_000 - 1)
+    print(f"{name}: {len(sketch.to_bytes()) - 10:>6} bytes, error {rmse(errors):.2%}")
+
+# Throughput at b=14
+hashes = rng.integers(0, 2 ** 64, size=1_000_000, dtype=np.uint64)
+print()
+for name, sketch in (("HyperLogLog", HyperLogLog(b=14, mode='dense')), ("UltraLogLog", UltraLogLog(b=14))):
+    start = time.perf_counter()
+    sketch.add_hashes(hashes)
+    add_s = time.perf_counter() - start
+    holder = sketch.impl if isinstance(sketch, HyperLogLog) else sketch
+    start = time.perf_counter()
+    for _ in range(20):
+        holder.cached_estimate = None
+        sketch.estimate()
+    estimate_ms = (time.perf_counter() - start) / 20 * 1e3
+    print(f"{name}: add_hashes {len(hashes) / add_s / 1e6:.1f} M hashes/s, uncached estimate {estimate_ms:.2f} ms")
@@ -0,0 +1,49 @@
+'''
+Union of many small sparse sketches: chained merge() calls vs
+HyperLogLog.union(), which gathers all entries into arrays, takes the
+per-register maximum in one vectorized step and decides promotion once.
+
+To run without moving the hyperloglog folder, use:
+    python -m benchmarking.union_benchmark
+'''
+import time
+
+from hyperloglog.core import HyperLogLog
+
+B = 14
+REPEATS = 5
+
+
+def sketches(k, items):
+    result = []
+    for i in range(k):
+        hll = HyperLogLog(b=B)
+        hll.add_many(range(i * items // 2, i * items // 2 + items))  # half overlaps the previous one
+        result.append(hll)
+    return result
+
+
+def chained(parts):
+    result = HyperLogLog(b=B)
+    for hll in parts:
+        result.merge(hll)
+    return result
+
+
+def best_ms(fn, parts):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(parts)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1e3
+
+
+print(f"b={B}")
+print(f"{'sketches':>8} {'items':>6} {'result':>7} {'merge (ms)':>11} {'union (ms)':>11} {'speedup':>8}")
+for k, items in [(1000, 4), (200, 30), (100, 100), (1000, 100), (100, 1000), (10_000, 10)]:
+    parts = sketches(k, items)
+    merged, merge_ms = best_ms(chained, parts)
+    union, union_ms = best_ms(HyperLogLog.union, parts)
+    assert merged._register_image().tolist() == union._register_image().tolist()
+    print(f"{k:>8} {items:>6} {union.mode:>7} {merge_ms:>11.2f} {union_ms:>11.2f} {merge_ms / union_ms:>7.1f}x")
@@ -5,7 +5,6 @@ To run without moving the hyperloglog folder, use:
 
 import psycopg2
 from hyperloglog.core import HyperLogLog
-from hyperloglog.serialization import serialize_hll, deserialize_hll
 
 
 # ------------------ DATABASE CONNECTION ------------------
@@ -32,7 +31,7 @@ try:
     cur.execute("""
         CREATE TABLE hll_counters (
             label TEXT,
-            hll_data TEXT
+            hll_data BYTEA
         )
     """)
     conn.commit()
@@ -56,12 +55,10 @@ print(f"Actual count: {50_000} (for comparison)")
 
 # ------------------ (Optional) STORE IN DB ------------------
 try:
-    # Serialize HLL object to base64 string
-    b64_data = serialize_hll(hll)
-
+    # Store the raw binary form; BYTEA avoids the 33% base64 overhead
     cur.execute(
         "INSERT INTO hll_counters (label, hll_data) VALUES (%s, %s)",
-        ("test_hll", b64_data)
+        ("test_hll", psycopg2.Binary(hll.to_bytes()))
     )
     conn.commit()
     print("HLL stored in database as 'test_hll'.")
@@ -76,8 +73,8 @@ try:
     row = cur.fetchone()
 
     if row:
-        # Deserialize string back into HLL object
-        hll_fetched = deserialize_hll(row[0])
+        # psycopg2 returns BYTEA as a memoryview
+        hll_fetched = HyperLogLog.from_bytes(bytes(row[0]))
         estimate_fetched = hll_fetched.estimate()
 
         print(f"\nEstimate after fetching from DB: {estimate_fetched}")
@@ -3,13 +3,21 @@ HyperLogLog package initializer.
 
 This package provides:
 - HyperLogLog: The main class for cardinality estimation.
+- UltraLogLog: One byte per register, more accurate per byte than HyperLogLog.
 - serialize_hll / deserialize_hll: Safe Base64 serialization utilities.
+- dump / load / dumps_many / loads_many: Raw binary serialization utilities.
 """
 from .core import HyperLogLog
-from .serialization import serialize_hll, deserialize_hll
+from .ultraloglog import UltraLogLog
+from .serialization import serialize_hll, deserialize_hll, dump, load, dumps_many, loads_many
 
 __all__ = [
     "HyperLogLog",
+    "UltraLogLog",
     "serialize_hll",
     "deserialize_hll",
+    "dump",
+    "load",
+    "dumps_many",
+    "loads_many",
 ]
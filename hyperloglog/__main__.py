@@ -0,0 +1,8 @@
+"""
+Entry point for `python -m hyperloglog`; see hyperloglog.cli.
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Headless, reproducible benchmark suite for the HyperLogLog package.
+
+Every case runs on fixed-seed data, is timed with time.perf_counter_ns()
+after warmup runs, and reports the median over several repetitions.
+Results are written as JSON and can be diffed against a saved baseline.
+
+To run from the project root:
+    python -m hyperloglog.bench --output results.json
+    python -m hyperloglog.bench --baseline results.json --threshold 0.10
+    python -m hyperloglog.bench --load results.json --plot results.png
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable
+
+from .core import HyperLogLog
+
+SEED = 1234
+DEFAULT_PRECISIONS = list(range(4, 19))
+BUFFER_SIZE = 8192
+MERGE_MODES = [("sparse", "sparse"), ("sparse", "dense"), ("dense", "sparse"), ("dense", "dense")]
+
+
+def make_items(n: int, seed: int = SEED) -> list[str]:
+    """Returns n distinct-looking items generated from a fixed seed."""
+    rng = random.Random(seed)
+    return [f"{rng.getrandbits(64):016x}" for _ in range(n)]
+
+
+def measure(fn: Callable, setup: Callable | None = None, repeat: int = 5,
+            warmup: int = 1, ops: int = 1) -> dict:
+    """
+    Times fn(state) where state = setup() is rebuilt outside the timed region.
+
+    Args:
+        fn: Callable taking the setup state (or None).
+        setup: Optional callable producing fresh state for each run.
+        repeat: Number of timed repetitions.
+        warmup: Number of untimed runs before the timed ones.
+        ops: Operations performed per call, used for ns_per_op.
+
+    Returns:
+        dict: median/min/max nanoseconds, ns_per_op and the run counts.
+    """
+    samples = []
+    for run in range(warmup + repeat):
+        state = setup() if setup else None
+        start = time.perf_counter_ns()
+        fn(state)
+        elapsed = time.perf_counter_ns() - start
+        if run >= warmup:
+            samples.append(elapsed)
+    median = statistics.median(samples)
+    return {
+        "median_ns": median,
+        "min_ns": min(samples),
+        "max_ns": max(samples),
+        "ns_per_op": median / ops,
+        "ops": ops,
+        "repeat": repeat,
+    }
+
+
+def _filled(b: int, mode: str, items: list[str]) -> HyperLogLog:
+    hll = HyperLogLog(b=b, mode=mode)
+    hll.add_many(items)
+    return hll
+
+
+def _sparse_items(b: int, items: list[str]) -> list[str]:
+    # Stay well below the m // 4 promotion threshold
+    return items[:max(2, (1 << b) // 8)]
+
+
+def bench_precision(b: int, items: list[str], repeat: int, warmup: int,
+                    cases: set[str] | None = None) -> dict:
+    """Runs every selected case at precision b and returns {case: result}."""
+    results = {}
+
+    def run(name, fn, setup=None, ops=1):
+        if cases is None or name in cases:
+            results[name] = measure(fn, setup, repeat=repeat, warmup=warmup, ops=ops)
+
+    n = len(items)
+    sparse_items = _sparse_items(b, items)
+    other_items = items[n // 2:] + items[:n // 2]
+    blobs = {
+        "sparse": _filled(b, "sparse", sparse_items).to_bytes(),
+        "dense": _filled(b, "dense", items).to_bytes(),
+    }
+    others = {
+        "sparse": _filled(b, "sparse", _sparse_items(b, other_items[::-1])),
+        "dense": _filled(b, "dense", other_items),
+    }
+
+    def add_each(_):
+        hll = HyperLogLog(b=b)
+        for item in items:
+            hll.add(item)
+
+    run("add", add_each, ops=n)
+
+    def add_buffered(_):
+        hll = HyperLogLog(b=b, buffer_size=BUFFER_SIZE)
+        for item in items:
+            hll.add(item)
+        hll.flush()  # charge the deferred register updates to this case
+
+    run("add_buffered", add_buffered, ops=n)
+    run("add_many", lambda _: HyperLogLog(b=b).add_many(items), ops=n)
+
+    for mode in ("sparse", "dense"):
+        hll = HyperLogLog.from_bytes(blobs[mode])
+        run(f"estimate_{mode}", lambda _, h=hll: h.estimate())
+        run(f"to_bytes_{mode}", lambda _, h=hll: h.to_bytes())
+        run(f"from_bytes_{mode}", lambda _, blob=blobs[mode]: HyperLogLog.from_bytes(blob))
+        run(f"base64_roundtrip_{mode}", lambda _, h=hll: HyperLogLog.from_base64(h.to_base64()))
+
+    for left, right in MERGE_MODES:
+        run(f"merge_{left}_{right}",
+            lambda state, other=others[right]: state.merge(other),
+            setup=lambda blob=blobs[left]: HyperLogLog.from_bytes(blob))
+
+    def promotion_setup():
+        hll = HyperLogLog(b=b, mode="sparse")
+        threshold = hll.impl.sparse_threshold
+        rng = random.Random(SEED + b)
+        hll.impl.registers = {idx: rng.randint(1, 20) for idx in rng.sample(range(hll.m), threshold)}
+        return hll
+
+    run("promote", lambda state: state.convert_to_dense(), setup=promotion_setup)
+    return results
+
+
+def run_suite(precisions: list[int] = DEFAULT_PRECISIONS, n_items: int = 20000,
+              repeat: int = 5, warmup: int = 1, cases: set[str] | None = None,
+              seed: int = SEED) -> dict:
+    """
+    Runs the benchmark suite.
+
+    Returns:
+        dict: {"meta": {...}, "results": {"<case>/b=<b>": result}}.
+    """
+    items = make_items(n_items, seed)
+    results = {}
+    for b in precisions:
+        for name, result in bench_precision(b, items, repeat, warmup, cases).items():
+            results[f"{name}/b={b}"] = result
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:  # pragma: no cover - numpy is a hard dependency today
+        numpy_version = None
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy_version,
+            "seed": seed,
+            "n_items": n_items,
+            "repeat": repeat,
+            "warmup": warmup,
+            "precisions": list(precisions),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> list[dict]:
+    """
+    Diffs two result sets on median time.
+
+    Args:
+        current: Results from run_suite().
+        baseline: Previously saved results.
+        threshold: Relative slowdown above which a case counts as a regression.
+
+    Returns:
+        list[dict]: One row per shared case with baseline/current medians,
+        the ratio and a status of "regression", "improvement" or "ok".
+    """
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["median_ns"] / base["median_ns"] if base["median_ns"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({
+            "case": key,
+            "baseline_ns": base["median_ns"],
+            "current_ns": result["median_ns"],
+            "ratio": ratio,
+            "status": status,
+        })
+    return rows
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'case':<32} {'median (us)':>12} {'ns/op':>12}"]
+    for key, result in results["results"].items():
+        lines.append(f"{key:<32} {result['median_ns'] / 1000:>12.1f} {result['ns_per_op']:>12.1f}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: list[dict]) -> str:
+    lines = [f"{'case':<32} {'baseline (us)':>14} {'current (us)':>14} {'ratio':>7}  status"]
+    for row in rows:
+        lines.append(
+            f"{row['case']:<32} {row['baseline_ns'] / 1000:>14.1f} {row['current_ns'] / 1000:>14.1f}"
+            f" {row['ratio']:>7.2f}  {row['status']}"
+        )
+    return "\n".join(lines)
+
+
+def plot_results(results: dict, path: str) -> None:
+    """
+    Plots ns/op against b for every case. Requires matplotlib.
+
+    Args:
+        results: Results from run_suite() or a loaded JSON file.
+        path: Output image path.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    series = {}
+    for key, result in results["results"].items():
+        name, b = key.rsplit("/b=", 1)
+        series.setdefault(name, []).append((int(b), result["ns_per_op"]))
+
+    plt.figure(figsize=(12, 7))
+    for name, points in sorted(series.items()):
+        points.sort()
+        plt.plot([b for b, _ in points], [v for _, v in points], marker="o", label=name)
+    plt.yscale("log")
+    plt.xlabel("b (precision)")
+    plt.ylabel("ns per op (median)")
+    plt.title("HyperLogLog benchmark")
+    plt.grid(True)
+    plt.legend(fontsize="small", ncol=2)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def _parse_precisions(text: str) -> list[int]:
+    precisions = []
+    for part in text.split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            precisions.extend(range(int(lo), int(hi) + 1))
+        else:
+            precisions.append(int(part))
+    return precisions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hyperloglog.bench", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--precisions", default="4-18", help="e.g. '4-18' or '10,14,16' (default: 4-18)")
+    parser.add_argument("--items", type=int, default=20000, help="items per add/dense case (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per case (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed warmup runs per case (default: 1)")
+    parser.add_argument("--cases", help="comma-separated case names to run (default: all)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--load", help="load results JSON instead of running the suite")
+    parser.add_argument("--baseline", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default: 0.10)")
+    parser.add_argument("--plot", help="write a plot of the results (requires matplotlib)")
+    args = parser.parse_args(argv)
+
+    if args.load:
+        with open(args.load) as f:
+            results = json.load(f)
+    else:
+        cases = set(args.cases.split(",")) if args.cases else None
+        results = run_suite(_parse_precisions(args.precisions), args.items,
+                            args.repeat, args.warmup, cases, args.seed)
+        print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.plot:
+        plot_results(results, args.plot)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row["status"] == "regression"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Command-line distinct counter.
+
+Streams lines from files or stdin (gzip is detected automatically), picks
+a field, hashes whole read buffers at a time and prints the estimate.
+Memory stays constant: only one read buffer and the sketch are held.
+
+    python -m hyperloglog count access.log.gz -d ' ' -f 1
+    zcat *.gz | python -m hyperloglog count -d ',' -f 3 -o ips.hll
+    python -m hyperloglog count --union mon.hll tue.hll wed.hll
+
+Fields are counted as text, so the result matches HyperLogLog.add() on
+each decoded field. Empty lines/fields and lines with too few fields are
+skipped; a trailing '\\r' is dropped.
+"""
+import argparse
+import codecs
+import gzip
+import sys
+import time
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+from .core import HyperLogLog
+from .hash_utils import murmurhash64a_slices
+
+DEFAULT_READ_BYTES = 1 << 20
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_input(path: str) -> BinaryIO:
+    """Opens a file (or '-' for stdin) for binary reading, gunzipping if needed."""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def read_blocks(stream: BinaryIO, read_bytes: int = DEFAULT_READ_BYTES) -> Iterator[bytes]:
+    """Yields blocks of whole lines (each ending in a newline) from a binary stream."""
+    pending = b""
+    while True:
+        chunk = stream.read(read_bytes)
+        if not chunk:
+            break
+        block = pending + chunk
+        cut = block.rfind(b"\n") + 1
+        if cut:
+            yield block[:cut]
+        pending = block[cut:]
+    if pending:
+        yield pending + b"\n"
+
+
+def field_slices(block: np.ndarray, delimiter: int | None = None,
+                 field: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Locates one field in every line of a block, vectorized.
+
+    Args:
+        block (np.ndarray): uint8 buffer of whole lines, each ending in a newline.
+        delimiter (int | None): Field separator byte, or None for whole lines.
+        field (int): 1-based field number, as in cut(1).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (starts, lengths) of the non-empty fields.
+    """
+    line_ends = np.flatnonzero(block == ord("\n"))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    carriage = (line_ends > line_starts) & (block[np.maximum(line_ends - 1, 0)] == ord("\r"))
+    line_ends = line_ends - carriage
+    if delimiter is None:
+        starts, ends = line_starts, line_ends
+    else:
+        delims = np.flatnonzero(block == delimiter)
+        first = np.searchsorted(delims, line_starts)
+        per_line = np.searchsorted(delims, line_ends) - first
+        skip = field - 1
+        padded = np.append(delims, len(block))  # keeps the lookups below in range
+        starts = line_starts if skip == 0 else padded[np.minimum(first + skip - 1, len(delims))] + 1
+        ends = np.where(per_line > skip, padded[np.minimum(first + skip, len(delims))], line_ends)
+        present = per_line >= skip
+        starts, ends = starts[present], ends[present]
+    lengths = ends - starts
+    keep = lengths > 0
+    return starts[keep], lengths[keep]
+
+
+def count_stream(hll: HyperLogLog, stream: BinaryIO, delimiter: int | None = None, field: int = 1,
+                 read_bytes: int = DEFAULT_READ_BYTES) -> tuple[int, int]:
+    """
+    Adds one field of every line of a stream to the sketch.
+
+    Returns:
+        tuple[int, int]: (fields added, bytes read).
+    """
+    fields = total_bytes = 0
+    for block in read_blocks(stream, read_bytes):
+        data = np.frombuffer(block, dtype=np.uint8)
+        starts, lengths = field_slices(data, delimiter, field)
+        hll.add_hashes(murmurhash64a_slices(data, starts, lengths))
+        fields += len(starts)
+        total_bytes += len(block)
+    return fields, total_bytes
+
+
+def _parse_delimiter(text: str | None) -> int | None:
+    if text is None:
+        return None
+    raw = codecs.decode(text, "unicode_escape").encode("latin-1")  # allows '\t'
+    if len(raw) != 1 or raw == b"\n":
+        raise argparse.ArgumentTypeError("delimiter must be a single byte other than newline")
+    return raw[0]
+
+
+def _count(args: argparse.Namespace) -> int:
+    delimiter = _parse_delimiter(args.delimiter)
+    inputs = args.files or ([] if args.union else ["-"])
+
+    hll = HyperLogLog(b=args.b, mode=args.mode) if inputs else None
+    fields = total_bytes = 0
+    start = time.perf_counter()
+    for path in inputs:
+        stream = open_input(path)
+        try:
+            added, read = count_stream(hll, stream, delimiter, args.field, args.read_bytes)
+        finally:
+            if path != "-":
+                stream.close()
+        fields += added
+        total_bytes += read
+    elapsed = time.perf_counter() - start
+
+    if args.union:
+        sketches = [] if hll is None else [hll]
+        for path in args.union:
+            with open(path, "rb") as f:
+                sketches.append(HyperLogLog.from_bytes(f.read()))
+        hll = HyperLogLog.union(sketches, auto_reduce=True)
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(hll.to_bytes(args.encoding))
+
+    print(round(hll.estimate()))
+    if not args.quiet and inputs:
+        rate = elapsed or float("inf")
+        print(f"{fields} fields, {total_bytes / 2**20:.1f} MiB in {elapsed:.2f} s "
+              f"({fields / rate:,.0f} fields/s, {total_bytes / 2**20 / rate:.1f} MiB/s)", file=sys.stderr)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hyperloglog", description="HyperLogLog command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    count = commands.add_parser("count", help="estimate the number of distinct lines or fields",
+                                description=__doc__.strip().splitlines()[0])
+    count.add_argument("files", nargs="*", help="input files, plain or gzip ('-' for stdin; default: stdin)")
+    count.add_argument("-d", "--delimiter", help="field delimiter, one byte (e.g. ',' or '\\t'); default: whole line")
+    count.add_argument("-f", "--field", type=int, default=1, help="1-based field number (default: 1)")
+    count.add_argument("-b", type=int, default=14, help="precision (default: 14)")
+    count.add_argument("--mode", default="sparse", help="starting mode (default: sparse)")
+    count.add_argument("-o", "--output", help="write the sketch (to_bytes format) to this file")
+    count.add_argument("--encoding", default="packed", choices=["packed", "zlib"],
+                       help="encoding of --output (default: packed)")
+    count.add_argument("--union", nargs="+", metavar="SKETCH",
+                       help="sketch files to union into the result (list input files before this option)")
+    count.add_argument("--read-bytes", type=int, default=DEFAULT_READ_BYTES,
+                       help=f"read buffer size (default: {DEFAULT_READ_BYTES})")
+    count.add_argument("-q", "--quiet", action="store_true", help="do not print throughput to stderr")
+    args = parser.parse_args(argv)
+
+    if args.field < 1:
+        parser.error("--field must be at least 1")
+    try:
+        _parse_delimiter(args.delimiter)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    return _count(args)
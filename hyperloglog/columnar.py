@@ -0,0 +1,142 @@
+"""
+Hashing of whole columns (Apache Arrow arrays or NumPy arrays) straight
+from their buffers, for HyperLogLog.add_array().
+
+Supported inputs and the per-item hash they reproduce:
+
+    Arrow string / large_string     add(x)          (UTF-8 bytes)
+    Arrow binary / large_binary     murmurhash64a(x) of the raw bytes
+    Arrow integer types             add(x)          (decimal text)
+    NumPy 'U' (str) arrays          add(x)
+    NumPy 'S' (bytes) arrays        murmurhash64a(x) of the raw bytes
+    NumPy integer arrays            add(x)
+
+Nulls (Arrow validity bitmaps, masked entries of numpy.ma arrays) are
+skipped. Binary values are hashed as bytes rather than through str(), which
+is what add() would do with a bytes object. pyarrow is optional: Arrow
+inputs are detected by duck typing and the module never imports it.
+"""
+import numpy as np
+
+from .hash_utils import murmurhash64a_array, murmurhash64a_padded, _length_groups, _murmur3_fixed
+
+_ARROW_OFFSET_TYPES = {
+    "string": np.int32, "utf8": np.int32, "binary": np.int32,
+    "large_string": np.int64, "large_utf8": np.int64, "large_binary": np.int64,
+}
+
+
+def column_hashes(values) -> np.ndarray:
+    """
+    Hashes every non-null value of a column.
+
+    Args:
+        values: A pyarrow Array or ChunkedArray, or a NumPy (masked) array.
+
+    Returns:
+        np.ndarray: uint64 hashes of the non-null values.
+
+    Raises:
+        TypeError: If the array type is not supported.
+    """
+    if hasattr(values, "chunks"):  # pyarrow.ChunkedArray
+        chunks = [column_hashes(chunk) for chunk in values.chunks]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint64)
+    if hasattr(values, "buffers") and hasattr(values, "type"):  # pyarrow.Array
+        return _arrow_hashes(values)
+    if isinstance(values, np.ma.MaskedArray):
+        return _numpy_hashes(values.compressed())
+    return _numpy_hashes(np.asarray(values))
+
+
+def _arrow_validity(array) -> np.ndarray | None:
+    bitmap = array.buffers()[0]
+    if bitmap is None or array.null_count == 0:
+        return None
+    bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), bitorder="little")
+    return bits[array.offset:array.offset + len(array)].astype(bool)
+
+
+def _arrow_hashes(array) -> np.ndarray:
+    type_name = str(array.type)
+    valid = _arrow_validity(array)
+    buffers = array.buffers()
+    if type_name in _ARROW_OFFSET_TYPES:
+        offsets = np.frombuffer(buffers[1], dtype=_ARROW_OFFSET_TYPES[type_name])
+        offsets = offsets[array.offset:array.offset + len(array) + 1]
+        data = np.frombuffer(buffers[2], dtype=np.uint8) if buffers[2] is not None else np.empty(0, np.uint8)
+        hashes = murmurhash64a_array(data, offsets)
+        return hashes if valid is None else hashes[valid]
+    if type_name.startswith(("int", "uint")):
+        ints = np.frombuffer(buffers[1], dtype=np.dtype(type_name))
+        ints = ints[array.offset:array.offset + len(array)]
+        return _numpy_hashes(ints if valid is None else ints[valid])
+    raise TypeError(f"Unsupported Arrow type {type_name}; expected string, binary or integer")
+
+
+def _numpy_hashes(array: np.ndarray) -> np.ndarray:
+    array = array.ravel()
+    if array.dtype.kind in "iu":
+        return _integer_hashes(array)
+    if array.dtype.kind == "U":
+        return _unicode_hashes(array)
+    if array.dtype.kind == "S":
+        return _fixed_width_hashes(array.view(np.uint8).reshape(len(array), array.dtype.itemsize))
+    raise TypeError(f"Unsupported array dtype {array.dtype}; expected str, bytes or integer")
+
+
+def _unicode_hashes(array: np.ndarray) -> np.ndarray:
+    if array.dtype.itemsize == 0 or not len(array):
+        return murmurhash64a_array(np.empty(0, np.uint8), np.zeros(len(array) + 1, np.int64))
+    codepoints = array.view(np.uint32).reshape(len(array), -1)
+    if codepoints.max() < 0x80:
+        # ASCII: the UTF-8 bytes are the code points themselves
+        return _fixed_width_hashes(codepoints.astype(np.uint8))
+    return _numpy_hashes(np.char.encode(array, "utf-8"))
+
+
+def _fixed_width_hashes(rows: np.ndarray) -> np.ndarray:
+    # Fixed-width values are NUL-padded on the right, as numpy strips them
+    nonzero = rows != 0
+    width = rows.shape[1]
+    lengths = np.where(nonzero.any(axis=1), width - np.argmax(nonzero[:, ::-1], axis=1), 0)
+    return murmurhash64a_padded(rows, lengths)
+
+
+_POW10 = np.array([10 ** k for k in range(20)], dtype=np.uint64)
+
+
+def _integer_hashes(values: np.ndarray) -> np.ndarray:
+    # Hashes the decimal text of each integer (what str() gives) without
+    # formatting them one by one: digits are peeled off into a right-aligned
+    # matrix, then each (sign, digit count) group is sliced out and hashed
+    negative = values < 0 if values.dtype.kind == "i" else np.zeros(len(values), dtype=bool)
+    magnitude = values.astype(np.uint64)
+    magnitude[negative] = ~magnitude[negative] + np.uint64(1)
+    digits = np.ones(len(values), dtype=np.int64)
+    largest = magnitude.max(initial=0)
+    for power in _POW10[1:]:
+        if power > largest:
+            break
+        digits += magnitude >= power
+    max_digits = int(digits.max(initial=1))
+    # One row per decimal place, most significant first
+    right_aligned = np.empty((max_digits, len(values)), dtype=np.uint8)
+    rest = magnitude.copy()
+    ten = np.uint64(10)
+    for place in range(max_digits - 1, -1, -1):
+        right_aligned[place] = rest % ten
+        rest //= ten
+    right_aligned += ord("0")
+
+    out = np.empty(len(values), dtype=np.uint64)
+    sign = negative.astype(np.int64)
+    for length, group in _length_groups(digits * 2 + sign):
+        n_digits, has_sign = length // 2, length % 2
+        text_length = n_digits + has_sign
+        block = np.zeros((len(group), (text_length // 16 + 1) * 16), dtype=np.uint8)
+        if has_sign:
+            block[:, 0] = ord("-")
+        block[:, has_sign:text_length] = right_aligned[max_digits - n_digits:, group].T
+        out[group] = _murmur3_fixed(block, text_length, 0)
+    return out
@@ -1,3 +1,7 @@
+import zlib
+
+import numpy as np
+
 def pack_registers(registers: list[int], binbits: int) -> bytes:
     """
     Packs a list of integer registers into a bytes object using the specified number of bits per register.
@@ -105,6 +109,152 @@ def unpack_registers(data: bytes, m: int, binbits: int) -> list[int]:
     
     return regs
 
+def pack_dense_registers(registers: list[int]) -> bytes:
+    """
+    Packs dense registers at 6 bits each, vectorized.
+
+    Produces exactly the same bytes as pack_registers(registers, 6) but in
+    linear time and without the big-int size guard, so it also covers b=17/18.
+    Every 4 registers fill 3 bytes (little-endian, first register in the low bits).
+
+    Args:
+        registers: list[int] - register values (0..63)
+
+    Returns:
+        bytes: packed register data
+
+    Raises:
+        ValueError: If a register does not fit in 6 bits
+    """
+    m = len(registers)
+    if m == 0:
+        return b''
+    regs = np.zeros((m + 3) // 4 * 4, dtype=np.uint32)
+    try:
+        # bytes() converts a list of small ints far faster than numpy does
+        regs[:m] = np.frombuffer(bytes(registers), dtype=np.uint8) if isinstance(registers, list) else registers
+    except ValueError:
+        regs[:m] = registers  # out of byte range: let numpy raise as before
+    if regs.max() > 63:
+        raise ValueError("Register value exceeds 6-bit limit (63)")
+    quads = regs.reshape(-1, 4)
+    # Equation:
+    # word = r0 | r1 << 6 | r2 << 12 | r3 << 18  (24 bits -> 3 bytes)
+    words = quads[:, 0] | (quads[:, 1] << 6) | (quads[:, 2] << 12) | (quads[:, 3] << 18)
+    out = np.empty((len(words), 3), dtype=np.uint8)
+    out[:, 0] = words & 0xFF
+    out[:, 1] = (words >> 8) & 0xFF
+    out[:, 2] = words >> 16
+    return out.tobytes()[:(m * 6 + 7) // 8]
+
+
+def unpack_dense_registers(data: bytes, m: int) -> list[int]:
+    """
+    Unpacks 6-bit dense registers written by pack_dense_registers() or
+    pack_registers(registers, 6), vectorized.
+
+    Args:
+        data: bytes - packed register data
+        m: int - number of registers
+
+    Returns:
+        list[int]: unpacked register values
+
+    Raises:
+        ValueError: If data is insufficient
+    """
+    required_bytes = (m * 6 + 7) // 8
+    if len(data) < required_bytes:
+        raise ValueError(f"Insufficient data: need {required_bytes} bytes, got {len(data)}")
+    groups = (m + 3) // 4
+    raw = np.zeros(groups * 3, dtype=np.uint32)
+    raw[:required_bytes] = np.frombuffer(data, dtype=np.uint8, count=required_bytes)
+    triples = raw.reshape(-1, 3)
+    words = triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)
+    regs = np.empty((groups, 4), dtype=np.uint32)
+    for j in range(4):
+        regs[:, j] = (words >> (6 * j)) & 0x3F
+    return regs.reshape(-1)[:m].tolist()
+
+
+def compress_dense_registers(registers: list[int], level: int = 9) -> bytes:
+    """
+    Entropy-codes dense HLL registers for storage at rest.
+
+    Register values cluster tightly around log2(n/m), so they are stored as
+    one byte per register relative to the minimum value and the byte stream
+    is Huffman-coded with zlib's Z_HUFFMAN_ONLY strategy. The registers have
+    no repeated substrings worth matching, so skipping LZ77 lands within a
+    few percent of the register entropy (about half the 6-bit packed size).
+
+    Args:
+        registers: list[int] - dense register values (0..255)
+        level: int - zlib compression level (default: 9)
+
+    Returns:
+        bytes - minimum register value (1 byte) followed by the zlib stream
+    """
+    base = min(registers) if registers else 0
+    offsets = bytes(r - base for r in registers)
+    encoder = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_HUFFMAN_ONLY)
+    return bytes([base]) + encoder.compress(offsets) + encoder.flush()
+
+
+def bounded_decompress(data: bytes, limit: int) -> bytes:
+    """
+    zlib-decompresses data, producing at most limit bytes.
+
+    Blobs can come from untrusted inputs (hll_union arguments, loads_many
+    containers), and a few KB of DEFLATE can inflate to gigabytes, so the
+    output is capped while decoding rather than checked afterwards.
+
+    Args:
+        data: bytes - zlib stream
+        limit: int - largest acceptable decompressed size
+
+    Returns:
+        bytes - decompressed data
+
+    Raises:
+        ValueError: If the stream is corrupt, truncated or inflates past limit
+    """
+    decoder = zlib.decompressobj()
+    try:
+        out = decoder.decompress(data, limit + 1)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt zlib payload: {e}") from e
+    if len(out) > limit:
+        raise ValueError(f"zlib payload inflates past {limit} bytes")
+    if not decoder.eof:
+        raise ValueError("Truncated zlib payload")
+    return out
+
+
+def decompress_dense_registers(data: bytes, m: int) -> list[int]:
+    """
+    Decodes registers written by compress_dense_registers().
+
+    Args:
+        data: bytes - encoded payload
+        m: int - expected number of registers
+
+    Returns:
+        list[int] - dense register values
+
+    Raises:
+        ValueError: If the payload is corrupt or holds the wrong number of registers
+    """
+    if not data:
+        raise ValueError("Empty dense register payload")
+    base = data[0]
+    offsets = bounded_decompress(data[1:], m)
+    if len(offsets) != m:
+        raise ValueError(f"Expected {m} registers, got {len(offsets)}")
+    if base == 0:
+        return list(offsets)
+    return [base + r for r in offsets]
+
+
 def compress_sparse_registers(sparse_registers: dict[int, int], b: int, rbits: int = 6) -> bytes:
     """
     Compresses sparse HLL registers (dictionary of {idx: rho}) into a bytes object.
@@ -120,8 +270,8 @@ def compress_sparse_registers(sparse_registers: dict[int, int], b: int, rbits: i
     total_bits = 0
     entrybits = b + rbits
 
-    # The loop must iterate over .items() to get both key and value
-    for idx, rho in sparse_registers.items():
+    # Sorted by index so equal register sets always serialize to equal bytes
+    for idx, rho in sorted(sparse_registers.items()):
         entry = (idx << rbits) | (rho & ((1 << rbits) - 1))
         bitstream |= entry << total_bits
         total_bits += entrybits
@@ -1,15 +1,68 @@
 from .dense import DenseHyperLogLog
 from .sparse import SparseHyperLogLog
-from .compression import pack_registers, compress_sparse_registers
+from .dense4 import Dense4HyperLogLog
+from .explicit import ExplicitHyperLogLog, DEFAULT_EXPLICIT_BUDGET, MAX_EXPLICIT_BUDGET
+from . import instrumentation as _instrumentation
+from . import postgres as _postgres
+from . import redis as _redis
+from .hash_utils import murmurhash64a, index_and_rho, low_bits_placement, low_bits_raw, RHO_MAX
+from .columnar import column_hashes
+from .compression import (
+    pack_dense_registers, compress_sparse_registers,
+    compress_dense_registers, decompress_dense_registers, bounded_decompress,
+)
 import base64
 import struct
+from array import array
+from itertools import chain
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+# Mode byte written after the precision in the HLL1 header
+_MODE_FLAGS = {'dense': 0, 'sparse': 1, 'dense4': 2, 'explicit': 3}
+# Register placements, stored in bits 2-3 of the mode byte
+_PLACEMENTS = {'native': 0, 'postgres': 1, 'redis': 2}
+# How each foreign placement hashes an item (postgresql-hll's hll_hash_text is murmurhash64a)
+_PLACEMENT_HASHES = {'postgres': murmurhash64a, 'redis': _redis.redis_hash}
+# Payload encodings, stored in bits 4-6 of the mode byte
+_ENCODINGS = {'packed': 0, 'zlib': 1}
+# Bit 7 of the mode byte: the payload starts with the explicit budget as a
+# uint32. Only set for explicit sketches with a non-default budget.
+_BUDGET_FLAG = 0x80
+# to_delta_bytes(): magic, b, uint32 count, then one uint32 (idx << 6 | rho) per register
+_DELTA_MAGIC = b"HLD1"
+_DELTA_HEADER = struct.Struct(">4sBI")
 
 class HyperLogLog:
     """
-    HyperLogLog (HLL) main interface, delegating to sparse or dense implementations.
+    HyperLogLog (HLL) main interface, delegating to explicit, sparse or dense implementations.
     """
-    def __init__(self, b: int = 14, mode: str = 'sparse', register: int | bytes = 0):
-        """Initializes the HyperLogLog object."""
+    def __init__(self, b: int = 14, mode: str = 'sparse', register: int | bytes = 0,
+                 buffer_size: int = 0, explicit_budget: int | None = None,
+                 placement: str = 'native'):
+        """
+        Initializes the HyperLogLog object.
+
+        mode='explicit' starts with an exact set of raw hashes and promotes
+        to sparse once they take more than explicit_budget bytes (default
+        1024, at most MAX_EXPLICIT_BUDGET), and from there to dense as usual.
+
+        With buffer_size > 0, add() only hashes the item into a preallocated
+        uint64 buffer; registers are updated in vectorized batches when the
+        buffer fills or before estimate/merge/to_bytes read them. Results
+        are identical to the default eager mode.
+
+        placement='postgres' or 'redis' hashes items and places them in
+        registers the way the postgresql-hll extension or Redis PFADD does
+        (index from the low b bits, value from trailing zeros; see
+        hash_utils.low_bits_placement). Such sketches agree register by
+        register with ones built in the database, so they can be exported
+        there and unioned with its sketches. They only merge with sketches
+        of the same placement, cannot reduce precision or buffer adds, and
+        'redis' requires b=14.
+        """
         if not isinstance(b, int) or not (4 <= b <= 18):
             raise ValueError("Value of b not in range [4,18]")
         
@@ -25,52 +78,388 @@ class HyperLogLog:
             self.impl = DenseHyperLogLog(b, register)
         elif self.mode == 'sparse':
             self.impl = SparseHyperLogLog(b, register)
+        elif self.mode == 'dense4':
+            self.impl = Dense4HyperLogLog(b, register)
+        elif self.mode == 'explicit':
+            self.impl = ExplicitHyperLogLog(b, register, explicit_budget)
         else:
-            raise ValueError("Mode must be 'sparse' or 'dense'")
+            raise ValueError("Mode must be 'explicit', 'sparse', 'dense' or 'dense4'")
+        if placement not in _PLACEMENTS:
+            raise ValueError(f"Unknown placement {placement!r}; expected one of {sorted(_PLACEMENTS)}")
+        if placement == 'redis' and b != _redis.REDIS_P:
+            raise ValueError(f"placement='redis' requires b={_redis.REDIS_P}")
+        if placement != 'native' and buffer_size:
+            raise ValueError("buffer_size is not supported with a foreign placement")
+        self.placement = placement
         # CORRECTED: The stale self.registers reference has been removed.
+        self.counters = None  # per-sketch instrumentation counters, attached on first use
+        self._dirty = None  # registers raised since the last to_delta_bytes(), once tracking
+        self._shared_impl = None  # impl still shared with a snapshot(), copied before the next write
+
+        if not isinstance(buffer_size, int) or buffer_size < 0:
+            raise ValueError("buffer_size must be a non-negative integer")
+        self._buffer = array('Q', bytes(8 * buffer_size)) if buffer_size else None
+        self._buffered = 0
+        self._suffix_mask = (1 << (64 - b)) - 1
+        if buffer_size:
+            # Shadow the eager add() on this instance only
+            self.add = self._add_buffered
+        elif placement != 'native':
+            self.add = self._add_placed
 
     def add(self, item: object) -> None:
         """Adds an item to the HLL, converting to dense mode if necessary."""
         if self.impl.add(str(item)):
-            # Signal received from sparse impl to convert to dense
-            self.convert_to_dense()
+            # Signal received from explicit/sparse impl to promote
+            self._upgrade()
+
+    def _add_instrumented(self, item: object) -> None:
+        # Swapped in for add() while instrumentation is enabled
+        self._counters().incr("adds")
+        if self.impl.add(str(item)):
+            self._upgrade()
+
+    _add_plain = add
+
+    def _add_unsharing(self, item: object) -> None:
+        # Shadows add() on the instance after snapshot(); the first add copies the impl
+        self._unshare()
+        self.add(item)
+
+    def _add_placed(self, item: object) -> None:
+        # add() for placement != 'native': the foreign hash, placed by add_hashes()
+        self.add_hashes(np.array([_PLACEMENT_HASHES[self.placement](str(item))], dtype=np.uint64))
+
+    def _add_buffered(self, item: object) -> None:
+        # add() for buffer_size > 0: hash now, update registers at flush()
+        key = str(item)
+        hash_value = murmurhash64a(key)
+        if hash_value & self._suffix_mask:
+            self._buffer[self._buffered] = hash_value
+            self._buffered += 1
+            if self._buffered == len(self._buffer):
+                self.flush()
+        else:
+            self._unshare()
+            if self.impl.add(key):
+                # All-zero suffix: its rho needs the high hash word, so apply it eagerly
+                self._upgrade()
+        if _instrumentation.enabled:
+            self._counters().incr("adds")
+
+    def flush(self) -> None:
+        """Applies any buffered hashes to the registers (no-op in eager mode)."""
+        count = self._buffered
+        if not count:
+            return
+        hashes = np.frombuffer(self._buffer, dtype=np.uint64, count=count)
+        self._buffered = 0
+        self._unshare()
+        if self.impl.add_hashes(hashes):
+            self._upgrade()
+
+    def add_many(self, items: Iterable[object]) -> None:
+        """Adds every item of an iterable; equivalent to calling add() on each."""
+        if self._buffer is not None:
+            add = self._add_buffered
+            for item in items:
+                add(item)
+            return
+        if self.placement != 'native':
+            hash_item = _PLACEMENT_HASHES[self.placement]
+            self.add_hashes(np.fromiter((hash_item(str(item)) for item in items), dtype=np.uint64))
+            return
+        self._unshare()
+        impl_add = self.impl.add
+        count = 0
+        for item in items:
+            count += 1
+            if impl_add(str(item)):
+                self._upgrade()
+                impl_add = self.impl.add
+        if _instrumentation.enabled:
+            self._counters().incr("adds", count)
+
+    def add_array(self, values) -> None:
+        """
+        Adds every non-null value of a column, hashing straight from its
+        buffers instead of creating a Python object per value.
+
+        Accepts pyarrow (Chunked)Arrays of strings, binaries or integers and
+        NumPy str, bytes or integer arrays; see hyperloglog.columnar for how
+        each type is hashed. String and integer columns give the same
+        registers as calling add() on every value. pyarrow is not required.
+
+        Raises:
+            ValueError: For placement='redis', whose hash is not vectorized;
+                use add_many() there.
+        """
+        if self.placement == 'redis':
+            raise ValueError("add_array() does not support placement='redis'; use add_many()")
+        self.add_hashes(column_hashes(values))
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Adds precomputed 64-bit hashes, as murmurhash64a(str(item)) returns,
+        in one vectorized register update.
+
+        With a foreign placement these are that system's raw hashes
+        (postgresql-hll hll_hashval values, Redis MurmurHash64A values).
+
+        Args:
+            hashes (np.ndarray): uint64 hash values.
+        """
+        if self._buffered:
+            self.flush()
+        self._unshare()
+        count = len(hashes)
+        if self.placement != 'native':
+            hashes = low_bits_placement(hashes, self.b)
+            if self.placement == 'postgres':
+                # The extension leaves the registers alone for a hash with no bits above the index
+                hashes = hashes[hashes << np.uint64(self.b) != 0]
+        if self.impl.add_hashes(hashes):
+            self._upgrade()
+        if _instrumentation.enabled:
+            self._counters().incr("adds", count)
+
+    def _counters(self) -> "_instrumentation.Counters":
+        """Returns this sketch's counters, attaching them (and to the impl) on first use."""
+        if self.counters is None:
+            self.counters = _instrumentation.Counters(parent=_instrumentation.GLOBAL)
+            self.impl.counters = self.counters
+        return self.counters
+
+    def stats(self) -> dict:
+        """Returns this sketch's instrumentation counters as a dict."""
+        if self.counters is None:
+            return _instrumentation.Counters().as_dict()
+        return self.counters.as_dict()
 
     def estimate(self) -> float:
-        """Returns the estimated cardinality."""
+        """
+        Returns the estimated cardinality.
+
+        The impl caches the result until a register rises, so polling an
+        unchanged sketch does not rescan the registers.
+        """
+        if self._buffered:
+            self.flush()
+        if _instrumentation.enabled:
+            self._counters()
+            return _instrumentation.timed("estimate", self.impl.estimate)
         return self.impl.estimate()
 
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickles as (b, mode, impl, buffer_size, placement), with the impl in its compact
+        form (see DenseHyperLogLog/SparseHyperLogLog.__reduce_ex__).
+
+        Buffered hashes are flushed first. The copy is rebuilt through
+        __init__, so a buffered sketch unpickles with its add() buffer in
+        place, and instrumentation counters start fresh. With protocol 5
+        the register payload can travel out-of-band:
+
+            buffers = []
+            data = pickle.dumps(hll, protocol=5, buffer_callback=buffers.append)
+            copy = pickle.loads(data, buffers=buffers)
+        """
+        if self._buffered:
+            self.flush()
+        buffer_size = len(self._buffer) if self._buffer is not None else 0
+        return _unpickle, (self.b, self.mode, self.impl, buffer_size, self.placement)
+
+    def snapshot(self) -> "HyperLogLogSnapshot":
+        """
+        Returns a read-only view of the current registers for another thread
+        to estimate or serialize while this sketch keeps ingesting.
+
+        Taking a snapshot flushes buffered hashes and copies nothing. The
+        registers are shared copy-on-write: the first write afterwards
+        (add, add_many, add_hashes, merge, apply_delta or a flush) copies
+        them once, and the snapshot keeps the old ones. Call snapshot() from
+        the writing thread, then hand the view over.
+        """
+        if self._buffered:
+            self.flush()
+        self._shared_impl = self.impl
+        if self._buffer is None and self.placement == 'native':
+            # Buffered and placed adds reach the impl through flush()/add_hashes(), which unshare
+            self.add = self._add_unsharing
+        return HyperLogLogSnapshot(self)
+
+    def _unshare(self) -> None:
+        # Gives this sketch its own impl before a write if a snapshot shares it
+        if self._shared_impl is None:
+            return
+        if self.impl is self._shared_impl:
+            self.impl = self.impl.copy()
+        self._shared_impl = None
+        if self._buffer is None and self.placement == 'native':
+            self.__dict__.pop("add", None)
+
     def storing(self) -> bytes:
         """Serializes the HLL registers for storage."""
+        if self._buffered:
+            self.flush()
         if self.mode == 'dense':
-            # CORRECTED: Use 6 bits for packing dense registers and access via self.impl
-            return pack_registers(self.impl.registers, 6)
+            # 6 bits per register, same layout as pack_registers(registers, 6)
+            return pack_dense_registers(self.impl.registers)
+        elif self.mode in ('dense4', 'explicit'):
+            return self.impl.to_payload()
         else:
             # CORRECTED: Access registers via self.impl
             return compress_sparse_registers(self.impl.registers, self.b)
 
+    def _upgrade(self):
+        # Promotion signal from the impl: explicit -> sparse, sparse -> dense
+        if self.mode == 'explicit':
+            self.convert_to_sparse()
+        else:
+            self.convert_to_dense()
+
+    def convert_to_sparse(self):
+        """
+        Converts the HLL from explicit to sparse mode by replaying the stored
+        hashes; continues on to dense if that crosses the sparse threshold.
+        Only the low hash words are stored, so an all-zero suffix replays as
+        RHO_MAX (see ExplicitHyperLogLog).
+        """
+        if self._buffered:
+            self.flush()
+        if self.mode == 'explicit':
+            if _instrumentation.enabled:
+                self._counters().incr("promotions")
+            hashes = self.impl.hash_array()
+            self.impl = SparseHyperLogLog(self.b)
+            self.mode = 'sparse'
+            self.impl.dirty = self._dirty  # the replayed registers count as changes
+            promote = self.impl.add_hashes(hashes)
+            self.impl.counters = self.counters
+            if promote:
+                self.convert_to_dense()
+
     def convert_to_dense(self):
-        """Converts the HLL from sparse to dense mode."""
+        """Converts the HLL from explicit or sparse to dense mode."""
+        if self._buffered:
+            self.flush()
+        if self.mode == 'explicit':
+            self.convert_to_sparse()
         if self.mode == 'sparse':
-            sparse_regs = self.impl.registers
-            dense_registers = [0] * self.m
-            for idx, rho in sparse_regs.items():
-                dense_registers[idx] = rho
+            if _instrumentation.enabled:
+                self._counters().incr("promotions")
+                _instrumentation.timed("convert_to_dense", self._promote)
+            else:
+                self._promote()
+
+    def _promote(self):
+        # Promote in place from the sparse entries; no pack/unpack round-trip
+        self.impl = DenseHyperLogLog.from_sparse(self.b, self.impl.registers)
+        self.impl.counters = self.counters
+        self.impl.dirty = self._dirty
+        self.mode = 'dense'
+
+    def reduce_precision(self, new_b: int) -> "HyperLogLog":
+        """Returns a copy of this HLL downsampled to precision new_b (<= b)."""
+        if not isinstance(new_b, int) or not (4 <= new_b <= self.b):
+            raise ValueError(f"Value of new_b not in range [4,{self.b}]")
+        if self.placement != 'native' and new_b != self.b:
+            raise ValueError(f"Cannot reduce the precision of a placement={self.placement!r} sketch")
+        if self._buffered:
+            self.flush()
+
+        reduced = HyperLogLog(b=new_b, mode=self.mode, placement=self.placement)
+        reduced.impl = self.impl.reduce_precision(new_b)
+        # Folding can pile sparse entries past the smaller threshold
+        if self.mode == 'sparse' and len(reduced.impl.registers) > reduced.impl.sparse_threshold:
+            reduced.convert_to_dense()
+        return reduced
 
-            # CORRECTED: Use 6 bits for packing dense registers
-            packed = pack_registers(dense_registers, 6)
+    def merge(self, hll2: "HyperLogLog", auto_reduce: bool = False):
+        """
+        Merges another HLL object into this one.
 
-            self.mode = 'dense'
-            self.impl = DenseHyperLogLog(self.b, packed)
+        With auto_reduce=True, sketches of different precision are merged at
+        the lower of the two precisions instead of raising ValueError.
+        Sketches of different placement never merge: the same item sits in
+        different registers on each side, so it would be counted twice.
+        """
+        merge = self._merge if self._dirty is None else self._merge_tracked
+        if _instrumentation.enabled and isinstance(hll2, HyperLogLog):
+            self._counters().record_merge(f"{self.mode}+{hll2.mode}")
+            return _instrumentation.timed("merge", merge, hll2, auto_reduce)
+        return merge(hll2, auto_reduce)
 
-    def merge(self, hll2: "HyperLogLog"):
-        """Merges another HLL object into this one."""
+    def _merge_tracked(self, hll2: "HyperLogLog", auto_reduce: bool = False):
+        # Merges write registers directly, so diff against a before-image
+        # (merging is O(m) anyway); a precision change restarts tracking
+        b = self.b
+        before = self._register_image()
+        self._merge(hll2, auto_reduce)
+        if self.b != b:
+            self._track(None)
+        else:
+            self._dirty.update(np.flatnonzero(self._register_image() != before).tolist())
+        return self
+
+    def _merge(self, hll2: "HyperLogLog", auto_reduce: bool = False):
+        if hll2.placement != self.placement:
+            raise ValueError(f"Cannot merge a placement={hll2.placement!r} sketch into "
+                             f"a placement={self.placement!r} one")
+        if self._buffered:
+            self.flush()
+        if hll2._buffered:
+            hll2.flush()
+        self._unshare()
         if self.b != hll2.b:
-            raise ValueError("Cannot merge HLLs with different precision")
+            if not auto_reduce:
+                raise ValueError("Cannot merge HLLs with different precision")
+            if self.b > hll2.b:
+                reduced = self.reduce_precision(hll2.b)
+                self.b, self.m = reduced.b, reduced.m
+                self.mode, self.impl = reduced.mode, reduced.impl
+                self.impl.counters = self.counters
+            else:
+                hll2 = hll2.reduce_precision(self.b)
+
+        # Explicit on either side: union the raw hashes into the other form
+        if hll2.mode == 'explicit':
+            if self.impl.add_hashes(hll2.impl.hash_array()):
+                self._upgrade()
+            return self
+
+        if self.mode == 'explicit':
+            self.convert_to_sparse()
+            return self._merge(hll2)
+
+        # 4-bit dense on either side: raise registers one at a time through update()
+        if self.mode == 'dense4':
+            if hll2.mode == 'sparse':
+                entries = hll2.impl.registers.items()
+            else:
+                indices, values = hll2._register_arrays()
+                entries = zip(indices.tolist(), values.tolist())
+            for idx, rho in entries:
+                self.impl.update(idx, rho)
+            return self
+
+        if hll2.mode == 'dense4':
+            if self.mode == 'sparse':
+                self.convert_to_dense()
+            registers = self.impl.registers
+            for i, rho in enumerate(hll2.impl.values().tolist()):
+                if rho > registers[i]:
+                    registers[i] = rho
+                    self.impl.cached_estimate = None
+            return self
 
         # Case 1: both dense
         if self.mode == 'dense' and hll2.mode == 'dense':
-            for i in range(self.m):
-                self.impl.registers[i] = max(self.impl.registers[i], hll2.impl.registers[i])
+            registers = self.impl.registers
+            for i, rho in enumerate(hll2.impl.registers):
+                if rho > registers[i]:
+                    registers[i] = rho
+                    self.impl.cached_estimate = None
             return self
 
         # Case 2: self dense, other sparse
@@ -79,13 +468,14 @@ class HyperLogLog:
             for idx, rho in hll2.impl.registers.items():
                 if rho > self.impl.registers[idx]:
                     self.impl.registers[idx] = rho
+                    self.impl.cached_estimate = None
             return self
 
         # Case 3: self sparse, other dense
         if self.mode == 'sparse' and hll2.mode == 'dense':
             self.convert_to_dense()
             # CORRECTED: Cleaner logic to re-run merge after conversion
-            return self.merge(hll2) 
+            return self._merge(hll2)
 
         # Case 4: both sparse
         if self.mode == 'sparse' and hll2.mode == 'sparse':
@@ -94,23 +484,149 @@ class HyperLogLog:
                 current_rho = self.impl.registers.get(idx, 0)
                 if rho > current_rho:
                     self.impl.registers[idx] = rho
+                    self.impl.cached_estimate = None
             
             # After merge, check if it's full enough to convert
             if len(self.impl.registers) > self.impl.sparse_threshold:
                 self.convert_to_dense()
             return self
 
-    def to_bytes(self) -> bytes:
-        """Serializes the HLL into a stable, self-describing binary format."""
+    @classmethod
+    def union(cls, sketches: Iterable["HyperLogLog"], auto_reduce: bool = False) -> "HyperLogLog":
+        """
+        Returns the union of many sketches as a new sketch; the inputs are
+        left unchanged.
+
+        Instead of merging dict by dict, the (index, rho) entries of every
+        sparse and explicit input are gathered into two arrays and reduced
+        to one maximum per index with a single np.maximum.at into a scratch
+        register array. Whether to promote is decided once, from the size of
+        the result. Dense and dense4 inputs are folded in with one numpy
+        maximum each.
+
+        The result is explicit if every input is (promoting as add() would
+        past the budget), dense if any input is dense or dense4 or the
+        union outgrows the sparse threshold, and sparse otherwise.
+
+        Args:
+            sketches (Iterable[HyperLogLog]): Sketches to combine.
+            auto_reduce (bool): Combine sketches of different precision at
+                the lowest one instead of raising ValueError.
+
+        Returns:
+            HyperLogLog: The union.
+
+        Raises:
+            ValueError: If there are no sketches, their placements differ, or
+                their precisions differ and auto_reduce is False.
+        """
+        sketches = list(sketches)
+        if not sketches:
+            raise ValueError("union() needs at least one sketch")
+        if len({hll.placement for hll in sketches}) > 1:
+            raise ValueError("Cannot merge sketches of different placement")
+        b = min(hll.b for hll in sketches)
+        if not auto_reduce and any(hll.b != b for hll in sketches):
+            raise ValueError("Cannot merge HLLs with different precision")
+        if _instrumentation.enabled:
+            return _instrumentation.timed("union", cls._union, sketches, b)
+        return cls._union(sketches, b)
+
+    @classmethod
+    def _union(cls, sketches: list["HyperLogLog"], b: int) -> "HyperLogLog":
+        image, entries, hashes = None, [], []
+        budget = None
+        for hll in sketches:
+            if hll._buffered:
+                hll.flush()
+            if hll.b != b:
+                hll = hll.reduce_precision(b)
+            if hll.mode == 'explicit':
+                hashes.append(hll.impl.hash_array())
+                budget = budget or hll.impl.budget
+            elif hll.mode == 'sparse':
+                entries.append(hll.impl.registers)
+            else:
+                if hll.mode == 'dense4':
+                    registers = hll.impl.values()
+                else:
+                    registers = np.frombuffer(bytes(hll.impl.registers), dtype=np.uint8)
+                image = registers.copy() if image is None else np.maximum(image, registers, out=image)
+
+        if image is None and not entries:
+            result = cls(b=b, mode='explicit', explicit_budget=budget, placement=sketches[0].placement)
+            if result.impl.add_hashes(np.concatenate(hashes)):
+                result._upgrade()
+            return result
+
+        # Every sparse entry in two bulk conversions, then one scatter-max
+        count = sum(map(len, entries))
+        idx = np.fromiter(chain.from_iterable(entries), dtype=np.int64, count=count)
+        rho = np.frombuffer(bytes(chain.from_iterable(r.values() for r in entries)), dtype=np.uint8)
+        if hashes:
+            explicit_idx, explicit_rho = index_and_rho(np.concatenate(hashes), b)
+            idx, rho = np.concatenate((idx, explicit_idx)), np.concatenate((rho, explicit_rho))
+        promote = image is not None
+        if image is None:
+            image = np.zeros(1 << b, dtype=np.uint8)
+        np.maximum.at(image, idx, rho)
+
+        result = cls(b=b, placement=sketches[0].placement)
+        if not promote and np.count_nonzero(image) <= result.impl.sparse_threshold:
+            nonzero = np.flatnonzero(image)
+            result.impl.registers = dict(zip(nonzero.tolist(), image[nonzero].tolist()))
+            return result
+        result.mode = 'dense'
+        result.impl = DenseHyperLogLog(b)
+        result.impl.registers = image.tolist()
+        return result
+
+    def to_bytes(self, encoding: str = 'packed') -> bytes:
+        """
+        Serializes the HLL into a stable, self-describing binary format.
+
+        encoding='packed' writes the mode's native payload. encoding='zlib'
+        entropy-codes it for storage at rest: dense registers are stored as
+        offsets from their minimum and DEFLATE-compressed, other modes have
+        their native payload compressed. from_bytes() detects either form.
+        """
+        if not _instrumentation.enabled:
+            return self._to_bytes(encoding)
+        blob = _instrumentation.timed("to_bytes", self._to_bytes, encoding)
+        self._counters().incr("bytes_serialized", len(blob))
+        return blob
+
+    def _to_bytes(self, encoding: str) -> bytes:
+        if self._buffered:
+            self.flush()
+        if encoding not in _ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}; expected one of {sorted(_ENCODINGS)}")
         magic = b"HLL1"
-        mode_flag = 0 if self.mode == "dense" else 1
-        payload = self.storing()
+        mode_flag = _MODE_FLAGS[self.mode] | (_PLACEMENTS[self.placement] << 2) | (_ENCODINGS[encoding] << 4)
+        if encoding == 'zlib':
+            if self.mode == 'dense':
+                payload = compress_dense_registers(self.impl.registers)
+            else:
+                payload = zlib.compress(self.storing(), 9)
+        else:
+            payload = self.storing()
+        if self.mode == 'explicit' and self.impl.budget != DEFAULT_EXPLICIT_BUDGET:
+            mode_flag |= _BUDGET_FLAG
+            payload = struct.pack(">I", self.impl.budget) + payload
         header = magic + bytes([self.b, mode_flag]) + struct.pack(">I", len(payload))
         return header + payload
 
     @classmethod
     def from_bytes(cls, blob: bytes) -> "HyperLogLog":
         """Reconstructs an HLL from its binary format."""
+        if not _instrumentation.enabled:
+            return cls._from_bytes(blob)
+        hll = _instrumentation.timed("from_bytes", cls._from_bytes, blob)
+        hll._counters().incr("bytes_deserialized", len(blob))
+        return hll
+
+    @classmethod
+    def _from_bytes(cls, blob: bytes) -> "HyperLogLog":
         if len(blob) < 10:
             raise ValueError("HLL blob too short")
             
@@ -118,14 +634,50 @@ class HyperLogLog:
         if magic != b"HLL1":
             raise ValueError("Invalid HLL magic/version")
             
-        mode = "dense" if mode_flag == 0 else "sparse"
+        modes = {flag: name for name, flag in _MODE_FLAGS.items()}
+        placements = {flag: name for name, flag in _PLACEMENTS.items()}
+        encodings = {flag: name for name, flag in _ENCODINGS.items()}
+        if (mode_flag & 0x03) not in modes or (mode_flag >> 2 & 0x03) not in placements \
+                or (mode_flag >> 4 & 0x07) not in encodings:
+            raise ValueError(f"Unknown HLL mode flag {mode_flag}")
+        mode = modes[mode_flag & 0x03]
+        placement = placements[mode_flag >> 2 & 0x03]
+        encoding = encodings[mode_flag >> 4 & 0x07]
         (length,) = struct.unpack(">I", blob[6:10])
         
         if len(blob) != 10 + length:
             raise ValueError("Invalid HLL payload length")
             
         payload = blob[10:]
-        return cls(b=b_val, mode=mode, register=payload)
+        budget = None
+        if mode_flag & _BUDGET_FLAG:
+            if mode != 'explicit' or len(payload) < 4:
+                raise ValueError(f"Unknown HLL mode flag {mode_flag}")
+            (budget,) = struct.unpack(">I", payload[:4])
+            if not 0 < budget <= MAX_EXPLICIT_BUDGET:
+                # Checked before inflating: the budget also caps the zlib output
+                raise ValueError(f"Explicit budget {budget} not in range [1,{MAX_EXPLICIT_BUDGET}]")
+            payload = payload[4:]
+        if encoding == 'zlib':
+            if mode == 'dense':
+                hll = cls(b=b_val, mode=mode, placement=placement)
+                hll.impl.registers = decompress_dense_registers(payload, hll.m)
+                return hll
+            payload = bounded_decompress(payload, cls._max_payload(mode, b_val, budget))
+        return cls(b=b_val, mode=mode, register=payload, placement=placement,
+                   explicit_budget=budget)
+
+    @staticmethod
+    def _max_payload(mode: str, b: int, budget: int | None) -> int:
+        # Largest storing() payload a valid sketch of this mode can have
+        m = 1 << b
+        if mode == 'dense':
+            return (m + 3) // 4 * 3
+        if mode == 'sparse':
+            return (m * (b + 6) + 7) // 8
+        if mode == 'dense4':
+            return 5 + m // 2 + 5 * m
+        return budget or DEFAULT_EXPLICIT_BUDGET
 
     def to_base64(self) -> str:
         """Returns a Base64 representation of the serialized HLL."""
@@ -136,3 +688,288 @@ class HyperLogLog:
         """Builds an HLL from a Base64 string."""
         data = base64.b64decode(s)
         return cls.from_bytes(data)
+
+    def to_delta_bytes(self) -> bytes:
+        """
+        Serializes the registers raised since the previous call as a compact
+        list of (index, rho) updates, and starts a new checkpoint.
+
+        Some calls carry every non-zero register instead: the first one, the
+        first after a merge changed the precision, and any call in explicit
+        mode. Otherwise the size is O(changes) rather than O(m). Replaying a
+        delta with apply_delta() is harmless, because registers merge by max.
+
+        Returns:
+            bytes: b"HLD1", b, uint32 count, then one big-endian uint32
+            (idx << 6 | rho) per register.
+        """
+        if self._buffered:
+            self.flush()
+        if self._dirty is None or self.mode == 'explicit':
+            indices, values = self._register_arrays()
+        else:
+            get = self.impl.get if self.mode == 'dense4' else self.impl.registers.__getitem__
+            indices = sorted(self._dirty)
+            values = [get(idx) for idx in indices]
+        self._track(set())
+        entries = (np.asarray(indices, dtype=np.uint32) << 6) | np.asarray(values, dtype=np.uint32)
+        return _DELTA_HEADER.pack(_DELTA_MAGIC, self.b, len(entries)) + entries.astype('>u4').tobytes()
+
+    def apply_delta(self, delta: bytes) -> "HyperLogLog":
+        """
+        Raises registers to the values of a to_delta_bytes() delta.
+
+        Idempotent and order-independent, since registers merge by max.
+        Registers raised here count as changes in this sketch's own deltas,
+        so replicas can forward them.
+
+        Returns:
+            HyperLogLog: self, for chaining.
+
+        Raises:
+            ValueError: If the delta is malformed or has a different precision.
+        """
+        if len(delta) < _DELTA_HEADER.size:
+            raise ValueError("HLL delta too short")
+        magic, b, count = _DELTA_HEADER.unpack_from(delta)
+        if magic != _DELTA_MAGIC:
+            raise ValueError("Invalid HLL delta magic/version")
+        if len(delta) != _DELTA_HEADER.size + 4 * count:
+            raise ValueError("Invalid HLL delta length")
+        if b != self.b:
+            raise ValueError("Cannot apply a delta of different precision")
+        entries = np.frombuffer(delta, dtype='>u4', offset=_DELTA_HEADER.size)
+        indices, values = entries >> 6, entries & 0x3F
+        if count and int(indices.max()) >= self.m:
+            raise ValueError("Invalid HLL delta register index")
+
+        if self._buffered:
+            self.flush()
+        self._unshare()
+        if self.mode == 'explicit':
+            self.convert_to_sparse()
+        if self.mode == 'sparse':
+            if self.impl.update_many(indices.astype(np.int64), values.astype(np.uint8)):
+                self.convert_to_dense()
+        elif self.mode == 'dense4':
+            for idx, rho in zip(indices.tolist(), values.tolist()):
+                self.impl.update(idx, rho)
+        else:
+            registers, dirty = self.impl.registers, self._dirty
+            for idx, rho in zip(indices.tolist(), values.tolist()):
+                if rho > registers[idx]:
+                    registers[idx] = rho
+                    self.impl.cached_estimate = None
+                    if dirty is not None:
+                        dirty.add(idx)
+        return self
+
+    def _track(self, dirty: set | None) -> None:
+        # Starts (or with None, stops) recording raised registers; the set
+        # is shared with the impl, which adds to it as registers change
+        self._dirty = dirty
+        self.impl.dirty = dirty
+
+    def _register_image(self) -> np.ndarray:
+        # All 2^b registers as one uint8 array
+        image = np.zeros(self.m, dtype=np.uint8)
+        indices, values = self._register_arrays()
+        image[indices.astype(np.int64)] = values
+        return image
+
+    def _register_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        # (indices, values) of the non-zero registers, ascending by index
+        impl = self.impl
+        if self.mode == 'explicit':
+            impl = SparseHyperLogLog(self.b, sparse_threshold=self.m)
+            impl.add_hashes(self.impl.hash_array())
+        if isinstance(impl, SparseHyperLogLog):
+            indices = np.fromiter(sorted(impl.registers), dtype=np.uint64, count=len(impl.registers))
+            values = np.array([impl.registers[int(idx)] for idx in indices], dtype=np.uint64)
+            return indices, values
+        if self.mode == 'dense4':
+            registers = impl.values().astype(np.uint64)
+        else:
+            registers = np.asarray(impl.registers, dtype=np.uint64)
+        indices = np.flatnonzero(registers)
+        return indices.astype(np.uint64), registers[indices]
+
+    def to_postgres_hll(self, regwidth: int = _postgres.DEFAULT_REGWIDTH,
+                        expthresh: int = _postgres.AUTO_EXPTHRESH, sparseon: bool = True,
+                        max_sparse: int = _postgres.AUTO_MAX_SPARSE) -> bytes:
+        """
+        Serializes the HLL in the postgresql-hll (citus `hll` type) storage format.
+
+        Explicit sketches within the expthresh cutoff are written as EXPLICIT
+        raw hashes; everything else as SPARSE or FULL registers (whichever
+        is smaller), with values clamped to 2 ** regwidth - 1.
+
+        Registers match the extension's only for placement='postgres'
+        sketches (see hyperloglog.postgres). A native sketch can still be
+        exported while it is explicit, since its raw hashes equal the
+        extension's hll_hash_* values; its registers are then placed the
+        extension's way from those hashes.
+
+        Args:
+            regwidth (int): Bits per register. Default is 5, as in the extension.
+            expthresh (int): -1 for auto, 0 to disable EXPLICIT, or a power of two.
+            sparseon (bool): Whether SPARSE may be used.
+            max_sparse (int): -1 to pick the smaller of SPARSE and FULL, or
+                the most registers kept SPARSE, as hll_set_max_sparse().
+
+        Returns:
+            bytes: The blob, insertable as `'\\x<hex>'::hll` or via a bytea cast.
+
+        Raises:
+            ValueError: For a placement='redis' sketch, or a native one that
+                is no longer explicit.
+        """
+        if self._buffered:
+            self.flush()
+        params = dict(log2m=self.b, regwidth=regwidth, expthresh=expthresh, sparseon=sparseon)
+        if self.placement == 'redis' or (self.placement == 'native' and self.mode != 'explicit'):
+            raise ValueError(f"The registers of a placement={self.placement!r} sketch do not match the "
+                             "extension's; build it with placement='postgres' to export it")
+        if self.mode == 'explicit':
+            hashes = self.impl.hash_array()
+            if self.placement == 'postgres':
+                hashes = low_bits_raw(hashes, self.b)
+            if expthresh != 0 and len(hashes) <= _postgres.explicit_cutoff(self.b, regwidth, expthresh):
+                return _postgres.encode_explicit(hashes, **params)
+            if self.placement == 'native':
+                placed = HyperLogLog(b=self.b, placement='postgres')
+                placed.add_hashes(hashes)
+                return _postgres.encode_registers(*placed._register_arrays(), max_sparse=max_sparse, **params)
+        return _postgres.encode_registers(*self._register_arrays(), max_sparse=max_sparse, **params)
+
+    @classmethod
+    def from_postgres_hll(cls, data: bytes) -> "HyperLogLog":
+        """
+        Builds a placement='postgres' HLL from a postgresql-hll blob.
+
+        EMPTY and EXPLICIT become an explicit sketch whose budget is the
+        blob's expthresh cutoff, so it promotes when the extension would
+        (EMPTY becomes sparse if EXPLICIT is disabled). SPARSE/FULL become a
+        sparse or dense sketch depending on how many registers are set.
+
+        Raises:
+            ValueError: If the blob is malformed or log2m is outside [4,18].
+        """
+        parsed = _postgres.decode(data)
+        b = parsed["log2m"]
+        if not 4 <= b <= 18:
+            raise ValueError(f"postgresql-hll log2m {b} not in range [4,18]")
+        if parsed["type"] in (_postgres.EMPTY, _postgres.EXPLICIT):
+            cutoff = _postgres.explicit_cutoff(b, parsed["regwidth"], parsed["expthresh"])
+            if not cutoff:
+                return cls(b=b, placement='postgres')
+            hll = cls(b=b, mode='explicit', explicit_budget=min(8 * cutoff, MAX_EXPLICIT_BUDGET),
+                      placement='postgres')
+            hll.add_hashes(parsed.get("hashes", np.empty(0, dtype=np.uint64)))
+            return hll
+        return cls._from_register_arrays(b, parsed["indices"], parsed["values"], 'postgres')
+
+    @classmethod
+    def _from_register_arrays(cls, b: int, indices: np.ndarray, values: np.ndarray,
+                              placement: str = 'native') -> "HyperLogLog":
+        # Sparse or dense sketch (by the usual threshold) from non-zero registers
+        indices = np.asarray(indices, dtype=np.int64)
+        values = np.minimum(values, RHO_MAX).astype(np.int64)
+        hll = cls(b=b, placement=placement)
+        if len(indices) > hll.impl.sparse_threshold:
+            hll.mode = 'dense'
+            hll.impl = DenseHyperLogLog(b)
+            registers = np.zeros(hll.m, dtype=np.int64)
+            registers[indices] = values
+            hll.impl.registers = registers.tolist()
+        else:
+            hll.impl.registers = dict(zip(indices.tolist(), values.tolist()))
+        return hll
+
+    def to_redis(self, encoding: str | None = None, cache_cardinality: bool = False) -> bytes:
+        """
+        Serializes a placement='redis' HLL as a Redis HYLL string, loadable
+        with SET and readable by PFCOUNT/PFMERGE.
+
+        Only such sketches place items in the registers PFADD would, so
+        only they can be merged with Redis keys (see hyperloglog.redis).
+
+        Args:
+            encoding (str | None): 'sparse', 'dense' or None to choose like
+                Redis does (sparse while it fits in 3000 bytes and no register
+                exceeds 32).
+            cache_cardinality (bool): Store estimate() in the header's
+                cardinality cache instead of marking it stale.
+
+        Returns:
+            bytes: The Redis value.
+
+        Raises:
+            ValueError: If the sketch's placement is not 'redis'.
+        """
+        if self.placement != 'redis':
+            raise ValueError(f"The registers of a placement={self.placement!r} sketch do not match "
+                             "PFADD's; build it with placement='redis' to export it")
+        if self._buffered:
+            self.flush()
+        cardinality = round(self.estimate()) if cache_cardinality else None
+        indices, values = self._register_arrays()
+        # An all-zero hash suffix ranks RHO_MAX here, where PFADD stops at REGISTER_MAX
+        values = np.minimum(values, _redis.REGISTER_MAX)
+        return _redis.encode(indices, values, encoding=encoding, cardinality=cardinality)
+
+    @classmethod
+    def from_redis(cls, data: bytes) -> "HyperLogLog":
+        """
+        Builds a b=14, placement='redis' HLL from a Redis HYLL string (dense
+        or sparse), e.g. the result of `GET key` on a PFADD key.
+
+        Raises:
+            ValueError: If the string is not a valid Redis HLL.
+        """
+        parsed = _redis.decode(data)
+        return cls._from_register_arrays(_redis.REDIS_P, parsed["indices"], parsed["values"], 'redis')
+
+
+class HyperLogLogSnapshot(HyperLogLog):
+    """
+    Read-only view of a sketch's registers, as returned by HyperLogLog.snapshot().
+
+    Supports everything that only reads: estimate(), to_bytes() and the
+    other exports, pickling, reduce_precision(), and merging it into
+    another sketch. Methods that write raise TypeError.
+    """
+    def __init__(self, source: HyperLogLog):
+        super().__init__(b=source.b)
+        self.mode, self.impl, self.placement = source.mode, source.impl, source.placement
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("HyperLogLog snapshots are read-only")
+
+    add = add_many = add_array = add_hashes = merge = apply_delta = _read_only
+    to_delta_bytes = convert_to_sparse = convert_to_dense = _read_only
+
+    def snapshot(self) -> "HyperLogLogSnapshot":
+        return self
+
+    def _counters(self) -> "_instrumentation.Counters":
+        # Own counters, leaving the shared impl reporting to the source's
+        if self.counters is None:
+            self.counters = _instrumentation.Counters(parent=_instrumentation.GLOBAL)
+        return self.counters
+
+
+def _unpickle(b: int, mode: str, impl, buffer_size: int, placement: str = 'native') -> HyperLogLog:
+    hll = HyperLogLog(b=b, buffer_size=buffer_size, placement=placement)
+    hll.mode = mode
+    hll.impl = impl
+    return hll
+
+
+def _on_instrumentation_toggle(flag: bool) -> None:
+    # add() is the per-item hot path, so instead of checking a flag on every
+    # call the instrumented variant is swapped in only while enabled.
+    HyperLogLog.add = HyperLogLog._add_instrumented if flag else HyperLogLog._add_plain
+
+
+_instrumentation.on_toggle(_on_instrumentation_toggle)
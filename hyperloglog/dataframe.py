@@ -0,0 +1,155 @@
+"""
+pandas integration: approximate distinct counts and per-group sketches.
+
+    approx_nunique(series)           ~ series.nunique()
+    groupby_sketch(df, by, col)      ~ df.groupby(by)[col].nunique(), as
+                                       mergeable sketches
+
+Values are hashed column-wise (see hyperloglog.columnar) and, for groups,
+folded into registers with one sort and a grouped max instead of a Python
+loop per row. Missing values are ignored, as nunique() does. pandas is not
+imported here; any object with the pandas Series/DataFrame API works.
+
+Sketches from chunked reads combine with `into=`:
+
+    groups = None
+    for chunk in pd.read_csv("events.csv", chunksize=1_000_000):
+        groups = groupby_sketch(chunk, "country", "user_id", into=groups)
+    groups.to_series()
+"""
+import numpy as np
+
+from .core import HyperLogLog
+from .columnar import column_hashes
+from .hash_utils import index_and_rho
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def _series_hashes(series) -> np.ndarray:
+    # Hashes of the non-missing values, consistent with HyperLogLog.add
+    series = series.dropna()
+    dtype = series.dtype
+    # pyarrow-backed dtypes (ArrowDtype, StringDtype("pyarrow")) hand over their buffers
+    if getattr(dtype, "pyarrow_dtype", None) is not None or \
+            str(getattr(dtype, "storage", "")).startswith("pyarrow"):
+        return column_hashes(series.array.__arrow_array__())
+    values = series.to_numpy()
+    if values.dtype.kind not in "iuSU":
+        values = values.astype(object).astype(str)
+    return column_hashes(values)
+
+
+def series_sketch(series, b: int = 14, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> HyperLogLog:
+    """
+    Builds a sketch of a Series' non-missing values.
+
+    Args:
+        series: pandas Series.
+        b (int): Precision parameter. Default is 14.
+        chunk_rows (int): Rows hashed at a time, bounding temporary memory.
+
+    Returns:
+        HyperLogLog: Same registers as add() on every non-missing value.
+    """
+    hll = HyperLogLog(b=b)
+    for start in range(0, len(series), chunk_rows):
+        hll.add_hashes(_series_hashes(series.iloc[start:start + chunk_rows]))
+    return hll
+
+
+def approx_nunique(series, b: int = 14, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> float:
+    """Approximate number of distinct non-missing values in a Series."""
+    return series_sketch(series, b, chunk_rows).estimate()
+
+
+class SketchGroups(dict):
+    """
+    A {group key: HyperLogLog} mapping, as returned by groupby_sketch().
+    """
+    def merge(self, other: "SketchGroups") -> "SketchGroups":
+        """
+        Merges another SketchGroups into this one, key by key.
+
+        Returns:
+            SketchGroups: self, for chaining.
+        """
+        for key, hll in other.items():
+            mine = self.get(key)
+            if mine is None:
+                self[key] = hll
+            else:
+                mine.merge(hll)
+        return self
+
+    def estimates(self) -> dict:
+        """Returns {group key: estimate}."""
+        return {key: hll.estimate() for key, hll in self.items()}
+
+    def to_series(self, name: str | None = None):
+        """Returns the estimates as a pandas Series indexed by group key."""
+        import pandas as pd
+
+        estimates = self.estimates()
+        index = pd.MultiIndex.from_tuples(estimates) if estimates and isinstance(next(iter(estimates)), tuple) \
+            else list(estimates)
+        return pd.Series(list(estimates.values()), index=index, name=name, dtype=float)
+
+
+def groupby_sketch(df, by, col: str, b: int = 14, into: SketchGroups | None = None,
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS) -> SketchGroups:
+    """
+    Builds one sketch of df[col] per group of `by`.
+
+    Args:
+        df: pandas DataFrame.
+        by: Column name or list of names to group by (NaN keys are dropped).
+        col (str): Column whose distinct values are counted.
+        b (int): Precision parameter. Default is 14.
+        into (SketchGroups | None): Existing groups to merge the result into,
+            e.g. from a previous chunk.
+        chunk_rows (int): Rows hashed at a time, bounding temporary memory.
+
+    Returns:
+        SketchGroups: {group key: HyperLogLog}.
+    """
+    key_ids: dict = {}
+    pair_keys, pair_rho = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+    for start in range(0, len(df), chunk_rows):
+        chunk_keys, chunk_rho = _chunk_pairs(df.iloc[start:start + chunk_rows], by, col, b, key_ids)
+        pair_keys, pair_rho = _max_per_key(np.concatenate((pair_keys, chunk_keys)),
+                                           np.concatenate((pair_rho, chunk_rho)))
+
+    groups = SketchGroups()
+    keys = list(key_ids)
+    pair_group = pair_keys >> b
+    pair_idx = pair_keys & ((1 << b) - 1)
+    bounds = np.flatnonzero(np.diff(pair_group)) + 1
+    for first, group_idx, group_rho in zip(np.concatenate(([0], bounds)), np.split(pair_idx, bounds),
+                                           np.split(pair_rho, bounds)):
+        if len(group_idx):
+            groups[keys[int(pair_group[first])]] = HyperLogLog._from_register_arrays(b, group_idx, group_rho)
+    return into.merge(groups) if into is not None else groups
+
+
+def _chunk_pairs(df, by, col: str, b: int, key_ids: dict) -> tuple[np.ndarray, np.ndarray]:
+    # (group id << b | register index, rho) for every kept row, with group
+    # ids numbered across chunks through key_ids
+    grouped = df.groupby(by, sort=False, dropna=True)
+    codes = grouped.ngroup().to_numpy()
+    chunk_ids = np.array([key_ids.setdefault(key, len(key_ids)) for key in grouped.size().index],
+                         dtype=np.int64)
+    values = df[col]
+    keep = (codes >= 0) & values.notna().to_numpy()  # dropped keys are -1 or NaN
+    idx, rho = index_and_rho(_series_hashes(values[keep]), b)
+    return (chunk_ids[codes[keep].astype(np.int64)] << b) | idx, rho
+
+
+def _max_per_key(keys: np.ndarray, rho: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Grouped scatter-max: sort by key and take each run's max rho
+    if not len(keys):
+        return keys, rho
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.maximum.reduceat(rho[order], starts)
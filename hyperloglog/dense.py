@@ -1,9 +1,14 @@
 import math
+import pickle
+
+import numpy as np
 
 from .constants import ALPHA_MM, THRESHOLD
 from .bias_correction import bias_estimate
-from .hash_utils import murmurhash64a
-from .compression import unpack_registers
+from .hash_utils import murmurhash128, index_and_rho, index_and_rho_scalar
+from .compression import pack_dense_registers, unpack_dense_registers
+from .precision import fold_register
+from . import instrumentation
 
 class DenseHyperLogLog:
     """
@@ -25,10 +30,48 @@ class DenseHyperLogLog:
         self.m = 1 << b # number of registers
         if register:
             # Unpack provided serialized register state
-            self.registers = unpack_registers(register, self.m, 6)
+            self.registers = unpack_dense_registers(register, self.m)
         else:
             # Fresh empty registers
             self.registers = [0] * self.m
+        self.counters = None  # instrumentation counters, set by the HyperLogLog wrapper
+        self.dirty = None  # set of raised register indices, set by the HyperLogLog wrapper
+        self.cached_estimate = None  # last estimate(), reset whenever a register rises
+
+    @classmethod
+    def from_sparse(cls, b: int, sparse_registers: dict[int, int]) -> "DenseHyperLogLog":
+        """
+        Builds a dense instance directly from sparse {idx: rho} entries.
+
+        Args:
+            b (int): Precision parameter shared with the sparse sketch.
+            sparse_registers (dict[int, int]): Non-zero registers of the sparse sketch.
+
+        Returns:
+            DenseHyperLogLog: A dense sketch holding the same register values.
+
+        Notes:
+            - Writes straight into a fresh register list, so promotion costs a
+              single pass over the sparse entries and never goes through
+              pack_registers/unpack_registers.
+        """
+        dense = cls(b)
+        registers = dense.registers
+        for idx, rho in sparse_registers.items():
+            registers[idx] = rho
+        return dense
+
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickles as the 6-bit packed registers instead of a list of ints.
+
+        With protocol 5 the packed bytes are a PickleBuffer, so
+        pickle.dumps(..., buffer_callback=...) can send them out-of-band.
+        """
+        payload = pack_dense_registers(self.registers)
+        if protocol >= 5:
+            payload = pickle.PickleBuffer(payload)
+        return _unpickle_dense, (self.b, payload)
 
     def add(self, item: str) -> int:
         """
@@ -40,50 +83,116 @@ class DenseHyperLogLog:
         Returns:
             int: Always returns 0 (placeholder for compatibility with sparse mode).
         """
-        # Hash input with 64-bit murmurhash
-        hash_value = murmurhash64a(item)
-        # Split hash into register index (first b bits) and remainder (w)
-        idx = hash_value >> (64 - self.b)
-        w = (hash_value << self.b) & ((1 << 64) - 1)
-        # Compute rho = position of first set bit + 1
-        rho = self._rho(w, 64 - self.b)
+        # Hash input with 128-bit murmurhash; the high word extends the run
+        # of zeros when the low word's suffix is all zero
+        idx, rho = index_and_rho_scalar(*murmurhash128(item), self.b)
         # Update register with max observed rho for this index
-        self.registers[idx] = max(self.registers[idx], rho)
+        if rho > self.registers[idx]:
+            self.registers[idx] = rho
+            self.cached_estimate = None
+            if self.counters is not None:
+                self.counters.incr("register_changes")
+            if self.dirty is not None:
+                self.dirty.add(idx)
         return 0
 
-    def _rho(self, w: int, max_bits: int) -> int:
+    def add_hashes(self, hashes: np.ndarray) -> int:
         """
-        Computes the position of the first set bit (rho value) in the hash, adjusted for noise.
+        Adds a batch of precomputed 64-bit hashes.
 
         Args:
-            w (int): The hashed value.
-            max_bits (int): The maximum number of bits allowed.
+            hashes (np.ndarray): uint64 hash values, as murmurhash64a would return.
 
         Returns:
-            int: The rho value, capped at `max_bits`.
+            int: Always returns 0 (placeholder for compatibility with sparse mode).
+        """
+        return self.update_many(*index_and_rho(hashes, self.b))
 
-        Notes:
-            - Implements a fallback re-hashing loop if rho is suspiciously large.
-        """
-        # Count leading zeros (clz)
-        def clzll(x): return 64 - x.bit_length() if x != 0 else 64
-        rho = clzll(w) + 1
-        
-        if rho >= 64:
-            # Safety: if rho maxes out, keep rehashing to avoid extreme skew
-            max_val = min(1 << 6, max_bits)  # cap with max_bits
-            safety_counter = 0               
-            while rho < max_val:
-                w = murmurhash64a(str(w))
-                addn = clzll(w) + 1
-                if addn <= 0:
-                    break  # avoid infinite loop
-                rho += addn
-                safety_counter += 1
-                if safety_counter > max_bits:  # hard safety cutoff
-                    break
-
-        return min(rho, max_bits)
+    def update_many(self, idx: np.ndarray, rho: np.ndarray) -> int:
+        """
+        Raises registers to the per-index maximum of a batch of (idx, rho) pairs.
+
+        Batches of at least m / 8 pairs go through one numpy pass over all
+        registers; smaller ones touch only their own indices.
+
+        Args:
+            idx (np.ndarray): Register indices.
+            rho (np.ndarray): rho values, aligned with idx.
+
+        Returns:
+            int: Always returns 0 (placeholder for compatibility with sparse mode).
+        """
+        if len(idx) == 0:
+            return 0
+        if len(idx) * 8 < self.m:
+            return self._update_few(idx, rho)
+        regs = np.array(self.registers, dtype=np.uint8)
+        if not (rho > regs[idx]).any():
+            return 0
+        self.cached_estimate = None
+        tracked = self.counters is not None or self.dirty is not None
+        before = regs.copy() if tracked else None
+        np.maximum.at(regs, idx, rho)
+        if tracked:
+            changed = np.flatnonzero(regs != before)
+            if self.counters is not None:
+                self.counters.incr("register_changes", len(changed))
+            if self.dirty is not None:
+                self.dirty.update(changed.tolist())
+        self.registers[:] = regs.tolist()
+        return 0
+
+    def _update_few(self, idx: np.ndarray, rho: np.ndarray) -> int:
+        # update_many() for batches much smaller than m (e.g. a buffered
+        # flush): one maximum per touched index, then only the registers that
+        # rose are written, so the cost is O(batch) rather than O(m)
+        uniq, inverse = np.unique(idx, return_inverse=True)
+        best = np.zeros(len(uniq), dtype=np.uint8)
+        np.maximum.at(best, inverse, rho)
+        registers = self.registers
+        dirty = self.dirty
+        changed = 0
+        for i, r in zip(uniq.tolist(), best.tolist()):
+            if r > registers[i]:
+                registers[i] = r
+                changed += 1
+                if dirty is not None:
+                    dirty.add(i)
+        if changed:
+            self.cached_estimate = None
+            if self.counters is not None:
+                self.counters.incr("register_changes", changed)
+        return 0
+
+    def copy(self) -> "DenseHyperLogLog":
+        """
+        Returns an independent copy of the registers. The copy keeps the
+        cached estimate and reports to the same counters and dirty set.
+        """
+        copied = DenseHyperLogLog(self.b)
+        copied.registers = self.registers.copy()
+        copied.counters, copied.dirty = self.counters, self.dirty
+        copied.cached_estimate = self.cached_estimate
+        return copied
+
+    def reduce_precision(self, new_b: int) -> "DenseHyperLogLog":
+        """
+        Returns a copy of this sketch downsampled to a lower precision.
+
+        Args:
+            new_b (int): Target precision, at most the current b.
+
+        Returns:
+            DenseHyperLogLog: A new dense sketch with 2^new_b registers.
+        """
+        reduced = DenseHyperLogLog(new_b)
+        registers = reduced.registers
+        for idx, rho in enumerate(self.registers):
+            if rho:
+                new_idx, new_rho = fold_register(idx, rho, self.b, new_b)
+                if new_rho > registers[new_idx]:
+                    registers[new_idx] = new_rho
+        return reduced
 
     def estimate(self) -> float:
         """
@@ -93,10 +202,17 @@ class DenseHyperLogLog:
             float: The estimated number of unique elements.
 
         Notes:
+            - The result is cached until a register rises, so repeated calls
+              on an unchanged sketch cost nothing.
             - Applies raw HyperLogLog formula for large cardinalities.
             - Uses bias correction for mid-range estimates.
             - Uses linear counting for small cardinalities with many zero registers.
         """
+        if self.cached_estimate is None:
+            self.cached_estimate = self._estimate()
+        return self.cached_estimate
+
+    def _estimate(self) -> float:
         m = self.m
         # Raw harmonic mean estimate (HLL formula)
         Z = sum(2.0 ** -r for r in self.registers)
@@ -105,7 +221,10 @@ class DenseHyperLogLog:
         V = self.registers.count(0)
         # Bias correction for small/mid range
         if E <= THRESHOLD[self.b]:
-            correction = bias_estimate(E, self.b)
+            if instrumentation.enabled:
+                correction = instrumentation.timed("bias_estimate", bias_estimate, E, self.b)
+            else:
+                correction = bias_estimate(E, self.b)
             E -= correction
             if E < 0:
                 E = 0
@@ -116,3 +235,7 @@ class DenseHyperLogLog:
                 return H
         # Otherwise, return corrected HLL estimate
         return E
+
+
+def _unpickle_dense(b: int, payload) -> DenseHyperLogLog:
+    return DenseHyperLogLog(b, memoryview(payload))
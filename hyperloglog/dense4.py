@@ -0,0 +1,300 @@
+import math
+import struct
+
+import numpy as np
+
+from .constants import ALPHA_MM, THRESHOLD
+from .bias_correction import bias_estimate
+from .hash_utils import RHO_MAX, murmurhash128, index_and_rho, index_and_rho_scalar
+from .precision import fold_register
+from . import instrumentation
+
+AUX_TOKEN = 15  # nibble value meaning "look the register up in the aux map"
+
+# Per-byte lookup tables for the two nibbles packed in each byte
+_DECREMENT = bytes(
+    (((lo - 1) if lo not in (0, AUX_TOKEN) else lo) | (((hi - 1) if hi not in (0, AUX_TOKEN) else hi) << 4))
+    for hi in range(16) for lo in range(16)
+)
+_ZERO_NIBBLES = bytes(
+    (lo == 0) + (hi == 0)
+    for hi in range(16) for lo in range(16)
+)
+
+
+class Dense4HyperLogLog:
+    """
+    Dense HyperLogLog with 4-bit registers (HLL_4 layout).
+
+    Each register stores its value relative to a shared base offset
+    (cur_min) in one nibble. Values that do not fit in a nibble are marked
+    with AUX_TOKEN and kept exactly in a small exception map, so estimates
+    match the 6-bit dense form while storage drops to 4 bits per register.
+    """
+    def __init__(self, b: int = 14, register: int | bytes = 0):
+        """
+        Initializes the Dense4HyperLogLog instance.
+
+        Args:
+            b (int): Precision parameter (number of bits for indexing registers). Default is 14.
+            register (int or bytes): Payload produced by to_payload() or 0 for a fresh instance.
+        """
+        self.b = b
+        self.m = 1 << b
+        if register:
+            self._load_payload(register)
+        else:
+            self.cur_min = 0
+            self.num_at_cur_min = self.m
+            self.nibbles = bytearray(self.m // 2)
+            self.aux = {}
+        self.counters = None  # instrumentation counters, set by the HyperLogLog wrapper
+        self.dirty = None  # set of raised register indices, set by the HyperLogLog wrapper
+        self.cached_estimate = None  # last estimate(), reset whenever a register rises
+        self._registers = None  # registers tuple, built on first access after a change
+
+    def values(self) -> np.ndarray:
+        """
+        Absolute register values as a read-only uint8 array.
+
+        Computed from the nibbles and the aux map on every call, so read it
+        once per pass rather than once per register; get() reads one register.
+        """
+        packed = np.frombuffer(self.nibbles, dtype=np.uint8)
+        values = np.empty(self.m, dtype=np.uint8)
+        values[0::2] = packed & 0x0F
+        values[1::2] = packed >> 4
+        values += self.cur_min
+        if self.aux:
+            values[list(self.aux)] = list(self.aux.values())
+        values.flags.writeable = False
+        return values
+
+    @property
+    def registers(self) -> tuple[int, ...]:
+        """
+        Absolute register values as a tuple, rebuilt on the first access
+        after a register changes.
+
+        Unlike the dense and sparse impls, whose registers attribute is the
+        live storage, this is a copy: item assignment raises TypeError rather
+        than being silently lost. Raise registers through update().
+        """
+        if self._registers is None:
+            self._registers = tuple(self.values().tolist())
+        return self._registers
+
+    def get(self, idx: int) -> int:
+        """Returns the absolute value of register idx."""
+        byte = self.nibbles[idx >> 1]
+        nibble = (byte >> 4) if idx & 1 else (byte & 0x0F)
+        if nibble == AUX_TOKEN:
+            return self.aux[idx]
+        return self.cur_min + nibble
+
+    def update(self, idx: int, rho: int) -> bool:
+        """
+        Raises register idx to rho if rho is larger.
+
+        Returns:
+            bool: True if the register changed.
+        """
+        if rho <= self.cur_min:
+            return False
+        old = self.get(idx)
+        if rho <= old:
+            return False
+
+        self._set_nibble(idx, rho)
+        self.cached_estimate = None
+        if old == self.cur_min:
+            self.num_at_cur_min -= 1
+            if self.num_at_cur_min == 0:
+                self._shift_base()
+        if self.dirty is not None:
+            self.dirty.add(idx)
+        return True
+
+    def add(self, item: str) -> int:
+        """
+        Adds a single item to the HLL estimator.
+
+        Args:
+            item (str): The item to add (already stringified externally).
+
+        Returns:
+            int: Always returns 0 (placeholder for compatibility with sparse mode).
+        """
+        idx, rho = index_and_rho_scalar(*murmurhash128(item), self.b)
+        if self.update(idx, rho) and self.counters is not None:
+            self.counters.incr("register_changes")
+        return 0
+
+    def add_hashes(self, hashes: np.ndarray) -> int:
+        """
+        Adds a batch of precomputed 64-bit hashes.
+
+        Returns:
+            int: Always returns 0 (placeholder for compatibility with sparse mode).
+        """
+        return self.update_many(*index_and_rho(hashes, self.b))
+
+    def update_many(self, idx: np.ndarray, rho: np.ndarray) -> int:
+        """
+        Raises registers to the per-index maximum of a batch of (idx, rho) pairs.
+
+        Returns:
+            int: Always returns 0 (placeholder for compatibility with sparse mode).
+        """
+        if len(idx):
+            uniq, inverse = np.unique(idx, return_inverse=True)
+            best = np.zeros(len(uniq), dtype=np.uint8)
+            np.maximum.at(best, inverse, rho)
+            changed = 0
+            for i, r in zip(uniq.tolist(), best.tolist()):
+                changed += self.update(i, r)
+            if self.counters is not None:
+                self.counters.incr("register_changes", changed)
+        return 0
+
+    def _set_nibble(self, idx: int, value: int) -> None:
+        """Stores an absolute value, spilling to the aux map when it does not fit."""
+        self._registers = None
+        delta = value - self.cur_min
+        if delta >= AUX_TOKEN:
+            self.aux[idx] = value
+            delta = AUX_TOKEN
+        else:
+            self.aux.pop(idx, None)
+        pos = idx >> 1
+        if idx & 1:
+            self.nibbles[pos] = (self.nibbles[pos] & 0x0F) | (delta << 4)
+        else:
+            self.nibbles[pos] = (self.nibbles[pos] & 0xF0) | delta
+
+    def _shift_base(self) -> None:
+        """Raises cur_min while no register sits at it, re-basing every nibble."""
+        self._registers = None
+        while self.num_at_cur_min == 0:
+            self.cur_min += 1
+            self.nibbles = bytearray(self.nibbles.translate(_DECREMENT))
+            # Exceptions that now fit in a nibble move back into the array
+            for idx, value in list(self.aux.items()):
+                if value - self.cur_min < AUX_TOKEN:
+                    self._set_nibble(idx, value)
+            zeros = self.nibbles.translate(_ZERO_NIBBLES)
+            self.num_at_cur_min = zeros.count(1) + 2 * zeros.count(2)
+
+    def copy(self) -> "Dense4HyperLogLog":
+        """
+        Returns an independent copy of the registers. The copy keeps the
+        cached estimate and reports to the same counters and dirty set.
+        """
+        copied = Dense4HyperLogLog(self.b)
+        copied.cur_min, copied.num_at_cur_min = self.cur_min, self.num_at_cur_min
+        copied.nibbles, copied.aux = bytearray(self.nibbles), dict(self.aux)
+        copied.counters, copied.dirty = self.counters, self.dirty
+        copied.cached_estimate = self.cached_estimate
+        return copied
+
+    def reduce_precision(self, new_b: int) -> "Dense4HyperLogLog":
+        """
+        Returns a copy of this sketch downsampled to a lower precision.
+
+        Args:
+            new_b (int): Target precision, at most the current b.
+
+        Returns:
+            Dense4HyperLogLog: A new 4-bit sketch with 2^new_b registers.
+        """
+        reduced = Dense4HyperLogLog(new_b)
+        values = self.values()
+        for idx in np.flatnonzero(values).tolist():
+            reduced.update(*fold_register(idx, int(values[idx]), self.b, new_b))
+        return reduced
+
+    def to_payload(self) -> bytes:
+        """
+        Serializes the registers as: cur_min (1 byte), m/2 nibble bytes,
+        aux count (uint32) and (uint32 index, uint8 value) exception entries.
+        """
+        parts = [bytes([self.cur_min]), bytes(self.nibbles), struct.pack(">I", len(self.aux))]
+        for idx in sorted(self.aux):
+            parts.append(struct.pack(">IB", idx, self.aux[idx]))
+        return b"".join(parts)
+
+    def _load_payload(self, data: bytes) -> None:
+        """
+        Restores state written by to_payload().
+
+        Raises:
+            ValueError: If the payload is malformed: a register above
+                RHO_MAX, an aux entry outside the registers, out of range or
+                not marked AUX_TOKEN, or an AUX_TOKEN nibble without one.
+        """
+        half = self.m // 2
+        if len(data) < 1 + half + 4:
+            raise ValueError("HLL_4 payload too short")
+        self.cur_min = data[0]
+        if self.cur_min > RHO_MAX:
+            raise ValueError(f"HLL_4 base offset {self.cur_min} exceeds {RHO_MAX}")
+        self.nibbles = bytearray(data[1:1 + half])
+        (count,) = struct.unpack(">I", data[1 + half:5 + half])
+        if len(data) != 5 + half + 5 * count:
+            raise ValueError("Invalid HLL_4 aux length")
+        self.aux = {}
+        for offset in range(5 + half, len(data), 5):
+            idx, value = struct.unpack(">IB", data[offset:offset + 5])
+            if idx >= self.m or idx in self.aux:
+                raise ValueError(f"Invalid HLL_4 aux index {idx}")
+            if not self.cur_min + AUX_TOKEN <= value <= RHO_MAX:
+                raise ValueError(f"HLL_4 aux value {value} out of range")
+            self.aux[idx] = value
+        packed = np.frombuffer(self.nibbles, dtype=np.uint8)
+        tokens = np.empty(self.m, dtype=bool)
+        tokens[0::2] = (packed & 0x0F) == AUX_TOKEN
+        tokens[1::2] = (packed >> 4) == AUX_TOKEN
+        if not np.array_equal(np.flatnonzero(tokens), sorted(self.aux)):
+            raise ValueError("HLL_4 aux entries do not match the AUX_TOKEN nibbles")
+        if int(self.values().max()) > RHO_MAX:
+            raise ValueError(f"HLL_4 register exceeds {RHO_MAX}")
+        zeros = self.nibbles.translate(_ZERO_NIBBLES)
+        self.num_at_cur_min = zeros.count(1) + 2 * zeros.count(2)
+
+    def estimate(self) -> float:
+        """
+        Estimates the cardinality from the 4-bit registers.
+
+        Cached until a register rises.
+
+        Returns:
+            float: The estimated number of unique elements.
+        """
+        if self.cached_estimate is None:
+            self.cached_estimate = self._estimate()
+        return self.cached_estimate
+
+    def _estimate(self) -> float:
+        m = self.m
+        base = self.cur_min
+        # Histogram of nibble values; AUX_TOKEN entries are counted from the aux map
+        packed = np.frombuffer(self.nibbles, dtype=np.uint8)
+        counts = (np.bincount(packed & 0x0F, minlength=16) + np.bincount(packed >> 4, minlength=16)).tolist()
+        Z = sum(c * 2.0 ** -(base + nib) for nib, c in enumerate(counts[:AUX_TOKEN]) if c)
+        Z += sum(2.0 ** -v for v in self.aux.values())
+        E = ALPHA_MM[self.b] / Z
+        # Only registers at the base can be zero
+        V = counts[0] if base == 0 else 0
+        if E <= THRESHOLD[self.b]:
+            if instrumentation.enabled:
+                correction = instrumentation.timed("bias_estimate", bias_estimate, E, self.b)
+            else:
+                correction = bias_estimate(E, self.b)
+            E -= correction
+            if E < 0:
+                E = 0
+        if V > 0:
+            H = m * math.log(m / V)
+            if H <= THRESHOLD[self.b]:
+                return H
+        return E
@@ -0,0 +1,125 @@
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from .hash_utils import murmurhash64a
+
+DEFAULT_EXPLICIT_BUDGET = 1024  # bytes of raw hashes (128 items) before promotion
+MAX_EXPLICIT_BUDGET = 8 << 18  # one hash per register at the largest precision
+
+
+class ExplicitHyperLogLog:
+    """
+    Explicit (exact) HyperLogLog representation for tiny sets.
+
+    Keeps the raw 64-bit hashes of the distinct items in a sorted, compact
+    uint64 array, so estimate() is an exact count. Once the hashes outgrow
+    the byte budget the wrapper promotes the sketch to sparse by replaying
+    the hashes. That yields the registers eager adds would have, except
+    for a hash whose 64 - b bits after the index are all zero: eager add()
+    reads on into the high hash word, which is not stored, so the replay
+    gives that register RHO_MAX (see index_and_rho). This happens with
+    probability 2^-(64 - b) per item, and never for the empty string,
+    which eager add() also maps to RHO_MAX.
+    """
+    def __init__(self, b: int = 14, register: int | bytes = 0, budget: int | None = None):
+        """
+        Initialize an explicit HLL.
+
+        Args:
+            b (int): Precision parameter, used once the sketch is promoted. Default is 14.
+            register (int | bytes): Payload from to_payload() or 0 for empty. Default is 0.
+            budget (int | None): Bytes of hashes to keep before promoting, in
+                [1, MAX_EXPLICIT_BUDGET]. Defaults to DEFAULT_EXPLICIT_BUDGET.
+
+        Raises:
+            ValueError: If budget is out of range, or the payload is malformed
+                or holds more hashes than the budget allows.
+        """
+        if budget is None:
+            budget = DEFAULT_EXPLICIT_BUDGET
+        elif not isinstance(budget, int) or not 0 < budget <= MAX_EXPLICIT_BUDGET:
+            raise ValueError(f"Explicit budget must be an integer in range [1,{MAX_EXPLICIT_BUDGET}]")
+        self.b = b
+        self.m = 1 << b
+        self.budget = budget
+        if register:
+            if len(register) % 8:
+                raise ValueError("Explicit payload length must be a multiple of 8")
+            if len(register) > budget:
+                raise ValueError(f"Explicit payload of {len(register)} bytes exceeds its budget of {budget}")
+            self.hashes = array('Q', np.unique(np.frombuffer(register, dtype='>u8')).astype(np.uint64).tobytes())
+        else:
+            self.hashes = array('Q')
+        self.counters = None  # instrumentation counters, set by the HyperLogLog wrapper
+        self.dirty = None  # unused: deltas of an explicit sketch always carry every register
+
+    def add(self, item: object) -> int:
+        """
+        Adds an item to the explicit set.
+
+        Args:
+            item: object - the item to add (already stringified externally)
+
+        Returns:
+            int - 1 if the byte budget is exceeded and promotion is needed, 0 otherwise
+        """
+        self._insert(murmurhash64a(item))
+        return self._over_budget()
+
+    def add_hashes(self, hashes: np.ndarray) -> int:
+        """
+        Adds a batch of precomputed 64-bit hashes.
+
+        Returns:
+            int - 1 if the byte budget is exceeded and promotion is needed, 0 otherwise
+        """
+        if len(hashes):
+            before = len(self.hashes)
+            merged = np.union1d(np.frombuffer(self.hashes, dtype=np.uint64), np.asarray(hashes, dtype=np.uint64))
+            self.hashes = array('Q', merged.tobytes())
+            if self.counters is not None:
+                self.counters.incr("register_changes", len(self.hashes) - before)
+        return self._over_budget()
+
+    def _insert(self, hash_value: int) -> None:
+        hashes = self.hashes
+        pos = bisect_left(hashes, hash_value)
+        if pos == len(hashes) or hashes[pos] != hash_value:
+            hashes.insert(pos, hash_value)
+            if self.counters is not None:
+                self.counters.incr("register_changes")
+
+    def _over_budget(self) -> int:
+        return 1 if 8 * len(self.hashes) > self.budget else 0
+
+    def hash_array(self) -> np.ndarray:
+        """Returns the stored hashes as a uint64 array (a view, not a copy)."""
+        return np.frombuffer(self.hashes, dtype=np.uint64)
+
+    def copy(self) -> "ExplicitHyperLogLog":
+        """Returns an independent copy of the hashes, reporting to the same counters."""
+        copied = ExplicitHyperLogLog(self.b, budget=self.budget)
+        copied.hashes = array('Q', self.hashes)
+        copied.counters = self.counters
+        return copied
+
+    def reduce_precision(self, new_b: int) -> "ExplicitHyperLogLog":
+        """Returns a copy at precision new_b; the hashes themselves do not depend on b."""
+        reduced = ExplicitHyperLogLog(new_b, budget=self.budget)
+        reduced.hashes = array('Q', self.hashes)
+        return reduced
+
+    def to_payload(self) -> bytes:
+        """Serializes the sorted hashes as big-endian uint64 values."""
+        return self.hash_array().astype('>u8').tobytes()
+
+    def estimate(self) -> float:
+        """
+        Returns the exact number of distinct items seen.
+
+        Returns:
+            float: Count of distinct hashes.
+        """
+        return float(len(self.hashes))
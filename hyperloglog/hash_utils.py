@@ -1,6 +1,12 @@
 import mmh3
+import numpy as np
 from typing import Union
 
+from .constants import RHO_BITS
+
+# Largest register value; registers are stored in RHO_BITS bits
+RHO_MAX = (1 << RHO_BITS) - 1
+
 def murmurhash64a(key: Union[str, bytes], seed: int = 0) -> int:
     """
     MurmurHash64A using mmh3 instead of manual implementation.
@@ -29,3 +35,256 @@ def murmurhash64a(key: Union[str, bytes], seed: int = 0) -> int:
     # we return the low 64-bit value (just like PostgreSQL does).
     return low64
 
+
+def murmurhash128(key: Union[str, bytes], seed: int = 0) -> tuple[int, int]:
+    """
+    Both 64-bit halves of the same MurmurHash3 x64-128 hash.
+
+    Returns:
+        tuple[int, int]: (low, high), where low == murmurhash64a(key).
+    """
+    if isinstance(key, str):
+        key = key.encode("utf8")
+    elif not isinstance(key, bytes):
+        raise TypeError("key must be str or bytes")
+    return mmh3.hash64(key, seed=seed, signed=False)
+
+
+def index_and_rho_scalar(low: int, high: int, b: int) -> tuple[int, int]:
+    """
+    Splits a 128-bit hash into register index and rho.
+
+    The index is the top b bits of the low word. rho is the number of
+    leading zeros plus one in the 128 - b bits that follow: the low word's
+    suffix and then the high word. That equals clz(suffix) + 1 whenever
+    the suffix is non-zero. An all-zero suffix simply continues into the
+    high word, with no rehashing and no data-dependent loop. Capped at RHO_MAX.
+
+    Args:
+        low: int - low 64 bits (murmurhash64a).
+        high: int - high 64 bits.
+        b: int - precision parameter.
+
+    Returns:
+        tuple[int, int]: (index, rho).
+    """
+    stream = ((low << 64) | high) & ((1 << (128 - b)) - 1)
+    return low >> (64 - b), min(129 - b - stream.bit_length(), RHO_MAX)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    # Smear the highest set bit downwards; its popcount is then the bit length
+    x = x.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        x |= x >> np.uint64(shift)
+    return np.bitwise_count(x).astype(np.int64)
+
+
+def index_and_rho(hashes: np.ndarray, b: int, highs: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized index_and_rho_scalar().
+
+    Without highs (only murmurhash64a values are known), the high word is
+    taken as zero, so an all-zero suffix gets RHO_MAX. That is exact for
+    the empty string, which hashes to (0, 0). For any other key the chance
+    of an all-zero suffix is 2^-(64 - b).
+
+    Args:
+        hashes: np.ndarray - uint64 low hash words.
+        b: int - precision parameter.
+        highs: np.ndarray | None - matching uint64 high hash words.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (index as int64, rho as uint8).
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    idx = (hashes >> np.uint64(64 - b)).astype(np.int64)
+    rho = 65 - _bit_length(hashes << np.uint64(b))
+    if highs is not None:
+        zero = rho == 65
+        rho[zero] = 129 - b - _bit_length(np.asarray(highs, dtype=np.uint64)[zero])
+    else:
+        rho[rho == 65] = RHO_MAX
+    return idx, np.minimum(rho, RHO_MAX).astype(np.uint8)
+
+
+# Every byte value with its bit order reversed
+_REVERSED_BYTES = np.array([int(f"{i:08b}"[::-1], 2) for i in range(256)], dtype=np.uint8)
+
+
+def _reverse_bits(x: np.ndarray) -> np.ndarray:
+    # Reverses all 64 bits: each byte through the table, then the byte order
+    return _REVERSED_BYTES[x.view(np.uint8)].view(np.uint64).byteswap()
+
+
+def low_bits_placement(hashes: np.ndarray, b: int) -> np.ndarray:
+    """
+    Rearranges raw hashes so that index_and_rho() places them the way
+    postgresql-hll and Redis do.
+
+    Those take the register index from the LOW b bits of the hash and rho
+    from the trailing zeros (plus one) of the 64 - b bits above them. This
+    moves the low b bits to the top and bit-reverses the rest, which turns
+    trailing zeros into leading zeros: index_and_rho() of the result is
+    their (index, rho) for every hash whose upper 64 - b bits are not all
+    zero. The mapping is a bijection, undone by low_bits_raw().
+
+    Args:
+        hashes: np.ndarray - uint64 raw hashes.
+        b: int - precision parameter.
+
+    Returns:
+        np.ndarray: uint64 hashes in this package's layout.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    index = hashes & np.uint64((1 << b) - 1)
+    return index << np.uint64(64 - b) | _reverse_bits(hashes >> np.uint64(b)) >> np.uint64(b)
+
+
+def low_bits_raw(hashes: np.ndarray, b: int) -> np.ndarray:
+    """
+    Inverse of low_bits_placement(): recovers the raw hashes.
+
+    Args:
+        hashes: np.ndarray - uint64 hashes from low_bits_placement().
+        b: int - precision parameter.
+
+    Returns:
+        np.ndarray: uint64 raw hashes.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    rest = _reverse_bits(hashes & np.uint64((1 << (64 - b)) - 1)) >> np.uint64(b)
+    return rest << np.uint64(b) | hashes >> np.uint64(64 - b)
+
+
+_C1 =np.uint64(0x87c37b91114253d5)
+_C2 = np.uint64(0x4cf5ad432745937f)
+
+
+def _rotl(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint64(r)) | (x >> np.uint64(64 - r))
+
+
+def _fmix(k: np.ndarray) -> np.ndarray:
+    k ^= k >> np.uint64(33)
+    k *= np.uint64(0xff51afd7ed558ccd)
+    k ^= k >> np.uint64(33)
+    k *= np.uint64(0xc4ceb9fe1a85ec53)
+    k ^= k >> np.uint64(33)
+    return k
+
+
+def _murmur3_fixed(rows: np.ndarray, length: int, seed: int) -> np.ndarray:
+    # Low 64 bits of MurmurHash3 x64-128 for n keys of the same length,
+    # given as an (n, ceil(length / 16) * 16) zero-padded uint8 matrix
+    words = rows.view('<u8').astype(np.uint64)
+    n = len(rows)
+    h1 = np.full(n, seed, dtype=np.uint64)
+    h2 = np.full(n, seed, dtype=np.uint64)
+    nblocks = length // 16
+    for j in range(nblocks):
+        k1 = words[:, 2 * j] * _C1
+        k1 = _rotl(k1, 31) * _C2
+        h1 ^= k1
+        h1 = _rotl(h1, 27) + h2
+        h1 = h1 * np.uint64(5) + np.uint64(0x52dce729)
+        k2 = words[:, 2 * j + 1] * _C2
+        k2 = _rotl(k2, 33) * _C1
+        h2 ^= k2
+        h2 = _rotl(h2, 31) + h1
+        h2 = h2 * np.uint64(5) + np.uint64(0x38495ab5)
+    tail = length & 15
+    # The zero padding makes the partial tail words equal to the reference
+    # implementation's byte-wise tail assembly
+    if tail > 8:
+        k2 = words[:, 2 * nblocks + 1] * _C2
+        h2 ^= _rotl(k2, 33) * _C1
+    if tail:
+        k1 = words[:, 2 * nblocks] * _C1
+        h1 ^= _rotl(k1, 31) * _C2
+    h1 ^= np.uint64(length)
+    h2 ^= np.uint64(length)
+    h1 += h2
+    h2 += h1
+    h1 = _fmix(h1)
+    h2 = _fmix(h2)
+    return h1 + h2
+
+
+def _length_groups(lengths: np.ndarray):
+    # Yields (length, row indices) for every distinct key length
+    order = np.argsort(lengths, kind='stable')
+    bounds = np.flatnonzero(np.diff(lengths[order])) + 1
+    for group in np.split(order, bounds):
+        if len(group):
+            yield int(lengths[group[0]]), group
+
+
+def murmurhash64a_array(data: np.ndarray, offsets: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Vectorized murmurhash64a over many keys stored back to back.
+
+    Key i is data[offsets[i]:offsets[i + 1]] (the Arrow string/binary
+    layout). Keys are grouped by length and each group is hashed as one
+    matrix, so no per-key Python objects are created.
+
+    Args:
+        data: np.ndarray - uint8 buffer holding the concatenated keys.
+        offsets: np.ndarray - n + 1 ascending offsets into data.
+        seed: Initial seed value. Defaults to 0.
+
+    Returns:
+        np.ndarray: uint64 hashes, equal to murmurhash64a() of each key.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return murmurhash64a_slices(data, offsets[:-1], offsets[1:] - offsets[:-1], seed)
+
+
+def murmurhash64a_slices(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray,
+                         seed: int = 0) -> np.ndarray:
+    """
+    Vectorized murmurhash64a over arbitrary slices of one buffer.
+
+    Args:
+        data: np.ndarray - uint8 buffer.
+        starts: np.ndarray - start offset of each key.
+        lengths: np.ndarray - length of each key.
+        seed: Initial seed value. Defaults to 0.
+
+    Returns:
+        np.ndarray: uint64 hashes, equal to murmurhash64a(data[start:start + length]).
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    out = np.empty(len(starts), dtype=np.uint64)
+    for length, group in _length_groups(lengths):
+        rows = np.zeros((len(group), (length // 16 + 1) * 16), dtype=np.uint8)
+        if length:
+            rows[:, :length] = data[starts[group, None] + np.arange(length)]
+        out[group] = _murmur3_fixed(rows, length, seed)
+    return out
+
+
+def murmurhash64a_padded(rows: np.ndarray, lengths: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Vectorized murmurhash64a over keys held in the rows of a zero-padded matrix.
+
+    Args:
+        rows: np.ndarray - (n, width) uint8 matrix; key i is rows[i, :lengths[i]]
+            and the rest of the row is zero.
+        lengths: np.ndarray - n key lengths.
+        seed: Initial seed value. Defaults to 0.
+
+    Returns:
+        np.ndarray: uint64 hashes, equal to murmurhash64a() of each key.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    out = np.empty(len(rows), dtype=np.uint64)
+    for length, group in _length_groups(lengths):
+        width = (length // 16 + 1) * 16
+        block = np.zeros((len(group), width), dtype=np.uint8)
+        used = min(width, rows.shape[1])
+        block[:, :used] = rows[group, :used]
+        out[group] = _murmur3_fixed(block, length, seed)
+    return out
@@ -0,0 +1,144 @@
+"""
+Opt-in instrumentation for HyperLogLog sketches.
+
+Disabled by default. While disabled, HyperLogLog.add is the plain method
+and every other hook sits behind a single flag check on rare or per-call
+paths, so there is no per-item cost. Once enabled, each sketch lazily gets
+its own Counters (rolled up into the global ones) and timing hooks are
+called around estimate, bias_estimate, merge, union, convert_to_dense,
+to_bytes and from_bytes.
+
+Usage:
+    from hyperloglog import instrumentation
+    instrumentation.enable()
+    instrumentation.add_timing_hook(lambda event, ns: print(event, ns))
+    ...
+    metrics = instrumentation.snapshot()
+"""
+import time
+from typing import Callable
+
+FIELDS = (
+    "adds",               # items passed to add()/add_many()
+    "register_changes",   # adds that actually raised a register
+    "promotions",         # explicit -> sparse and sparse -> dense conversions
+    "merges",             # merge() calls
+    "bytes_serialized",   # bytes produced by to_bytes()
+    "bytes_deserialized", # bytes consumed by from_bytes()
+)
+
+enabled = False
+_timing_hooks: list[Callable[[str, int], None]] = []
+_toggle_listeners: list[Callable[[bool], None]] = []
+
+
+class Counters:
+    """
+    A set of instrumentation counters.
+
+    Per-sketch Counters pass every increment on to their parent, which is
+    the global Counters instance.
+    """
+    def __init__(self, parent: "Counters | None" = None):
+        self.parent = parent
+        self.values = dict.fromkeys(FIELDS, 0)
+        self.merges_by_mode: dict[str, int] = {}
+
+    def incr(self, name: str, n: int = 1) -> None:
+        """Adds n to counter `name` here and in the parent (no-op while disabled)."""
+        if not enabled:
+            return
+        self.values[name] += n
+        if self.parent is not None:
+            self.parent.values[name] += n
+
+    def record_merge(self, pair: str) -> None:
+        """Counts one merge under its "<self mode>+<other mode>" pair."""
+        if not enabled:
+            return
+        self.incr("merges")
+        for counters in (self, self.parent):
+            if counters is not None:
+                counters.merges_by_mode[pair] = counters.merges_by_mode.get(pair, 0) + 1
+
+    def as_dict(self) -> dict:
+        """Returns a plain-dict copy of the counters."""
+        snap = dict(self.values)
+        snap["merges_by_mode"] = dict(self.merges_by_mode)
+        return snap
+
+    def reset(self) -> None:
+        self.values = dict.fromkeys(FIELDS, 0)
+        self.merges_by_mode = {}
+
+
+GLOBAL = Counters()
+
+
+def enable() -> None:
+    """Turns instrumentation on for all sketches."""
+    _set_enabled(True)
+
+
+def disable() -> None:
+    """Turns instrumentation off; counters keep their values."""
+    _set_enabled(False)
+
+
+def is_enabled() -> bool:
+    return enabled
+
+
+def _set_enabled(flag: bool) -> None:
+    global enabled
+    enabled = flag
+    for listener in _toggle_listeners:
+        listener(flag)
+
+
+def on_toggle(listener: Callable[[bool], None]) -> None:
+    """Registers a callback run with the new state whenever enable()/disable() is called."""
+    _toggle_listeners.append(listener)
+
+
+def snapshot() -> dict:
+    """
+    Returns the global counters as a dict, ready to ship to a metrics system.
+
+    Returns:
+        dict: {"enabled": bool, <counter>: int, ..., "merges_by_mode": {pair: int}}
+    """
+    snap = GLOBAL.as_dict()
+    snap["enabled"] = enabled
+    return snap
+
+
+def reset() -> None:
+    """Zeroes the global counters."""
+    GLOBAL.reset()
+
+
+def add_timing_hook(hook: Callable[[str, int], None]) -> None:
+    """
+    Registers hook(event, elapsed_ns), called after each timed operation.
+
+    Events: "estimate", "bias_estimate", "merge", "union",
+    "convert_to_dense", "to_bytes", "from_bytes".
+    """
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: Callable[[str, int], None]) -> None:
+    _timing_hooks.remove(hook)
+
+
+def timed(event: str, fn: Callable, *args, **kwargs):
+    """Calls fn(*args, **kwargs), reporting its duration to the timing hooks."""
+    if not _timing_hooks:
+        return fn(*args, **kwargs)
+    start = time.perf_counter_ns()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter_ns() - start
+    for hook in list(_timing_hooks):
+        hook(event, elapsed)
+    return result
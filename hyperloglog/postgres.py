@@ -0,0 +1,194 @@
+"""
+postgresql-hll (citus/aggregateknowledge) storage format.
+
+Layout, per the extension's STORAGE.markdown (schema version 1):
+
+    byte 0   version << 4 | type     (EMPTY 1, EXPLICIT 2, SPARSE 3, FULL 4)
+    byte 1   (regwidth - 1) << 5 | log2m
+    byte 2   sparseon << 6 | expthresh   (0 = explicit off, 63 = auto,
+                                           n = 2 ** (n - 1) hashes)
+    data     EXPLICIT: sorted signed big-endian int64 hashes
+             SPARSE:   (index << regwidth | value) chunks of log2m + regwidth
+                       bits for every non-zero register, ascending index
+             FULL:     every register in regwidth bits
+             Bit-packed data is MSB-first and zero-padded to a whole byte.
+
+Hashing: hll_hash_text and friends return the low 64 bits of MurmurHash3
+x64-128 with seed 0, which is murmurhash64a(). The extension takes the
+register index from the LOW log2m bits of that hash and the value from the
+trailing zeros (plus one) of the rest, and a hash with no bits above the
+index sets nothing. HyperLogLog(placement='postgres') adds items the same
+way, so its SPARSE/FULL blobs agree register by register with ones built
+in the database and union with them without double counting.
+from_postgres_hll() returns such sketches. Native sketches export only
+while explicit: their raw hashes are the extension's.
+"""
+import numpy as np
+
+SCHEMA_VERSION = 1
+EMPTY, EXPLICIT, SPARSE, FULL = 1, 2, 3, 4
+AUTO_EXPTHRESH = -1
+AUTO_MAX_SPARSE = -1
+DEFAULT_REGWIDTH = 5
+
+
+def _pack_bits(values: np.ndarray, width: int) -> bytes:
+    """Packs unsigned values into width-bit fields, MSB-first."""
+    values = np.asarray(values, dtype=np.uint64)
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    bits = ((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+    return np.packbits(bits.ravel()).tobytes()
+
+
+def _unpack_bits(data: bytes, width: int, count: int) -> np.ndarray:
+    """Inverse of _pack_bits: reads count width-bit fields, MSB-first."""
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    if len(bits) < count * width:
+        raise ValueError("postgresql-hll payload is truncated")
+    fields = bits[:count * width].reshape(count, width).astype(np.uint64)
+    weights = np.uint64(1) << np.arange(width - 1, -1, -1, dtype=np.uint64)
+    return fields @ weights
+
+
+def _encode_expthresh(expthresh: int) -> int:
+    if expthresh == AUTO_EXPTHRESH:
+        return 63
+    if expthresh == 0:
+        return 0
+    if expthresh < 0 or expthresh & (expthresh - 1) or expthresh > 1 << 32:
+        raise ValueError("expthresh must be -1 (auto), 0 or a power of two up to 2**32")
+    return expthresh.bit_length()
+
+
+def _decode_expthresh(value: int) -> int:
+    if value == 63:
+        return AUTO_EXPTHRESH
+    return 1 << (value - 1) if value else 0
+
+
+def explicit_cutoff(log2m: int, regwidth: int, expthresh: int) -> int:
+    """Largest number of hashes kept in EXPLICIT form for these parameters."""
+    if expthresh == AUTO_EXPTHRESH:
+        # The extension's auto cutoff: as many hashes as fit in a FULL blob
+        return ((1 << log2m) * regwidth + 7) // 8 // 8
+    return expthresh
+
+
+def encode_header(kind: int, log2m: int, regwidth: int = DEFAULT_REGWIDTH,
+                  expthresh: int = AUTO_EXPTHRESH, sparseon: bool = True) -> bytes:
+    """Builds the three header bytes."""
+    if not 1 <= regwidth <= 8:
+        raise ValueError("regwidth must be in range [1,8]")
+    if not 0 <= log2m <= 31:
+        raise ValueError("log2m must be in range [0,31]")
+    return bytes([
+        SCHEMA_VERSION << 4 | kind,
+        (regwidth - 1) << 5 | log2m,
+        (0x40 if sparseon else 0) | _encode_expthresh(expthresh),
+    ])
+
+
+def encode_explicit(hashes: np.ndarray, log2m: int, regwidth: int = DEFAULT_REGWIDTH,
+                    expthresh: int = AUTO_EXPTHRESH, sparseon: bool = True) -> bytes:
+    """
+    Encodes raw 64-bit hashes as an EXPLICIT (or EMPTY) blob.
+
+    Args:
+        hashes (np.ndarray): Distinct unsigned 64-bit hashes.
+        log2m, regwidth, expthresh, sparseon: Header parameters.
+
+    Returns:
+        bytes: The postgresql-hll blob.
+    """
+    if not len(hashes):
+        return encode_header(EMPTY, log2m, regwidth, expthresh, sparseon)
+    signed = np.sort(np.asarray(hashes, dtype=np.uint64).view(np.int64))
+    return encode_header(EXPLICIT, log2m, regwidth, expthresh, sparseon) + signed.astype('>i8').tobytes()
+
+
+def encode_registers(indices: np.ndarray, values: np.ndarray, log2m: int,
+                     regwidth: int = DEFAULT_REGWIDTH, expthresh: int = AUTO_EXPTHRESH,
+                     sparseon: bool = True, max_sparse: int = AUTO_MAX_SPARSE) -> bytes:
+    """
+    Encodes non-zero registers as a SPARSE, FULL or EMPTY blob.
+
+    When sparseon is set, SPARSE is chosen while it is strictly smaller
+    than FULL, or with max_sparse >= 0 (the extension's hll_set_max_sparse
+    setting) while at most max_sparse registers are set. Values above
+    2 ** regwidth - 1 are clamped.
+
+    Args:
+        indices (np.ndarray): Register indices, ascending.
+        values (np.ndarray): Matching non-zero register values.
+        log2m, regwidth, expthresh, sparseon: Header parameters.
+        max_sparse (int): -1 for auto, or the most registers kept SPARSE.
+
+    Returns:
+        bytes: The postgresql-hll blob.
+    """
+    indices = np.asarray(indices, dtype=np.uint64)
+    values = np.minimum(np.asarray(values, dtype=np.uint64), (1 << regwidth) - 1)
+    if not len(indices):
+        return encode_header(EMPTY, log2m, regwidth, expthresh, sparseon)
+    m = 1 << log2m
+    if max_sparse == AUTO_MAX_SPARSE:
+        sparse = len(indices) * (log2m + regwidth) < m * regwidth
+    else:
+        sparse = len(indices) <= max_sparse
+    if sparseon and sparse:
+        chunks = indices << np.uint64(regwidth) | values
+        return encode_header(SPARSE, log2m, regwidth, expthresh, sparseon) + _pack_bits(chunks, log2m + regwidth)
+    full = np.zeros(m, dtype=np.uint64)
+    full[indices.astype(np.int64)] = values
+    return encode_header(FULL, log2m, regwidth, expthresh, sparseon) + _pack_bits(full, regwidth)
+
+
+def decode(data: bytes) -> dict:
+    """
+    Parses a postgresql-hll blob.
+
+    Args:
+        data (bytes): The blob, e.g. from `SELECT hll_col::bytea`.
+
+    Returns:
+        dict: "type", "log2m", "regwidth", "expthresh", "sparseon" and either
+        "hashes" (uint64 array, EXPLICIT) or "indices"/"values" (arrays of
+        the non-zero registers, SPARSE/FULL). EMPTY has neither.
+
+    Raises:
+        ValueError: On an unknown version/type or a malformed payload.
+    """
+    data = bytes(data)
+    if len(data) < 3:
+        raise ValueError("postgresql-hll blob is too short")
+    version, kind = data[0] >> 4, data[0] & 0x0F
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported postgresql-hll schema version {version}")
+    parsed = {
+        "type": kind,
+        "regwidth": (data[1] >> 5) + 1,
+        "log2m": data[1] & 0x1F,
+        "sparseon": bool(data[2] & 0x40),
+        "expthresh": _decode_expthresh(data[2] & 0x3F),
+    }
+    payload = data[3:]
+    log2m, regwidth = parsed["log2m"], parsed["regwidth"]
+    if kind == EMPTY:
+        pass
+    elif kind == EXPLICIT:
+        if len(payload) % 8:
+            raise ValueError("EXPLICIT payload length must be a multiple of 8")
+        parsed["hashes"] = np.frombuffer(payload, dtype='>i8').astype(np.int64).view(np.uint64)
+    elif kind == SPARSE:
+        width = log2m + regwidth
+        chunks = _unpack_bits(payload, width, len(payload) * 8 // width)
+        chunks = chunks[chunks != 0]  # trailing padding decodes as zero chunks
+        parsed["indices"] = chunks >> np.uint64(regwidth)
+        parsed["values"] = chunks & np.uint64((1 << regwidth) - 1)
+    elif kind == FULL:
+        full = _unpack_bits(payload, regwidth, 1 << log2m)
+        parsed["indices"] = np.flatnonzero(full).astype(np.uint64)
+        parsed["values"] = full[full != 0]
+    else:
+        raise ValueError(f"Unsupported postgresql-hll type {kind}")
+    return parsed
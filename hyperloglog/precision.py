@@ -0,0 +1,33 @@
+from .hash_utils import RHO_MAX
+
+
+def fold_register(idx: int, rho: int, b: int, new_b: int) -> tuple[int, int]:
+    """
+    Maps a register from precision b down to precision new_b.
+
+    Lowering the precision moves the low (b - new_b) bits of the register
+    index into the hash suffix, so they now take part in the run of leading
+    zeros that rho counts.
+
+    Args:
+        idx: int - register index at precision b.
+        rho: int - non-zero register value at precision b.
+        b: int - current precision.
+        new_b: int - target precision (must be <= b).
+
+    Returns:
+        tuple[int, int]: (index, rho) at precision new_b.
+    """
+    shift = b - new_b
+    # Equation:
+    # new_idx = idx >> shift, and the dropped bits t = idx & (2^shift - 1)
+    # become the leading bits of the new suffix.
+    new_idx = idx >> shift
+    dropped = idx & ((1 << shift) - 1)
+    if dropped:
+        # First set bit lies inside the dropped index bits
+        new_rho = shift - dropped.bit_length() + 1
+    else:
+        # All dropped bits are zero, so the old run simply gets longer
+        new_rho = shift + rho
+    return new_idx, min(new_rho, RHO_MAX)
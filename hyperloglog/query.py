@@ -0,0 +1,229 @@
+"""
+Union queries over many stored sketches, with a byte-bounded LRU cache.
+
+    engine = UnionQueryEngine(load, max_bytes=256 << 20, group_by=region_of)
+    engine.estimate(["2024-05-01/eu", "2024-05-01/us", ...])
+
+`load(key)` fetches one sketch (a HyperLogLog or its to_bytes() form, or
+None if there is none). The engine caches, keyed by the sorted set of
+sketch keys:
+
+    - decoded register arrays of single sketches, and
+    - partial unions: one per group_by() value within a query, plus the
+      whole query.
+
+A query is assembled from the cached unions that are subsets of it,
+picked greedily by how many keys they cover. Union is idempotent, so
+overlapping parts are fine. The rest comes from single sketches, loaded
+if needed. The union itself is one numpy maximum per part.
+
+Overlapping queries therefore share work. For example, with group_by
+returning the region of a "day/region" key, "30 days x 5 regions" caches
+five 30-day unions. A later "30 days x 3 of those regions" then reuses
+three of them. Entries are evicted least recently used first, once the
+cached register bytes exceed max_bytes.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+import numpy as np
+
+from .core import HyperLogLog
+
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+class UnionQueryEngine:
+    """
+    Answers union/estimate queries over sets of sketch keys.
+    """
+    def __init__(self, loader: Callable[[Hashable], HyperLogLog | bytes | None], b: int = 14,
+                 max_bytes: int = DEFAULT_MAX_BYTES, group_by: Callable[[Hashable], Hashable] | None = None):
+        """
+        Args:
+            loader (Callable): key -> HyperLogLog, to_bytes() blob, or None
+                for a missing sketch (treated as empty, and cached like any
+                other sketch until invalidated). Sketches must have the
+                native placement.
+            b (int): Precision of the unions. Sketches with a higher b are
+                reduced to it. Default is 14.
+            max_bytes (int): Bound on the cached register bytes.
+            group_by (Callable | None): key -> group, used to split each
+                query into partial unions that other queries can reuse.
+        """
+        HyperLogLog(b=b)  # validate b up front
+        self.b = b
+        self.m = 1 << b
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.group_by = group_by
+        self._cache: OrderedDict[frozenset, np.ndarray] = OrderedDict()
+        self._unions_with: dict[Hashable, set[frozenset]] = {}  # key -> cached unions containing it
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(("queries", "query_hits", "partial_hits", "partial_misses",
+                                       "sketch_hits", "sketch_loads", "evictions"), 0)
+
+    def estimate(self, keys: Iterable[Hashable]) -> float:
+        """Estimated number of distinct items across the sketches of keys."""
+        return _estimate(self.registers(keys), self.b)
+
+    def union(self, keys: Iterable[Hashable]) -> HyperLogLog:
+        """The union of the sketches of keys, as a new dense HyperLogLog."""
+        hll = HyperLogLog(b=self.b, mode='dense')
+        hll.impl.registers = self.registers(keys).tolist()
+        return hll
+
+    def registers(self, keys: Iterable[Hashable]) -> np.ndarray:
+        """
+        The union's registers as a read-only uint8 array of length 2^b.
+        """
+        query = frozenset(keys)
+        self.counters["queries"] += 1
+        cached = self._get(query)
+        if cached is not None:
+            self.counters["query_hits"] += 1
+            return cached
+        if self.group_by is None or len(query) < 2:
+            result = self._assemble(query)
+        else:
+            groups: dict[Hashable, set] = {}
+            for key in query:
+                groups.setdefault(self.group_by(key), set()).add(key)
+            if len(groups) == 1:
+                result = self._assemble(query)
+            else:
+                parts = []
+                for group in groups.values():
+                    group = frozenset(group)
+                    part = self._get(group)
+                    self.counters["partial_hits" if part is not None else "partial_misses"] += 1
+                    if part is None:
+                        part = self._assemble(group)
+                        self._put(group, part)
+                    parts.append(part)
+                result = _max_union(parts, self.m)
+        self._put(query, result)
+        return result
+
+    def stats(self) -> dict:
+        """Counters plus hit ratios and the current cache size."""
+        c = self.counters
+        queries = c["queries"]
+        partials = c["partial_hits"] + c["partial_misses"]
+        sketches = c["sketch_hits"] + c["sketch_loads"]
+        return {
+            **c,
+            "query_hit_ratio": c["query_hits"] / queries if queries else 0.0,
+            "partial_hit_ratio": c["partial_hits"] / partials if partials else 0.0,
+            "sketch_hit_ratio": c["sketch_hits"] / sketches if sketches else 0.0,
+            "cached_entries": len(self._cache),
+            "cached_bytes": self._bytes,
+        }
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drops every cached entry that includes key, e.g. after it was updated."""
+        with self._lock:
+            for subset in list(self._unions_with.get(key, ())):
+                self._evict(subset)
+
+    def clear(self) -> None:
+        """Empties the cache."""
+        with self._lock:
+            self._cache.clear()
+            self._unions_with.clear()
+            self._bytes = 0
+
+    # Assembly
+
+    def _assemble(self, query: frozenset) -> np.ndarray:
+        # Greedy cover by cached unions that are subsets of the query, then
+        # single sketches (cached or loaded) for the keys still uncovered
+        parts, uncovered = [], set(query)
+        with self._lock:
+            candidates = {subset for key in query for subset in self._unions_with.get(key, ())
+                          if len(subset) > 1 and subset <= query}
+        for subset in sorted(candidates, key=len, reverse=True):
+            if len(subset & uncovered) > 1:
+                part = self._get(subset)
+                if part is not None:
+                    parts.append(part)
+                    uncovered -= subset
+        for key in uncovered:
+            parts.append(self._sketch(key))
+        return _max_union(parts, self.m)
+
+    def _sketch(self, key: Hashable) -> np.ndarray:
+        single = frozenset((key,))
+        registers = self._get(single)
+        if registers is not None:
+            self.counters["sketch_hits"] += 1
+            return registers
+        self.counters["sketch_loads"] += 1
+        loaded = self.loader(key)
+        if loaded is None:
+            # Cached as empty registers, so a missing key is not loaded again
+            registers = np.zeros(self.m, dtype=np.uint8)
+            registers.flags.writeable = False
+            self._put(single, registers)
+            return registers
+        hll = loaded if isinstance(loaded, HyperLogLog) else HyperLogLog.from_bytes(loaded)
+        if hll.placement != 'native':
+            # Foreign placements index registers differently; max-merging them is meaningless
+            raise ValueError(f"Sketch {key!r} has placement={hll.placement!r}; only native sketches can be unioned")
+        if hll.b != self.b:
+            if hll.b < self.b:
+                raise ValueError(f"Sketch {key!r} has precision {hll.b}, below the engine's {self.b}")
+            hll = hll.reduce_precision(self.b)
+        registers = hll._register_image()
+        registers.flags.writeable = False
+        self._put(single, registers)
+        return registers
+
+    # LRU cache
+
+    def _get(self, subset: frozenset) -> np.ndarray | None:
+        with self._lock:
+            registers = self._cache.get(subset)
+            if registers is not None:
+                self._cache.move_to_end(subset)
+            return registers
+
+    def _put(self, subset: frozenset, registers: np.ndarray) -> None:
+        if registers.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if subset in self._cache:
+                return
+            self._cache[subset] = registers
+            self._bytes += registers.nbytes
+            for key in subset:
+                self._unions_with.setdefault(key, set()).add(subset)
+            while self._bytes > self.max_bytes:
+                self._evict(next(iter(self._cache)))
+                self.counters["evictions"] += 1
+
+    def _evict(self, subset: frozenset) -> None:
+        registers = self._cache.pop(subset)
+        self._bytes -= registers.nbytes
+        for key in subset:
+            containing = self._unions_with[key]
+            containing.discard(subset)
+            if not containing:
+                del self._unions_with[key]
+
+
+def _max_union(parts: list[np.ndarray], m: int) -> np.ndarray:
+    # Register-wise maximum of the parts, as a new read-only array
+    result = np.zeros(m, dtype=np.uint8)
+    for part in parts:
+        np.maximum(result, part, out=result)
+    result.flags.writeable = False
+    return result
+
+
+def _estimate(registers: np.ndarray, b: int) -> float:
+    hll = HyperLogLog(b=b, mode='dense')
+    hll.impl.registers = registers.tolist()
+    return hll.estimate()
@@ -0,0 +1,227 @@
+"""
+Redis HyperLogLog (PFADD/PFCOUNT) string encoding.
+
+A Redis HLL value is a 16-byte header followed by the registers:
+
+    "HYLL"      magic
+    encoding    0 = dense, 1 = sparse
+    3 bytes     unused, zero
+    8 bytes     cached cardinality, little-endian; the top bit of the last
+                byte set means the cache is stale and PFCOUNT recomputes it
+
+Redis always uses 2 ** 14 registers. Dense stores each in 6 bits,
+LSB-first, which is byte-for-byte pack_dense_registers(). Sparse is a run
+of opcodes:
+
+    ZERO   00xxxxxx           xxxxxx + 1 zero registers (1-64)
+    XZERO  01xxxxxx yyyyyyyy  14-bit length + 1 zero registers (1-16384)
+    VAL    1vvvvvxx           xx + 1 registers (1-4) set to vvvvv + 1 (1-32)
+
+Hashing: PFADD hashes an element's bytes with MurmurHash64A (seed
+0xadc83b19, see redis_hash()), takes the register index from the low 14
+bits and the value from the trailing zeros of the other 50 bits, so values
+never exceed 51. HyperLogLog(placement='redis') adds items the same way,
+so a converted Redis key and a sketch that ingested the same events agree
+register by register and merge without double counting. from_redis()
+returns such sketches, and only they can be exported with to_redis().
+"""
+import struct
+
+import numpy as np
+
+from .compression import pack_dense_registers, unpack_dense_registers
+
+MAGIC = b"HYLL"
+DENSE, SPARSE = 0, 1
+REDIS_P = 14
+REDIS_REGISTERS = 1 << REDIS_P
+HEADER_SIZE = 16
+SPARSE_MAX_BYTES = 3000  # Redis' default hll-sparse-max-bytes
+SPARSE_VAL_MAX = 32
+SPARSE_ZERO_MAX = 64
+SPARSE_XZERO_MAX = 1 << 14
+SPARSE_VAL_RUN_MAX = 4
+REGISTER_MAX = 64 - REDIS_P + 1  # PFADD's largest register value
+HASH_SEED = 0xadc83b19
+_STALE = 1 << 63
+_M = 0xc6a4a7935bd1e995
+_MASK64 = (1 << 64) - 1
+
+
+def redis_hash(key: str | bytes) -> int:
+    """
+    MurmurHash64A with Redis' seed, as PFADD hashes an element.
+
+    Args:
+        key (str | bytes): The element; str is encoded as UTF-8.
+
+    Returns:
+        int: The unsigned 64-bit hash.
+    """
+    if isinstance(key, str):
+        key = key.encode("utf8")
+    length = len(key)
+    h = (HASH_SEED ^ (length * _M)) & _MASK64
+    tail = length - (length & 7)
+    for (k,) in struct.iter_unpack("<Q", key[:tail]):
+        k = (k * _M) & _MASK64
+        k ^= k >> 47
+        k = (k * _M) & _MASK64
+        h = ((h ^ k) * _M) & _MASK64
+    if length & 7:
+        h = ((h ^ int.from_bytes(key[tail:], "little")) * _M) & _MASK64
+    h ^= h >> 47
+    h = (h * _M) & _MASK64
+    return h ^ (h >> 47)
+
+
+def encode_header(encoding: int, cardinality: int | None = None) -> bytes:
+    """Builds the 16-byte header; cardinality=None marks the cache stale."""
+    card = _STALE if cardinality is None else cardinality
+    return MAGIC + bytes([encoding, 0, 0, 0]) + struct.pack("<Q", card)
+
+
+def encode_sparse(indices: np.ndarray, values: np.ndarray) -> bytes | None:
+    """
+    Encodes non-zero registers with the sparse opcodes.
+
+    Args:
+        indices (np.ndarray): Register indices, ascending.
+        values (np.ndarray): Matching non-zero register values.
+
+    Returns:
+        bytes | None: The opcode stream, or None if a value exceeds 32 and
+        the registers can only be represented densely.
+    """
+    if len(values) and int(np.max(values)) > SPARSE_VAL_MAX:
+        return None
+    out = bytearray()
+
+    def zeros(n):
+        while n:
+            run = min(n, SPARSE_XZERO_MAX)
+            if run > SPARSE_ZERO_MAX:
+                out.append(0x40 | (run - 1) >> 8)
+                out.append((run - 1) & 0xFF)
+            else:
+                out.append(run - 1)
+            n -= run
+
+    pos = 0
+    indices, values = indices.tolist(), values.tolist()
+    i = 0
+    while i < len(indices):
+        idx, value = indices[i], values[i]
+        zeros(idx - pos)
+        run = 1
+        while (run < SPARSE_VAL_RUN_MAX and i + run < len(indices)
+               and indices[i + run] == idx + run and values[i + run] == value):
+            run += 1
+        out.append(0x80 | (value - 1) << 2 | (run - 1))
+        pos = idx + run
+        i += run
+    zeros(REDIS_REGISTERS - pos)
+    return bytes(out)
+
+
+def decode_sparse(data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decodes a sparse opcode stream.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (indices, values) of non-zero registers.
+
+    Raises:
+        ValueError: If the opcodes do not cover exactly 2 ** 14 registers.
+    """
+    indices, values = [], []
+    pos = 0
+    i = 0
+    while i < len(data):
+        op = data[i]
+        if op & 0x80:  # VAL
+            value = (op >> 2 & 0x1F) + 1
+            run = (op & 0x03) + 1
+            indices.extend(range(pos, pos + run))
+            values.extend([value] * run)
+            pos += run
+            i += 1
+        elif op & 0x40:  # XZERO
+            if i + 1 >= len(data):
+                raise ValueError("Truncated XZERO opcode in Redis sparse HLL")
+            pos += ((op & 0x3F) << 8 | data[i + 1]) + 1
+            i += 2
+        else:  # ZERO
+            pos += (op & 0x3F) + 1
+            i += 1
+        if pos > REDIS_REGISTERS:
+            raise ValueError("Redis sparse HLL covers more than 16384 registers")
+    if pos != REDIS_REGISTERS:
+        raise ValueError(f"Redis sparse HLL covers {pos} registers, expected {REDIS_REGISTERS}")
+    return np.array(indices, dtype=np.int64), np.array(values, dtype=np.int64)
+
+
+def encode(indices: np.ndarray, values: np.ndarray, encoding: str | None = None,
+           cardinality: int | None = None, sparse_max_bytes: int = SPARSE_MAX_BYTES) -> bytes:
+    """
+    Encodes 2 ** 14 registers as a Redis HLL string.
+
+    Args:
+        indices (np.ndarray): Non-zero register indices, ascending.
+        values (np.ndarray): Matching register values (at most 63).
+        encoding (str | None): 'sparse', 'dense' or None to pick sparse when
+            representable within sparse_max_bytes, as Redis does.
+        cardinality (int | None): Value for the cardinality cache, or None
+            to mark it stale.
+        sparse_max_bytes (int): Sparse size limit used when encoding is None.
+
+    Returns:
+        bytes: The value to SET/RESTORE into Redis.
+
+    Raises:
+        ValueError: If sparse is requested but a register exceeds 32.
+    """
+    if encoding not in (None, 'sparse', 'dense'):
+        raise ValueError(f"Unknown Redis HLL encoding {encoding!r}; expected 'sparse' or 'dense'")
+    if encoding != 'dense':
+        payload = encode_sparse(indices, values)
+        if payload is None and encoding == 'sparse':
+            raise ValueError("Registers above 32 cannot use the Redis sparse encoding")
+        if payload is not None and (encoding == 'sparse' or len(payload) <= sparse_max_bytes):
+            return encode_header(SPARSE, cardinality) + payload
+    registers = np.zeros(REDIS_REGISTERS, dtype=np.uint32)
+    registers[np.asarray(indices, dtype=np.int64)] = values
+    return encode_header(DENSE, cardinality) + pack_dense_registers(registers)
+
+
+def decode(data: bytes) -> dict:
+    """
+    Parses a Redis HLL string, e.g. from `GET key`.
+
+    Returns:
+        dict: "encoding" ('sparse' or 'dense'), "cardinality" (the cached
+        value, or None if stale) and "indices"/"values" of the non-zero
+        registers.
+
+    Raises:
+        ValueError: On a bad magic, unknown encoding or malformed payload.
+    """
+    data = bytes(data)
+    if len(data) < HEADER_SIZE or data[:4] != MAGIC:
+        raise ValueError("Not a Redis HLL string (missing HYLL header)")
+    (card,) = struct.unpack("<Q", data[8:16])
+    parsed = {"cardinality": None if card & _STALE else card}
+    payload = data[HEADER_SIZE:]
+    if data[4] == DENSE:
+        size = (REDIS_REGISTERS * 6 + 7) // 8
+        if len(payload) != size:
+            raise ValueError(f"Redis dense HLL payload must be {size} bytes, got {len(payload)}")
+        registers = np.asarray(unpack_dense_registers(payload, REDIS_REGISTERS), dtype=np.int64)
+        indices = np.flatnonzero(registers)
+        parsed.update(encoding='dense', indices=indices, values=registers[indices])
+    elif data[4] == SPARSE:
+        indices, values = decode_sparse(payload)
+        parsed.update(encoding='sparse', indices=indices, values=values)
+    else:
+        raise ValueError(f"Unsupported Redis HLL encoding {data[4]}")
+    return parsed
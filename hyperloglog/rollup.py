@@ -0,0 +1,280 @@
+"""
+Hierarchical rollup cube: unions precomputed across time and dimensions.
+
+Each dimension is a hierarchy of levels from finest to coarsest, e.g.
+
+    time = Hierarchy("time", ["hour", "day", "month"], [hour_to_day, day_to_month])
+    geo  = Hierarchy("geo", ["city", "region", "country"], [city_to_region, region_to_country])
+
+plus an implicit top level ALL. Levels must nest: every value has exactly
+one parent. Weeks do not nest in calendar months, for instance, so they
+need their own hierarchy or a fiscal calendar.
+
+Leaves are sketches keyed by one leaf value per dimension, e.g.
+("2024-05-01T13", "Lyon"). build() materializes every cuboid, meaning
+every combination of levels, as register arrays. It works bottom-up: each
+cuboid is grouped from a finer cuboid with one sort and a grouped maximum,
+and cuboids of the same rank are built in parallel.
+
+update() merges into one leaf and raises just that leaf's ancestor in
+each cuboid. A query picks, per dimension, the minimal set of nodes
+covering the selection: siblings collapse into their parent whenever all
+of the parent's children are selected. The union of those cells is
+usually a handful of arrays instead of one per leaf.
+
+    cube = RollupCube([time, geo], b=14)
+    cube.build(leaves, workers=4)
+    cube.estimate({"time": At("day", days_in_may), "geo": At("region", ["Auvergne-Rhone-Alpes"])})
+"""
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from typing import Callable, Hashable, Iterable, Mapping, NamedTuple, Sequence
+
+import numpy as np
+
+from .core import HyperLogLog
+
+ALL = "*"
+
+
+class At(NamedTuple):
+    """Query values given at a level other than the finest, e.g. At("day", days)."""
+    level: str
+    values: Iterable
+
+
+class Hierarchy:
+    """
+    One dimension: named levels from finest to coarsest and the parent
+    function of each level but the last.
+    """
+    def __init__(self, name: str, levels: Sequence[str], parents: Sequence[Callable[[Hashable], Hashable]]):
+        """
+        Args:
+            name (str): Dimension name, as used in query selections.
+            levels (Sequence[str]): Level names, finest first.
+            parents (Sequence[Callable]): parents[i] maps a value of
+                levels[i] to its value at levels[i + 1].
+
+        Raises:
+            ValueError: If there is not one parent function per level but the last.
+        """
+        if not levels or len(parents) != len(levels) - 1:
+            raise ValueError("Need at least one level and one parent function per level but the last")
+        self.name = name
+        self.levels = list(levels)
+        self.parents = list(parents)
+        self.top = len(levels)  # index of the implicit ALL level
+
+    def parent(self, level: int, value: Hashable) -> Hashable:
+        """Value one level above value (ALL above the coarsest level)."""
+        return self.parents[level](value) if level + 1 < self.top else ALL
+
+    def level_index(self, level: str) -> int:
+        """Position of a level name (the top level is 'all')."""
+        if level == "all":
+            return self.top
+        try:
+            return self.levels.index(level)
+        except ValueError:
+            raise ValueError(f"Unknown level {level!r} of dimension {self.name!r}") from None
+
+
+class RollupCube:
+    """
+    Materialized unions of leaf sketches over every level combination.
+    """
+    def __init__(self, dimensions: Sequence[Hierarchy], b: int = 14):
+        """
+        Args:
+            dimensions (Sequence[Hierarchy]): One hierarchy per position of the leaf keys.
+            b (int): Precision of the cube. Leaves with a higher b are
+                reduced to it. Default is 14.
+        """
+        HyperLogLog(b=b)  # validate b up front
+        self.dimensions = list(dimensions)
+        self.b = b
+        self.m = 1 << b
+        # cells[levels][values] -> registers; levels (0, ..., 0) holds the leaves
+        self.cells: dict[tuple, dict[tuple, np.ndarray]] = {}
+        # children[d][level][value] -> the values one level below it that have data
+        self._children = [[{} for _ in range(dim.top + 1)] for dim in self.dimensions]
+        self._ancestors = [{} for _ in self.dimensions]  # per dimension: leaf value -> values at every level
+        self._built = False
+
+    # Building
+
+    def build(self, leaves: Mapping[tuple, HyperLogLog | np.ndarray] | None = None,
+              workers: int | None = None) -> "RollupCube":
+        """
+        Loads leaves (if given) and materializes every cuboid bottom-up.
+
+        Args:
+            leaves (Mapping | None): {leaf key tuple: HyperLogLog or uint8 registers}.
+            workers (int | None): Threads for building the cuboids of one
+                rank in parallel (numpy releases the GIL while grouping).
+
+        Returns:
+            RollupCube: self, for chaining.
+        """
+        leaf_levels = (0,) * len(self.dimensions)
+        base = self.cells.setdefault(leaf_levels, {})
+        for key, sketch in (leaves or {}).items():
+            registers = self._registers_of(sketch)
+            current = base.get(key)
+            base[key] = registers if current is None else np.maximum(current, registers)
+            self._index(key)
+
+        ranks: dict[int, list[tuple]] = {}
+        for levels in product(*(range(dim.top + 1) for dim in self.dimensions)):
+            if any(levels):
+                ranks.setdefault(sum(levels), []).append(levels)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for rank in sorted(ranks):
+                built = pool.map(self._build_cuboid, ranks[rank])
+                for levels, cells in zip(ranks[rank], built):
+                    self.cells[levels] = cells
+        self._built = True
+        return self
+
+    def _build_cuboid(self, levels: tuple) -> dict[tuple, np.ndarray]:
+        # Rolls the smallest finer cuboid up one level along one dimension
+        sources = [(d, levels[:d] + (levels[d] - 1,) + levels[d + 1:])
+                   for d in range(len(levels)) if levels[d]]
+        d, source_levels = min(sources, key=lambda s: len(self.cells[s[1]]))
+        source = self.cells[source_levels]
+        if not source:
+            return {}
+        dim, level = self.dimensions[d], levels[d] - 1
+        keys = list(source)
+        targets = [key[:d] + (dim.parent(level, key[d]),) + key[d + 1:] for key in keys]
+        group_of: dict[tuple, int] = {}
+        group_ids = np.array([group_of.setdefault(t, len(group_of)) for t in targets])
+        order = np.argsort(group_ids, kind='stable')
+        stacked = np.stack([source[keys[i]] for i in order])
+        starts = np.flatnonzero(np.concatenate(([True], np.diff(group_ids[order]) != 0)))
+        reduced = np.maximum.reduceat(stacked, starts, axis=0)
+        return {target: reduced[i] for i, target in enumerate(group_of)}
+
+    # Updates
+
+    def update(self, key: tuple, sketch: HyperLogLog | np.ndarray) -> None:
+        """
+        Merges a sketch into one leaf and raises its ancestors in every
+        cuboid; no other cell is touched.
+
+        Args:
+            key (tuple): Leaf key, one leaf value per dimension.
+            sketch (HyperLogLog | np.ndarray): Sketch or uint8 registers to merge in.
+        """
+        registers = self._registers_of(sketch)
+        ancestors = self._index(key)
+        levels_iter = product(*(range(dim.top + 1) for dim in self.dimensions)) if self._built \
+            else [(0,) * len(self.dimensions)]
+        for levels in levels_iter:
+            cells = self.cells.setdefault(levels, {})
+            target = tuple(ancestors[d][level] for d, level in enumerate(levels))
+            current = cells.get(target)
+            cells[target] = registers.copy() if current is None else np.maximum(current, registers)
+
+    # Queries
+
+    def cover(self, selection: Mapping[str, Iterable | At]) -> list[tuple[tuple, tuple]]:
+        """
+        The minimal materialized cells whose union is the selection.
+
+        Args:
+            selection (Mapping): {dimension name: leaf values} or
+                {dimension name: At(level name, values)}. Dimensions left
+                out are taken whole.
+
+        Returns:
+            list[tuple[tuple, tuple]]: (levels, values) of each cell.
+        """
+        unknown = set(selection) - {dim.name for dim in self.dimensions}
+        if unknown:
+            raise ValueError(f"Unknown dimensions {sorted(unknown)}")
+        per_dimension = []
+        for d, dim in enumerate(self.dimensions):
+            if dim.name not in selection:
+                per_dimension.append([(dim.top, ALL)])
+                continue
+            chosen = selection[dim.name]
+            if isinstance(chosen, At):
+                level, values = dim.level_index(chosen.level), chosen.values
+            else:
+                level, values = 0, chosen
+            per_dimension.append(self._cover_dimension(d, level, set(values)))
+        return [tuple(zip(*nodes)) for nodes in product(*per_dimension)]
+
+    def _cover_dimension(self, d: int, level: int, values: set) -> list[tuple[int, Hashable]]:
+        # Bottom-up collapse: a parent replaces its selected children once
+        # every child that has data is selected
+        dim, children = self.dimensions[d], self._children[d]
+        nodes = []
+        while values and level < dim.top:
+            by_parent: dict = {}
+            for value in values:
+                by_parent.setdefault(dim.parent(level, value), set()).add(value)
+            full = set()
+            for parent, selected in by_parent.items():
+                known = children[level + 1].get(parent)
+                if known is not None and known <= selected:
+                    full.add(parent)
+                else:
+                    nodes.extend((level, value) for value in selected)
+            values, level = full, level + 1
+        nodes.extend((level, value) for value in values)
+        return nodes
+
+    def registers(self, selection: Mapping[str, Iterable | At]) -> np.ndarray:
+        """The union of the selection as a uint8 register array."""
+        if not self._built:
+            raise ValueError("Call build() before querying the cube")
+        result = np.zeros(self.m, dtype=np.uint8)
+        for levels, values in self.cover(selection):
+            cell = self.cells[levels].get(values)
+            if cell is not None:
+                np.maximum(result, cell, out=result)
+        return result
+
+    def estimate(self, selection: Mapping[str, Iterable | At]) -> float:
+        """Estimated number of distinct items in the selection."""
+        return self.union(selection).estimate()
+
+    def union(self, selection: Mapping[str, Iterable | At]) -> HyperLogLog:
+        """The union of the selection as a new dense HyperLogLog."""
+        hll = HyperLogLog(b=self.b, mode='dense')
+        hll.impl.registers = self.registers(selection).tolist()
+        return hll
+
+    # Helpers
+
+    def _registers_of(self, sketch: HyperLogLog | np.ndarray) -> np.ndarray:
+        if isinstance(sketch, np.ndarray):
+            if sketch.shape != (self.m,):
+                raise ValueError(f"Register arrays must have {self.m} entries")
+            return sketch.astype(np.uint8)
+        if sketch.b < self.b:
+            raise ValueError(f"Sketch precision {sketch.b} is below the cube's {self.b}")
+        if sketch.b > self.b:
+            sketch = sketch.reduce_precision(self.b)
+        return sketch._register_image()
+
+    def _index(self, key: tuple) -> list[list]:
+        # Records the leaf's values at every level (and the parent -> child
+        # links used by cover()); returns them per dimension
+        if len(key) != len(self.dimensions):
+            raise ValueError(f"Leaf keys need one value per dimension ({len(self.dimensions)})")
+        ancestors = []
+        for d, (dim, value) in enumerate(zip(self.dimensions, key)):
+            chain = self._ancestors[d].get(value)
+            if chain is None:
+                chain = [value]
+                for level in range(dim.top):
+                    parent = dim.parent(level, chain[-1])
+                    self._children[d][level + 1].setdefault(parent, set()).add(chain[-1])
+                    chain.append(parent)
+                self._ancestors[d][value] = chain
+            ancestors.append(chain)
+        return ancestors
@@ -1,4 +1,21 @@
+import base64
+import struct
+from typing import BinaryIO, Iterable
+
 from hyperloglog import HyperLogLog
+from hyperloglog.ultraloglog import UltraLogLog
+
+# Multi-sketch container: magic, uint32 count, then (uint32 length, blob) frames
+CONTAINER_MAGIC = b"HLLS"
+_HEADER_LEN = 10  # HLL1 magic (4) + b (1) + mode (1) + payload length (4); ULL1 alike
+_ULL_MAGIC = b"ULL1"
+
+
+def _from_bytes(blob: bytes) -> "HyperLogLog | UltraLogLog":
+    # HyperLogLog or UltraLogLog, by the blob's magic
+    if blob[:4] == _ULL_MAGIC:
+        return UltraLogLog.from_bytes(blob)
+    return HyperLogLog.from_bytes(blob)
 
 def serialize_hll(h: "HyperLogLog") -> str:
     """
@@ -31,7 +48,103 @@ def deserialize_hll(b64_data: str) -> "HyperLogLog":
     Returns:
         The reconstructed HyperLogLog instance.
     """
-    # Recreate the HyperLogLog object from its Base64-encoded
-    # serialized representation.
-    return HyperLogLog.from_base64(b64_data)
+    # Recreate the HyperLogLog (or UltraLogLog) object from its
+    # Base64-encoded serialized representation.
+    return _from_bytes(base64.b64decode(b64_data))
+
+
+def dump(h: "HyperLogLog", fp: BinaryIO, encoding: str = "packed") -> None:
+    """
+    Write a HyperLogLog to a binary file object in its raw `to_bytes` form.
+
+    The HLL1 header already carries the payload length, so several sketches
+    can be dumped back to back into the same file and read with `load`.
 
+    Args:
+        h: The HyperLogLog instance to write.
+        fp: A file object opened in binary mode.
+        encoding: Payload encoding passed to `to_bytes`.
+    """
+    fp.write(h.to_bytes(encoding=encoding))
+
+
+def load(fp: BinaryIO) -> "HyperLogLog":
+    """
+    Read one HyperLogLog written by `dump` from a binary file object.
+
+    Args:
+        fp: A file object opened in binary mode.
+
+    Returns:
+        The reconstructed HyperLogLog (or UltraLogLog) instance.
+
+    Raises:
+        EOFError: If the file is already at its end.
+        ValueError: If the data is truncated or not an HLL.
+    """
+    header = fp.read(_HEADER_LEN)
+    if not header:
+        raise EOFError("No HLL left to read")
+    if len(header) < _HEADER_LEN:
+        raise ValueError("HLL blob too short")
+    (length,) = struct.unpack(">I", header[6:10])
+    payload = fp.read(length)
+    if len(payload) != length:
+        raise ValueError("Truncated HLL payload")
+    return _from_bytes(header + payload)
+
+
+def dumps_many(sketches: Iterable["HyperLogLog"], encoding: str = "packed") -> bytes:
+    """
+    Pack many HyperLogLogs into one length-prefixed binary container.
+
+    Layout: b"HLLS", uint32 sketch count, then for each sketch a uint32
+    length followed by its `to_bytes` blob (all integers big-endian).
+
+    Args:
+        sketches: The HyperLogLog instances to export.
+        encoding: Payload encoding passed to `to_bytes`.
+
+    Returns:
+        The container as bytes.
+    """
+    frames = []
+    for h in sketches:
+        blob = h.to_bytes(encoding=encoding)
+        frames.append(struct.pack(">I", len(blob)))
+        frames.append(blob)
+    return CONTAINER_MAGIC + struct.pack(">I", len(frames) // 2) + b"".join(frames)
+
+
+def loads_many(data: bytes) -> list["HyperLogLog"]:
+    """
+    Unpack a container produced by `dumps_many`.
+
+    Args:
+        data: The container bytes.
+
+    Returns:
+        The reconstructed HyperLogLog (or UltraLogLog) instances, in their
+        original order.
+
+    Raises:
+        ValueError: If the container is malformed or truncated.
+    """
+    view = memoryview(data)
+    if len(view) < 8 or bytes(view[:4]) != CONTAINER_MAGIC:
+        raise ValueError("Invalid HLL container magic")
+    (count,) = struct.unpack_from(">I", view, 4)
+    offset = 8
+    sketches = []
+    for _ in range(count):
+        if offset + 4 > len(view):
+            raise ValueError("Truncated HLL container")
+        (length,) = struct.unpack_from(">I", view, offset)
+        offset += 4
+        if offset + length > len(view):
+            raise ValueError("Truncated HLL container")
+        sketches.append(_from_bytes(bytes(view[offset:offset + length])))
+        offset += length
+    if offset != len(view):
+        raise ValueError("Trailing data after HLL container")
+    return sketches
@@ -0,0 +1,158 @@
+"""
+A dense sketch in shared memory for concurrent multi-process ingestion.
+
+The 2^b registers (one byte each) live in a multiprocessing.shared_memory
+block. Any number of processes can add to it at the same time, and any of
+them can call estimate() at any time. No per-worker sketch has to be
+pickled and merged at the end.
+
+Registers are split into contiguous stripes, each with its own lock. A
+batch is reduced to its per-register maximum first. Registers that are
+already at least that high are skipped without locking, because registers
+only ever grow. The remaining ones are raised under their stripe's lock.
+Readers take no locks: single-byte stores are atomic, so a concurrent
+estimate() sees every register at a value it really had.
+
+    sketch = SharedDenseHyperLogLog(b=14)
+    workers = [Process(target=ingest, args=(sketch, part)) for part in parts]
+    ...
+    sketch.estimate()
+    sketch.unlink()
+
+The sketch pickles as (shared memory name, locks). Like any
+multiprocessing lock, it can only reach another process through
+inheritance: pass it in Process(args=...) or a Pool initializer, not
+through Pool.map or a queue. The creating process owns the block and
+should call unlink() (or use the sketch as a context manager) once all
+workers are done.
+"""
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .core import HyperLogLog
+from .dense import DenseHyperLogLog
+from .hash_utils import index_and_rho, index_and_rho_scalar, murmurhash128
+
+DEFAULT_STRIPES = 64
+
+
+class SharedDenseHyperLogLog:
+    """
+    Dense HyperLogLog whose registers are shared between processes.
+    """
+    def __init__(self, b: int = 14, stripes: int = DEFAULT_STRIPES, ctx=None):
+        """
+        Creates a new, empty sketch in a fresh shared memory block.
+
+        Args:
+            b (int): Precision parameter. Default is 14.
+            stripes (int): Number of lock stripes, a power of two no larger
+                than 2^b. More stripes mean less contention. Default is 64.
+            ctx: multiprocessing context to create the locks with, e.g.
+                multiprocessing.get_context('spawn'). Default context if None.
+
+        Raises:
+            ValueError: If b or stripes is out of range.
+        """
+        if not isinstance(b, int) or not (4 <= b <= 18):
+            raise ValueError("Value of b not in range [4,18]")
+        if stripes < 1 or stripes & (stripes - 1) or stripes > (1 << b):
+            raise ValueError("stripes must be a power of two no larger than 2^b")
+        ctx = ctx or multiprocessing
+        shm = shared_memory.SharedMemory(create=True, size=1 << b)
+        shm.buf[:1 << b] = bytes(1 << b)
+        self._attach(shm, b, [ctx.Lock() for _ in range(stripes)], owner=True)
+
+    def _attach(self, shm: shared_memory.SharedMemory, b: int, locks: list, owner: bool) -> None:
+        self.b = b
+        self.m = 1 << b
+        self._shm = shm
+        self._locks = locks
+        self._stripe_shift = b - (len(locks).bit_length() - 1)
+        self._owner = owner
+        self.registers = np.ndarray((self.m,), dtype=np.uint8, buffer=shm.buf)
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block."""
+        return self._shm.name
+
+    def __getstate__(self) -> dict:
+        return {"name": self._shm.name, "b": self.b, "locks": self._locks}
+
+    def __setstate__(self, state: dict) -> None:
+        if sys.version_info >= (3, 13):
+            # Only the creator should unlink the block when it exits
+            shm = shared_memory.SharedMemory(name=state["name"], track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=state["name"])
+        self._attach(shm, state["b"], state["locks"], owner=False)
+
+    def add(self, item: object) -> None:
+        """Adds an item, as HyperLogLog.add() would."""
+        idx, rho = index_and_rho_scalar(*murmurhash128(str(item)), self.b)
+        registers = self.registers
+        if rho > registers[idx]:
+            with self._locks[idx >> self._stripe_shift]:
+                if rho > registers[idx]:
+                    registers[idx] = rho
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Adds a batch of precomputed 64-bit hashes.
+
+        Args:
+            hashes (np.ndarray): uint64 hash values, as murmurhash64a would return.
+        """
+        idx, rho = index_and_rho(hashes, self.b)
+        if not len(idx):
+            return
+        batch = np.zeros(self.m, dtype=np.uint8)
+        np.maximum.at(batch, idx, rho)
+        registers = self.registers
+        # Unlocked pre-check: a register already >= the batch value stays so
+        candidates = np.flatnonzero(batch > registers)
+        if not len(candidates):
+            return
+        stripes = candidates >> self._stripe_shift
+        bounds = np.flatnonzero(np.diff(stripes)) + 1
+        for first, part in zip(np.concatenate(([0], bounds)), np.split(candidates, bounds)):
+            with self._locks[int(stripes[first])]:
+                registers[part] = np.maximum(registers[part], batch[part])
+
+    def to_hyperloglog(self) -> HyperLogLog:
+        """
+        Copies the current registers into an ordinary dense HyperLogLog,
+        e.g. to serialize or merge it.
+        """
+        hll = HyperLogLog(b=self.b, mode='dense')
+        hll.impl.registers = self.registers.tolist()
+        return hll
+
+    def estimate(self) -> float:
+        """Returns the estimated cardinality of the current registers."""
+        dense = DenseHyperLogLog(self.b)
+        dense.registers = self.registers.tolist()
+        return dense.estimate()
+
+    def close(self) -> None:
+        """Detaches this process from the shared memory block."""
+        self.registers = None  # release the exported buffer before closing
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Detaches and destroys the shared memory block (creator only)."""
+        self.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedDenseHyperLogLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
@@ -1,9 +1,14 @@
 import math
+import pickle
+
+import numpy as np
 
 from .constants import ALPHA_MM, THRESHOLD
 from .bias_correction import bias_estimate
-from .hash_utils import murmurhash64a
+from .hash_utils import murmurhash128, index_and_rho, index_and_rho_scalar
 from .compression import decompress_sparse_registers
+from .precision import fold_register
+from . import instrumentation
 
 class SparseHyperLogLog:
     """
@@ -32,7 +37,24 @@ class SparseHyperLogLog:
         else:
             # Start with an empty sparse register set
             self.registers = {}
+        self.counters = None  # instrumentation counters, set by the HyperLogLog wrapper
+        self.dirty = None  # set of raised register indices, set by the HyperLogLog wrapper
+        self.cached_estimate = None  # last estimate(), reset whenever a register rises
     
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickles the entries as one little-endian uint32 each
+        (idx << 6 | rho) instead of a dict.
+
+        With protocol 5 the entry array is a PickleBuffer, so
+        pickle.dumps(..., buffer_callback=...) can send it out-of-band.
+        """
+        count = len(self.registers)
+        entries = np.fromiter(self.registers.keys(), dtype='<u4', count=count) << 6
+        entries |= np.fromiter(self.registers.values(), dtype='<u4', count=count)
+        payload = pickle.PickleBuffer(entries) if protocol >= 5 else entries.tobytes()
+        return _unpickle_sparse, (self.b, payload, self.sparse_threshold)
+
     def add(self, item: object) -> int:
         """
         Adds an item to the sparse HyperLogLog sketch.
@@ -43,60 +65,115 @@ class SparseHyperLogLog:
         Returns:
             int - 1 if conversion to dense mode is needed (sparse threshold exceeded), 0 otherwise
         """
-        hash_value = murmurhash64a(item)
-        idx = hash_value >> (64 - self.b)
-        w = (hash_value << self.b) & ((1 << 64) - 1)
-        rho = self._rho(w, 64 - self.b)
+        idx, rho = index_and_rho_scalar(*murmurhash128(item), self.b)
 
         # O(1) average time for lookup and update
         current_rho = self.registers.get(idx, 0)
         if rho > current_rho:
             self.registers[idx] = rho
+            self.cached_estimate = None
+            if self.counters is not None:
+                self.counters.incr("register_changes")
+            if self.dirty is not None:
+                self.dirty.add(idx)
 
         # Check against threshold
         if len(self.registers) > self.sparse_threshold:
             return 1
         return 0
     
-    def _rho(self, w: int, max_bits: int) -> int:
+    def add_hashes(self, hashes: np.ndarray) -> int:
+        """
+        Adds a batch of precomputed 64-bit hashes.
+
+        Args:
+            hashes: np.ndarray - uint64 hash values, as murmurhash64a would return
+
+        Returns:
+            int - 1 if conversion to dense mode is needed (sparse threshold exceeded), 0 otherwise
+        """
+        return self.update_many(*index_and_rho(hashes, self.b))
+
+    def update_many(self, idx: np.ndarray, rho: np.ndarray) -> int:
+        """
+        Raises registers to the per-index maximum of a batch of (idx, rho) pairs.
+
+        Args:
+            idx: np.ndarray - register indices
+            rho: np.ndarray - rho values, aligned with idx
+
+        Returns:
+            int - 1 if conversion to dense mode is needed (sparse threshold exceeded), 0 otherwise
+        """
+        if len(idx):
+            # Collapse the batch to one maximum per touched index first
+            uniq, inverse = np.unique(idx, return_inverse=True)
+            best = np.zeros(len(uniq), dtype=np.uint8)
+            np.maximum.at(best, inverse, rho)
+            registers = self.registers
+            dirty = self.dirty
+            changed = 0
+            for i, r in zip(uniq.tolist(), best.tolist()):
+                if r > registers.get(i, 0):
+                    registers[i] = r
+                    changed += 1
+                    if dirty is not None:
+                        dirty.add(i)
+            if changed:
+                self.cached_estimate = None
+            if self.counters is not None:
+                self.counters.incr("register_changes", changed)
+
+        if len(self.registers) > self.sparse_threshold:
+            return 1
+        return 0
+
+    def copy(self) -> "SparseHyperLogLog":
+        """
+        Returns an independent copy of the entries. The copy keeps the
+        cached estimate and reports to the same counters and dirty set.
         """
-        Computes the position of the first 1-bit (rho) in the hash suffix.
+        copied = SparseHyperLogLog(self.b, sparse_threshold=self.sparse_threshold)
+        copied.registers = self.registers.copy()
+        copied.counters, copied.dirty = self.counters, self.dirty
+        copied.cached_estimate = self.cached_estimate
+        return copied
+
+    def reduce_precision(self, new_b: int) -> "SparseHyperLogLog":
+        """
+        Returns a copy of this sketch downsampled to a lower precision.
 
         Args:
-            w (int): The suffix of the hash.
-            max_bits (int): Maximum number of bits to examine.
+            new_b (int): Target precision, at most the current b.
 
         Returns:
-            int: rho value (1-based index of first 1-bit).
-        """
-        def clzll(x):     # count leading zeros
-            return 64 - x.bit_length() if x != 0 else 64
-        rho = clzll(w) + 1
-
-        # Rare fallback: rehash if rho is too large (all zeros suffix)
-        if rho >= 64:
-            max_val = min(1 << 6, max_bits)  # cap with max_bits
-            safety_counter = 0               
-            while rho < max_val:
-                w = murmurhash64a(str(w))
-                addn = clzll(w) + 1
-                if addn <= 0:
-                    break  # avoid infinite loop
-                rho += addn
-                safety_counter += 1
-                if safety_counter > max_bits:  # hard safety cutoff
-                    break
-
-        return min(rho, max_bits)
+            SparseHyperLogLog: A new sparse sketch at precision new_b. It may
+            exceed its own sparse threshold; the caller decides on promotion.
+        """
+        reduced = SparseHyperLogLog(new_b)
+        registers = reduced.registers
+        for idx, rho in self.registers.items():
+            new_idx, new_rho = fold_register(idx, rho, self.b, new_b)
+            if new_rho > registers.get(new_idx, 0):
+                registers[new_idx] = new_rho
+        return reduced
+
     
     
     def estimate(self) -> float:
         """
         Estimate cardinality using the sparse representation.
 
+        Cached until a register rises.
+
         Returns:
             float: Estimated number of distinct elements.
         """
+        if self.cached_estimate is None:
+            self.cached_estimate = self._estimate()
+        return self.cached_estimate
+
+    def _estimate(self) -> float:
         m = self.m
         
         Z = m - len(self.registers)  # contribution from zero registers
@@ -110,7 +187,10 @@ class SparseHyperLogLog:
 
         # Apply bias correction for mid-range estimates
         if E <= THRESHOLD[self.b]:
-            correction = bias_estimate(E, self.b)
+            if instrumentation.enabled:
+                correction = instrumentation.timed("bias_estimate", bias_estimate, E, self.b)
+            else:
+                correction = bias_estimate(E, self.b)
             E -= correction
             if E < 0:
                 E = 0
@@ -122,3 +202,10 @@ class SparseHyperLogLog:
                 return H
                 
         return E
+
+
+def _unpickle_sparse(b: int, payload, sparse_threshold: int) -> SparseHyperLogLog:
+    sparse = SparseHyperLogLog(b, sparse_threshold=sparse_threshold)
+    entries = np.frombuffer(payload, dtype='<u4')
+    sparse.registers = dict(zip((entries >> 6).tolist(), (entries & 0x3F).tolist()))
+    return sparse
@@ -0,0 +1,81 @@
+"""
+SQLite functions for building and merging sketches inside the database.
+
+register(conn) adds, on a sqlite3.Connection:
+
+    hll_add(item)          aggregate: sketch of the non-NULL items -> BLOB
+    hll_union(blob)        aggregate: union of to_bytes() sketches -> BLOB
+    hll_cardinality(blob)  scalar: estimate of a to_bytes() sketch -> REAL
+
+Like SUM(), the aggregates skip rows whose argument is NULL and return
+NULL when no row is left, i.e. over no rows or only NULL arguments.
+
+Sketches are exchanged in the HLL1 to_bytes() format, so they can be
+stored in BLOB columns and read back with HyperLogLog.from_bytes().
+
+Usage:
+    conn = sqlite3.connect("events.db")
+    hyperloglog.sqlite.register(conn)
+    conn.execute("SELECT country, hll_cardinality(hll_add(user_id)) FROM events GROUP BY country")
+"""
+import sqlite3
+
+from .core import HyperLogLog
+
+DEFAULT_BUFFER_SIZE = 4096
+
+
+def register(conn: sqlite3.Connection, b: int = 14, mode: str = 'sparse',
+             buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+    """
+    Registers hll_add, hll_union and hll_cardinality on a connection.
+
+    Args:
+        conn (sqlite3.Connection): Connection to register the functions on.
+        b (int): Precision of sketches built by hll_add. Default is 14.
+        mode (str): Starting mode of sketches built by hll_add. Default is sparse.
+        buffer_size (int): Hash buffer used by hll_add, so rows are folded into
+            registers in vectorized batches. 0 updates registers per row.
+    """
+    HyperLogLog(b=b, mode=mode)  # validate the parameters up front, not on the first row
+
+    class HllAdd:
+        def __init__(self):
+            self.hll = HyperLogLog(b=b, mode=mode, buffer_size=buffer_size)
+            self.add = self.hll.add
+            self.seen = False
+
+        def step(self, item):
+            if item is not None:
+                self.add(item)
+                self.seen = True
+
+        def finalize(self):
+            return self.hll.to_bytes() if self.seen else None
+
+    class HllUnion:
+        def __init__(self):
+            self.hll = None
+
+        def step(self, blob):
+            if blob is None:
+                return
+            other = HyperLogLog.from_bytes(bytes(blob))
+            if self.hll is None:
+                self.hll = other
+            else:
+                self.hll.merge(other, auto_reduce=True)
+
+        def finalize(self):
+            return self.hll.to_bytes() if self.hll is not None else None
+
+    conn.create_aggregate("hll_add", 1, HllAdd)
+    conn.create_aggregate("hll_union", 1, HllUnion)
+    conn.create_function("hll_cardinality", 1, hll_cardinality, deterministic=True)
+
+
+def hll_cardinality(blob: bytes | None) -> float | None:
+    """Returns the estimate of a to_bytes() sketch, or None for NULL."""
+    if blob is None:
+        return None
+    return HyperLogLog.from_bytes(bytes(blob)).estimate()
@@ -0,0 +1,359 @@
+"""
+Crash-safe, append-only store of named sketches.
+
+A SketchStore keeps one HyperLogLog per key in memory and makes it durable
+in a directory of log files:
+
+    00000007.seg    segment: register deltas appended by checkpoint()
+    00000006.snap   snapshot: every sketch as of the end of segment 6
+
+Every file starts with a magic, followed by records of
+
+    uint32 body length, uint32 CRC-32 of the body,
+    body = kind (1 byte), uint16 key length, UTF-8 key, payload
+
+where the payload is a to_delta_bytes() delta or a to_bytes() sketch.
+checkpoint() appends the delta of every sketch that changed and fsyncs.
+
+On startup the newest snapshot is loaded and the segments after it are
+replayed. A crash can only leave a partial record at the tail of the
+newest segment, so that tail is truncated. A bad record anywhere else is
+corruption, not a crash, and recovery raises instead of silently dropping
+the valid records after it. Registers merge by max, so replay
+is idempotent and order-independent. A crash in the middle of compaction,
+which leaves old segments next to the new snapshot, is therefore harmless.
+
+compact() seals the active segment and then folds the previous snapshot
+and the sealed segments into a new snapshot on a background thread. It
+rebuilds from the files, not from the live sketches, so adds continue
+meanwhile. Startup after compaction reads one snapshot plus the segments
+written since, so it scales with the compacted size, not the history.
+
+    with SketchStore("sketches/") as store:
+        store.add("page:/home", user_id)
+        store.checkpoint()          # e.g. every few seconds
+        store.estimate("page:/home")
+"""
+import os
+import struct
+import threading
+import zlib
+from typing import Iterable, Iterator
+
+from .core import HyperLogLog
+
+DEFAULT_COMPACT_BYTES = 64 << 20
+
+_FILE_MAGIC = b"HLG1"
+_RECORD = struct.Struct(">II")
+_BODY = struct.Struct(">BH")
+_DELTA, _SNAPSHOT = 0, 1
+_EMPTY_DELTA = 9  # a to_delta_bytes() header with no registers
+_SEGMENT, _SNAPSHOT_FILE = ".seg", ".snap"
+
+
+def _encode_record(kind: int, key: str, payload: bytes) -> bytes:
+    key_bytes = key.encode("utf-8")
+    body = _BODY.pack(kind, len(key_bytes)) + key_bytes + payload
+    return _RECORD.pack(len(body), zlib.crc32(body)) + body
+
+
+def read_records(path: str) -> tuple[list[tuple[int, str, bytes]], int]:
+    """
+    Reads the valid records of a log file.
+
+    Args:
+        path (str): Segment or snapshot file.
+
+    Returns:
+        tuple[list, int]: ([(kind, key, payload)], offset just past the last
+        valid record). Reading stops at the first torn or corrupt record.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(_FILE_MAGIC)] != _FILE_MAGIC:
+        return [], 0
+    records = []
+    offset = len(_FILE_MAGIC)
+    while offset + _RECORD.size <= len(data):
+        length, crc = _RECORD.unpack_from(data, offset)
+        body = data[offset + _RECORD.size:offset + _RECORD.size + length]
+        if len(body) != length or length < _BODY.size or zlib.crc32(body) != crc:
+            break
+        kind, key_length = _BODY.unpack_from(body)
+        key = body[_BODY.size:_BODY.size + key_length].decode("utf-8")
+        records.append((kind, key, body[_BODY.size + key_length:]))
+        offset += _RECORD.size + length
+    return records, offset
+
+
+def _apply(sketches: dict, records: Iterable[tuple[int, str, bytes]]) -> None:
+    for kind, key, payload in records:
+        if kind == _SNAPSHOT:
+            hll = HyperLogLog.from_bytes(payload)
+            if key in sketches:
+                sketches[key].merge(hll, auto_reduce=True)
+            else:
+                sketches[key] = hll
+        else:
+            delta_b = payload[4]
+            hll = sketches.get(key)
+            if hll is None:
+                hll = sketches[key] = HyperLogLog(b=delta_b)
+            elif hll.b > delta_b:  # the sketch was merged down to a lower precision
+                hll = sketches[key] = hll.reduce_precision(delta_b)
+            hll.apply_delta(payload)
+
+
+def _fsync_dir(path: str) -> None:
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class SketchStore:
+    """
+    Named HyperLogLog sketches backed by an append-only, checksummed log.
+    """
+    def __init__(self, path: str, b: int = 14, fsync: bool = True,
+                 compact_bytes: int | None = DEFAULT_COMPACT_BYTES):
+        """
+        Opens (or creates) a store and recovers its sketches.
+
+        Args:
+            path (str): Directory holding the segments and snapshots.
+            b (int): Precision of new sketches. Default is 14.
+            fsync (bool): fsync every checkpoint. Default is True.
+            compact_bytes (int | None): Start a background compaction once
+                the segments since the last snapshot exceed this many bytes.
+                None only compacts on request.
+
+        Raises:
+            ValueError: If a snapshot or a segment other than the newest has
+                a corrupt record.
+        """
+        HyperLogLog(b=b)  # validate b up front
+        self.path = path
+        self.b = b
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self.sketches: dict[str, HyperLogLog] = {}
+        self._compactor: threading.Thread | None = None
+        self._compact_error: BaseException | None = None
+        os.makedirs(path, exist_ok=True)
+        self._seq = self._recover()
+        self._log_bytes = sum(os.path.getsize(self._file(seq, _SEGMENT))
+                              for seq in self._files(_SEGMENT) if seq > self._snapshot_seq())
+        self._active = self._open_segment(self._seq)
+
+    # Files
+
+    def _file(self, seq: int, suffix: str) -> str:
+        return os.path.join(self.path, f"{seq:08d}{suffix}")
+
+    def _files(self, suffix: str) -> list[int]:
+        return sorted(int(name[:-len(suffix)]) for name in os.listdir(self.path)
+                      if name.endswith(suffix) and name[:-len(suffix)].isdigit())
+
+    def _snapshot_seq(self) -> int:
+        snapshots = self._files(_SNAPSHOT_FILE)
+        return snapshots[-1] if snapshots else 0
+
+    def _open_segment(self, seq: int):
+        f = open(self._file(seq, _SEGMENT), "ab")
+        if not f.tell():
+            f.write(_FILE_MAGIC)
+            f.flush()
+            if self.fsync:  # checkpoints into a new file need its directory entry
+                os.fsync(f.fileno())
+                _fsync_dir(self.path)
+        return f
+
+    def _recover(self) -> int:
+        # Loads the newest snapshot, replays the segments after it and
+        # returns the sequence number for a fresh active segment
+        for name in os.listdir(self.path):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.path, name))
+        snapshot_seq = self._snapshot_seq()
+        # Left behind by a crash after a compaction's snapshot was in place
+        for seq in self._files(_SNAPSHOT_FILE):
+            if seq < snapshot_seq:
+                os.remove(self._file(seq, _SNAPSHOT_FILE))
+        for seq in self._files(_SEGMENT):
+            if seq <= snapshot_seq:
+                os.remove(self._file(seq, _SEGMENT))
+        if snapshot_seq:
+            _apply(self.sketches, self._read_sealed(self._file(snapshot_seq, _SNAPSHOT_FILE)))
+        segments = [seq for seq in self._files(_SEGMENT) if seq > snapshot_seq]
+        for seq in segments[:-1]:
+            _apply(self.sketches, self._read_sealed(self._file(seq, _SEGMENT)))
+        if segments:
+            path = self._file(segments[-1], _SEGMENT)
+            records, end = read_records(path)
+            _apply(self.sketches, records)
+            if end < os.path.getsize(path):
+                with open(path, "r+b") as f:  # drop a torn tail
+                    f.truncate(end)
+        for hll in self.sketches.values():
+            hll._track(set())  # later deltas only carry new changes
+        return max([snapshot_seq, *segments]) + 1
+
+    @staticmethod
+    def _read_sealed(path: str) -> list[tuple[int, str, bytes]]:
+        # Snapshots and all but the newest segment were complete and fsynced
+        # before anything newer was written, so a short read means corruption
+        records, end = read_records(path)
+        size = os.path.getsize(path)
+        if end < size:
+            raise ValueError(f"Corrupt record at byte {end} of {size} in sealed "
+                             f"log file {path}; refusing to drop the records after it")
+        return records
+
+    # Sketches
+
+    def get(self, key: str) -> HyperLogLog:
+        """Returns the live sketch for key, creating an empty one if needed."""
+        hll = self.sketches.get(key)
+        if hll is None:
+            hll = self.sketches[key] = HyperLogLog(b=self.b)
+        return hll
+
+    def add(self, key: str, item: object) -> None:
+        """Adds an item to the sketch of key."""
+        self.get(key).add(item)
+
+    def add_many(self, key: str, items: Iterable[object]) -> None:
+        """Adds every item of an iterable to the sketch of key."""
+        self.get(key).add_many(items)
+
+    def merge(self, key: str, hll: HyperLogLog) -> None:
+        """Merges a sketch into the sketch of key, at the lower precision if they differ."""
+        self.get(key).merge(hll, auto_reduce=True)
+
+    def estimate(self, key: str) -> float:
+        """Estimated cardinality of key (0 for unknown keys)."""
+        hll = self.sketches.get(key)
+        return hll.estimate() if hll is not None else 0.0
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.sketches)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.sketches
+
+    def __len__(self) -> int:
+        return len(self.sketches)
+
+    # Durability
+
+    def checkpoint(self) -> int:
+        """
+        Appends the delta of every changed sketch to the active segment and
+        makes it durable. Sketches changed through get() are included too.
+
+        Returns:
+            int: Bytes appended.
+        """
+        self._raise_compact_error()
+        written = self._write_deltas()
+        if self.compact_bytes is not None and self._log_bytes > self.compact_bytes:
+            self.compact(wait=False)
+        return written
+
+    def _write_deltas(self) -> int:
+        records = []
+        for key, hll in self.sketches.items():
+            delta = hll.to_delta_bytes()
+            if len(delta) > _EMPTY_DELTA:
+                records.append(_encode_record(_DELTA, key, delta))
+        data = b"".join(records)
+        if data:
+            self._active.write(data)
+            self._active.flush()
+            if self.fsync:
+                os.fsync(self._active.fileno())
+            self._log_bytes += len(data)
+        return len(data)
+
+    def compact(self, wait: bool = True) -> None:
+        """
+        Checkpoints, seals the active segment, and folds the last snapshot
+        and all sealed segments into a new snapshot on a background thread.
+
+        Args:
+            wait (bool): Block until the snapshot is written. Default is True.
+
+        Raises:
+            RuntimeError: If a compaction failed, e.g. on a corrupt record in
+                a sealed file. Nothing is removed then. Without wait, the
+                error surfaces on the next checkpoint() or compact().
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            if not wait:
+                return
+            self._compactor.join()
+        self._raise_compact_error()
+        self._write_deltas()
+        sealed = self._seq
+        self._active.close()
+        self._seq += 1
+        self._active = self._open_segment(self._seq)
+        self._log_bytes = 0
+        self._compactor = threading.Thread(target=self._compact_through, args=(sealed,),
+                                           name="hll-compaction", daemon=True)
+        self._compactor.start()
+        if wait:
+            self._compactor.join()
+            self._raise_compact_error()
+
+    def _compact_through(self, sealed: int) -> None:
+        # Runs on the compaction thread; touches only files, never the live sketches
+        try:
+            sketches: dict[str, HyperLogLog] = {}
+            previous = self._snapshot_seq()
+            # Strict reads: a corrupt input raises before any file is removed
+            if previous:
+                _apply(sketches, self._read_sealed(self._file(previous, _SNAPSHOT_FILE)))
+            segments = [seq for seq in self._files(_SEGMENT) if previous < seq <= sealed]
+            for seq in segments:
+                _apply(sketches, self._read_sealed(self._file(seq, _SEGMENT)))
+
+            target = self._file(sealed, _SNAPSHOT_FILE)
+            with open(target + ".tmp", "wb") as f:
+                f.write(_FILE_MAGIC)
+                for key, hll in sketches.items():
+                    f.write(_encode_record(_SNAPSHOT, key, hll.to_bytes()))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(target + ".tmp", target)
+            _fsync_dir(self.path)
+
+            for seq in segments:
+                os.remove(self._file(seq, _SEGMENT))
+            if previous:
+                os.remove(self._file(previous, _SNAPSHOT_FILE))
+        except BaseException as e:  # surfaced on the next checkpoint/compact
+            self._compact_error = e
+
+    def _raise_compact_error(self) -> None:
+        if self._compact_error is not None:
+            error, self._compact_error = self._compact_error, None
+            raise RuntimeError("Background compaction failed") from error
+
+    def close(self) -> None:
+        """Checkpoints, waits for a running compaction and closes the active segment."""
+        self.checkpoint()
+        if self._compactor is not None:
+            self._compactor.join()
+        self._active.close()
+        self._raise_compact_error()
+
+    def __enter__(self) -> "SketchStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
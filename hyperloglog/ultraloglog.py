@@ -0,0 +1,360 @@
+"""
+UltraLogLog: a HyperLogLog-compatible sketch with one byte per register.
+
+UltraLogLog (Ertl, "UltraLogLog: A Practical and More Space-Efficient
+Alternative to HyperLogLog for Approximate Distinct Counting", 2023)
+hashes, indexes and ranks items exactly as HyperLogLog does. The
+difference is what a register remembers. Besides the largest update value
+u seen (HLL's register), it records whether u - 1 and u - 2 were seen too:
+
+    register = u << 2 | [u - 1 seen] << 1 | [u - 2 seen]
+
+With RHO_MAX = 63 every state fits in one byte. The extra history makes
+the maximum-likelihood estimate markedly more accurate, by about 25% in
+memory-variance product over 6-bit HLL. At the same error the sketch
+therefore needs fewer bytes.
+
+Merging ORs the registers' unpacked histories, so it is associative,
+commutative and idempotent like an HLL max-merge. The u part of every
+register equals the HLL register for the same items and precision, so:
+
+    ull = UltraLogLog.from_hyperloglog(hll)     # keeps every register
+    ull.to_hyperloglog()                        # == hll's registers
+
+A converted sketch has no history bits to offer. It is marked so the
+estimator ignores them, and it then estimates with HLL-level accuracy,
+including after later adds and merges.
+
+    ull = UltraLogLog(b=12)
+    ull.add_many(user_ids)
+    ull.estimate()
+    blob = ull.to_bytes()        # b"ULL1" header, read back by from_bytes()
+"""
+import base64
+import math
+import struct
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+from .core import HyperLogLog
+from .columnar import column_hashes
+from .compression import bounded_decompress
+from .hash_utils import RHO_MAX, index_and_rho, index_and_rho_scalar, murmurhash128
+
+_MAGIC = b"ULL1"
+_ENCODINGS = {'packed': 0, 'zlib': 1}
+_HISTORY_FLAG = 0x01  # history bits are meaningful (cleared by HLL conversion)
+
+
+def merge_registers(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Register-wise union of two UltraLogLog register arrays.
+
+    Equivalent to OR-ing the unpacked histories and repacking. The register
+    with the larger u keeps its bits. The other one's u and history land
+    on the bits for u - 1 and u - 2 when they are that close.
+
+    Args:
+        a (np.ndarray): uint8 registers.
+        b (np.ndarray): uint8 registers of the same shape.
+
+    Returns:
+        np.ndarray: New uint8 array of merged registers.
+    """
+    a_wins = (a >> 2) >= (b >> 2)
+    high = np.where(a_wins, a, b)
+    low = np.where(a_wins, b, a)
+    gap = np.minimum((high >> 2) - (low >> 2), 3)
+    carried = ((4 | (low & 3)) >> gap) & 3
+    return high | np.where(low != 0, carried, 0).astype(np.uint8)
+
+
+def _state_tables() -> tuple[np.ndarray, tuple, tuple]:
+    # Per register state (0..255): the total probability weight of the update
+    # values known to be unseen, and the update values known to be seen, with
+    # and without the history bits. Update value k has weight 2^-k, except
+    # RHO_MAX, which takes the rest.
+    weights = np.array([0.0] + [2.0 ** -k for k in range(1, RHO_MAX)] + [2.0 ** -(RHO_MAX - 1)])
+    unseen = np.zeros(256)
+    seen = np.zeros((256, RHO_MAX + 1))
+    unseen_u = np.zeros(256)
+    seen_u = np.zeros((256, RHO_MAX + 1))
+    for state in range(256):
+        u = state >> 2
+        tail = 2.0 ** -u if u < RHO_MAX else 0.0  # every k > u
+        unseen[state] = unseen_u[state] = tail
+        if u:
+            seen[state, u] = seen_u[state, u] = 1
+        for bit, k in ((2, u - 1), (1, u - 2)):
+            if k >= 1:
+                if state & bit:
+                    seen[state, k] = 1
+                else:
+                    unseen[state] += weights[k]
+    return weights, (unseen, seen), (unseen_u, seen_u)
+
+
+_WEIGHTS, _WITH_HISTORY, _WITHOUT_HISTORY = _state_tables()
+
+
+def ml_estimate(counts: np.ndarray, m: int, history: bool = True) -> float:
+    """
+    Maximum-likelihood distinct count from a histogram of register states.
+
+    Under Poisson arrivals with rate x per register, update value k turns up
+    in a register with probability 1 - exp(-x w_k). The log-likelihood is
+
+        -x * A + sum_k c_k * log(1 - exp(-x w_k))
+
+    where A sums the weights of values known to be unseen and c_k counts
+    registers where k is known to be seen. Its derivative is convex and
+    decreasing in x. Newton's method started below the root therefore
+    climbs to it monotonically.
+
+    Args:
+        counts (np.ndarray): Number of registers in each of the 256 states.
+        m (int): Number of registers.
+        history (bool): Use the u - 1/u - 2 history bits. False gives the
+            HLL maximum-likelihood estimate from u alone.
+
+    Returns:
+        float: m times the estimated rate.
+    """
+    unseen, seen = _WITH_HISTORY if history else _WITHOUT_HISTORY
+    a = float(counts @ unseen)
+    c = counts @ seen
+    present = np.flatnonzero(c)
+    if not len(present):
+        return 0.0
+    if a == 0.0:
+        return math.inf
+    c, w = c[present], _WEIGHTS[present]
+    total = float(c.sum())
+    # x w / (e^(x w) - 1) >= 1 - x w / 2 gives a lower bound on the root
+    x = total / (a + float(c @ w) / 2)
+    for _ in range(100):
+        with np.errstate(over='ignore'):
+            inverse = 1 / np.expm1(x * w)  # 0 once e^(x w) overflows
+        slope = float(c @ (w * inverse)) - a
+        curvature = float(c @ (w * w * inverse * (1 + inverse)))
+        step = slope / curvature
+        x += step
+        if step <= x * 1e-12:
+            break
+    return m * x
+
+
+class UltraLogLog:
+    """
+    UltraLogLog sketch: 2^b one-byte registers holding u and two history bits.
+    """
+    def __init__(self, b: int = 14):
+        """
+        Args:
+            b (int): Precision parameter; the sketch has 2^b registers of one
+                byte. Default is 14.
+
+        Raises:
+            ValueError: If b is outside [4,18].
+        """
+        if not isinstance(b, int) or not (4 <= b <= 18):
+            raise ValueError("Value of b not in range [4,18]")
+        self.b = b
+        self.m = 1 << b
+        self.registers = bytearray(self.m)
+        self.history = True  # False once HLL registers without history are mixed in
+        self.cached_estimate = None  # last estimate(), reset whenever a register changes
+
+    def _array(self) -> np.ndarray:
+        # Writable uint8 view of the registers
+        return np.frombuffer(self.registers, dtype=np.uint8)
+
+    def add(self, item: object) -> None:
+        """Adds an item, hashed and ranked as HyperLogLog.add() does."""
+        idx, k = index_and_rho_scalar(*murmurhash128(str(item)), self.b)
+        register = self.registers[idx]
+        u = register >> 2
+        if k > u:
+            carried = ((4 | (register & 3)) >> (k - u)) & 3 if register else 0
+            self.registers[idx] = (k << 2) | carried
+        elif 1 <= u - k <= 2:
+            updated = register | (2 >> (u - k - 1))
+            if updated == register:
+                return
+            self.registers[idx] = updated
+        else:
+            return
+        self.cached_estimate = None
+
+    def add_many(self, items: Iterable[object]) -> None:
+        """Adds every item of an iterable; equivalent to calling add() on each."""
+        add = self.add
+        for item in items:
+            add(item)
+
+    def add_array(self, values) -> None:
+        """
+        Adds every non-null value of a column, as HyperLogLog.add_array() does
+        (pyarrow or NumPy; see hyperloglog.columnar).
+        """
+        self.add_hashes(column_hashes(values))
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Adds precomputed 64-bit hashes in one vectorized update.
+
+        Args:
+            hashes (np.ndarray): uint64 hash values, as murmurhash64a would return.
+        """
+        self.update_many(*index_and_rho(hashes, self.b))
+
+    def update_many(self, idx: np.ndarray, rho: np.ndarray) -> None:
+        """
+        Applies a batch of (index, update value) pairs.
+
+        The batch is first folded into one register state per touched index
+        (its largest value plus the history bits of the values one and two
+        below it), then merged into the registers.
+
+        Args:
+            idx (np.ndarray): Register indices.
+            rho (np.ndarray): Update values, aligned with idx.
+        """
+        if not len(idx):
+            return
+        keys = np.unique((np.asarray(idx, dtype=np.int64) << 6) | np.asarray(rho, dtype=np.int64))
+        indices, values = keys >> 6, keys & 0x3F
+        starts = np.flatnonzero(np.concatenate(([True], indices[1:] != indices[:-1])))
+        ends = np.append(starts[1:], len(keys)) - 1
+        top = np.repeat(values[ends], np.diff(np.append(starts, len(keys))))
+        history = np.bitwise_or.reduceat(np.select([top - values == 1, top - values == 2], [2, 1], 0), starts)
+        batch = ((values[ends] << 2) | history).astype(np.uint8)
+
+        targets = indices[ends]
+        registers = self._array()
+        before = registers[targets]
+        merged = merge_registers(before, batch)
+        if (merged != before).any():
+            registers[targets] = merged
+            self.cached_estimate = None
+
+    def merge(self, other: "UltraLogLog | HyperLogLog") -> "UltraLogLog":
+        """
+        Merges another UltraLogLog, or a HyperLogLog through
+        from_hyperloglog(), into this one.
+
+        Returns:
+            UltraLogLog: self, for chaining.
+
+        Raises:
+            ValueError: If the precisions differ.
+        """
+        if isinstance(other, HyperLogLog):
+            other = UltraLogLog.from_hyperloglog(other)
+        if other.b != self.b:
+            raise ValueError("Cannot merge ULLs with different precision")
+        registers = self._array()
+        merged = merge_registers(registers, other._array())
+        if not np.array_equal(merged, registers):
+            registers[:] = merged
+            self.cached_estimate = None
+        if not other.history and self.history:
+            self.history = False
+            self.cached_estimate = None
+        return self
+
+    def estimate(self) -> float:
+        """
+        Returns the maximum-likelihood estimated cardinality (see
+        ml_estimate), cached until a register changes.
+        """
+        if self.cached_estimate is None:
+            counts = np.bincount(self._array(), minlength=256).astype(np.float64)
+            self.cached_estimate = ml_estimate(counts, self.m, self.history)
+        return self.cached_estimate
+
+    @classmethod
+    def from_hyperloglog(cls, hll: HyperLogLog) -> "UltraLogLog":
+        """
+        Converts a HyperLogLog of any mode without losing a register.
+
+        Each HLL register becomes u with no history. The sketch is marked
+        so estimate() ignores history bits, because the HLL never had them.
+
+        Raises:
+            ValueError: If the HLL places items the postgresql-hll/Redis way.
+        """
+        if hll.placement != 'native':
+            raise ValueError(f"Cannot convert a placement={hll.placement!r} HyperLogLog")
+        ull = cls(b=hll.b)
+        if hll._buffered:
+            hll.flush()
+        ull._array()[:] = hll._register_image() << 2
+        ull.history = False
+        return ull
+
+    def to_hyperloglog(self) -> HyperLogLog:
+        """
+        Returns the dense HyperLogLog of the same items: every register's u.
+        """
+        hll = HyperLogLog(b=self.b, mode='dense')
+        hll.impl.registers = (self._array() >> 2).tolist()
+        return hll
+
+    def to_bytes(self, encoding: str = 'packed') -> bytes:
+        """
+        Serializes the sketch with the same header layout as
+        HyperLogLog.to_bytes().
+
+        The layout is b"ULL1", b, a flags byte (history bit, with the
+        encoding in the high nibble), a uint32 payload length, and then the
+        2^b register bytes. encoding='zlib' DEFLATE-compresses the
+        payload.
+        """
+        if encoding not in _ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}; expected one of {sorted(_ENCODINGS)}")
+        payload = bytes(self.registers)
+        if encoding == 'zlib':
+            payload = zlib.compress(payload, 9)
+        flags = (_HISTORY_FLAG if self.history else 0) | (_ENCODINGS[encoding] << 4)
+        return _MAGIC + bytes([self.b, flags]) + struct.pack(">I", len(payload)) + payload
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "UltraLogLog":
+        """
+        Reconstructs a sketch from to_bytes().
+
+        Raises:
+            ValueError: If the blob is malformed.
+        """
+        if len(blob) < 10:
+            raise ValueError("ULL blob too short")
+        if blob[:4] != _MAGIC:
+            raise ValueError("Invalid ULL magic/version")
+        b, flags = blob[4], blob[5]
+        encodings = {flag: name for name, flag in _ENCODINGS.items()}
+        if flags >> 4 not in encodings or flags & 0x0F & ~_HISTORY_FLAG:
+            raise ValueError(f"Unknown ULL flags {flags}")
+        (length,) = struct.unpack(">I", blob[6:10])
+        if len(blob) != 10 + length:
+            raise ValueError("Invalid ULL payload length")
+        payload = blob[10:]
+        ull = cls(b=b)
+        if encodings[flags >> 4] == 'zlib':
+            payload = bounded_decompress(payload, ull.m)
+        if len(payload) != ull.m:
+            raise ValueError("Invalid ULL register count")
+        ull.registers[:] = payload
+        ull.history = bool(flags & _HISTORY_FLAG)
+        return ull
+
+    def to_base64(self) -> str:
+        """Returns a Base64 representation of to_bytes()."""
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def from_base64(cls, s: str) -> "UltraLogLog":
+        """Builds a sketch from a to_base64() string."""
+        return cls.from_bytes(base64.b64decode(s))
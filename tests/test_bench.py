@@ -0,0 +1,54 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+from hyperloglog import bench
+
+
+class TestBenchSuite(unittest.TestCase):
+    def setUp(self):
+        self.results = bench.run_suite(precisions=[4, 8], n_items=200, repeat=1, warmup=0)
+
+    def test_covers_all_cases(self):
+        keys = set(self.results["results"])
+        for b in (4, 8):
+            for case in ("add", "add_buffered", "add_many", "estimate_dense", "promote", "base64_roundtrip_sparse",
+                         "to_bytes_dense", "from_bytes_sparse"):
+                self.assertIn(f"{case}/b={b}", keys)
+            for left, right in bench.MERGE_MODES:
+                self.assertIn(f"merge_{left}_{right}/b={b}", keys)
+        self.assertEqual(self.results["meta"]["seed"], bench.SEED)
+
+    def test_fixed_seed_items(self):
+        self.assertEqual(bench.make_items(50), bench.make_items(50))
+
+    def test_compare_flags_regressions(self):
+        slower = copy.deepcopy(self.results)
+        slower["results"]["add/b=4"]["median_ns"] = self.results["results"]["add/b=4"]["median_ns"] * 2
+
+        rows = {row["case"]: row for row in bench.compare(slower, self.results, threshold=0.5)}
+
+        self.assertEqual(rows["add/b=4"]["status"], "regression")
+        self.assertEqual(rows["add/b=8"]["status"], "ok")
+
+    def test_cli_writes_json_and_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline_path = os.path.join(tmp, "baseline.json")
+            faster = copy.deepcopy(self.results)
+            for result in faster["results"].values():
+                result["median_ns"] = 1
+            with open(baseline_path, "w") as f:
+                json.dump(faster, f)
+            output_path = os.path.join(tmp, "results.json")
+
+            code = bench.main(["--precisions", "4", "--items", "50", "--repeat", "1", "--cases", "add",
+                               "--output", output_path, "--baseline", baseline_path])
+
+            self.assertEqual(code, 1)
+            with open(output_path) as f:
+                self.assertIn("add/b=4", json.load(f)["results"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
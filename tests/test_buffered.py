@@ -0,0 +1,69 @@
+import unittest
+from hyperloglog.core import HyperLogLog
+
+
+class TestBufferedAdd(unittest.TestCase):
+    def _pair(self, b, n, buffer_size, mode='sparse'):
+        eager = HyperLogLog(b=b, mode=mode)
+        buffered = HyperLogLog(b=b, mode=mode, buffer_size=buffer_size)
+        for i in range(n):
+            eager.add(f"item{i}")
+            buffered.add(f"item{i}")
+        return eager, buffered
+
+    def test_matches_eager_mode(self):
+        for mode in ('sparse', 'dense', 'dense4'):
+            for n in (0, 7, 300, 5000):
+                with self.subTest(mode=mode, n=n):
+                    eager, buffered = self._pair(10, n, 64, mode)
+                    self.assertEqual(buffered.estimate(), eager.estimate())
+                    self.assertEqual(buffered.mode, eager.mode)
+                    self.assertEqual(buffered.impl.registers, eager.impl.registers)
+                    self.assertEqual(buffered.to_bytes(), eager.to_bytes())
+
+    def test_registers_update_lazily(self):
+        hll = HyperLogLog(b=10, buffer_size=100)
+        for i in range(50):
+            hll.add(f"item{i}")
+        self.assertEqual(hll.impl.registers, {})
+
+        hll.flush()
+        self.assertGreater(len(hll.impl.registers), 0)
+
+    def test_full_buffer_flushes_and_promotes(self):
+        eager, buffered = self._pair(8, 1000, 256)
+        self.assertEqual(buffered._buffered, 1000 % 256)
+        self.assertEqual(buffered.mode, 'dense')
+        buffered.flush()
+        self.assertEqual(buffered.impl.registers, eager.impl.registers)
+
+    def test_small_flushes_on_large_sketches(self):
+        # Batches far below m only touch their own registers, deltas included
+        eager, buffered = self._pair(16, 3000, 256, 'dense')
+        self.assertEqual(buffered.to_delta_bytes(), eager.to_delta_bytes())
+        for i in range(3000, 3500):
+            eager.add(f"item{i}")
+            buffered.add(f"item{i}")
+        self.assertEqual(buffered.to_delta_bytes(), eager.to_delta_bytes())
+        self.assertEqual(buffered.impl.registers, eager.impl.registers)
+        self.assertEqual(buffered.estimate(), eager.estimate())
+
+    def test_merge_flushes_both_sides(self):
+        left = HyperLogLog(b=10, buffer_size=1000)
+        right = HyperLogLog(b=10, buffer_size=1000)
+        left.add_many(f"a{i}" for i in range(100))
+        right.add_many(f"b{i}" for i in range(100))
+
+        left.merge(right)
+
+        expected = HyperLogLog(b=10)
+        expected.add_many([f"a{i}" for i in range(100)] + [f"b{i}" for i in range(100)])
+        self.assertEqual(left.impl.registers, expected.impl.registers)
+
+    def test_invalid_buffer_size(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(b=10, buffer_size=-1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,81 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from hyperloglog.core import HyperLogLog
+from hyperloglog import cli
+
+LINES = [f"10.0.{i % 37}.{i % 11},GET,/page{i % 5}" for i in range(2000)] + ["", "short", "a,,c"]
+
+
+def expected(field):
+    hll = HyperLogLog(b=12)
+    for line in LINES:
+        parts = line.split(",")
+        if len(parts) >= field and parts[field - 1]:
+            hll.add(parts[field - 1])
+    return hll
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "access.log")
+        with open(self.path, "w", newline="") as f:
+            f.write("\r\n".join(LINES))  # CRLF and no trailing newline
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = cli.main(list(argv))
+        return code, out.getvalue().strip()
+
+    def test_fields_match_add_across_small_reads(self):
+        for field in (1, 2, 3):
+            hll = HyperLogLog(b=12)
+            with open(self.path, "rb") as f:
+                cli.count_stream(hll, f, delimiter=ord(","), field=field, read_bytes=64)
+            self.assertEqual(hll.impl.registers, expected(field).impl.registers)
+
+    def test_whole_lines(self):
+        hll = HyperLogLog(b=12)
+        with open(self.path, "rb") as f:
+            added, _ = cli.count_stream(hll, f)
+        reference = HyperLogLog(b=12)
+        for line in LINES:
+            if line:
+                reference.add(line)
+        self.assertEqual(added, len(LINES) - 1)
+        self.assertEqual(hll.impl.registers, reference.impl.registers)
+
+    def test_gzip_output_and_union(self):
+        gz_path = self.path + ".gz"
+        with open(self.path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+            dst.write(src.read())
+        sketch_path = os.path.join(self.tmp.name, "ips.hll")
+
+        code, printed = self.run_cli("count", gz_path, "-d", ",", "-f", "1", "-b", "12", "-o", sketch_path, "-q")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(int(printed), round(expected(1).estimate()))
+        with open(sketch_path, "rb") as f:
+            self.assertEqual(HyperLogLog.from_bytes(f.read()).impl.registers, expected(1).impl.registers)
+
+        _, union = self.run_cli("count", "--union", sketch_path, sketch_path)
+        self.assertEqual(union, printed)
+
+    def test_rejects_bad_arguments(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.main(["count", "-d", ",,"])
+            with self.assertRaises(SystemExit):
+                cli.main(["count", "-f", "0"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,70 @@
+import random
+import unittest
+import numpy as np
+from hyperloglog.core import HyperLogLog
+from hyperloglog.hash_utils import murmurhash64a, murmurhash64a_array
+from hyperloglog.columnar import column_hashes
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+
+def eager(values, b=12):
+    hll = HyperLogLog(b=b)
+    for value in values:
+        hll.add(value)
+    return hll
+
+
+class TestColumnHashing(unittest.TestCase):
+    def test_vectorized_murmur_matches_scalar(self):
+        rng = random.Random(7)
+        keys = [bytes(rng.getrandbits(8) for _ in range(rng.randint(0, 70))) for _ in range(500)]
+        offsets = np.concatenate([[0], np.cumsum([len(k) for k in keys])])
+        data = np.frombuffer(b"".join(keys), dtype=np.uint8)
+        hashes = murmurhash64a_array(data, offsets)
+        self.assertEqual(hashes.tolist(), [murmurhash64a(k) for k in keys])
+
+    def test_numpy_strings_match_add(self):
+        for values in (["alpha", "b", "", "gamma" * 5], ["héllo", "wörld", "日本", "plain"]):
+            hll = HyperLogLog(b=12)
+            hll.add_array(np.array(values))
+            self.assertEqual(hll.impl.registers, eager(values).impl.registers)
+
+    def test_numpy_integers_match_add(self):
+        values = np.arange(-500, 3000, dtype=np.int64)
+        hll = HyperLogLog(b=12)
+        hll.add_array(values)
+        self.assertEqual(hll.mode, 'dense')
+        self.assertEqual(hll.impl.registers, eager(values.tolist()).impl.registers)
+
+    def test_numpy_bytes_hash_raw_bytes(self):
+        values = [b"ab", b"xyz", b"q"]
+        self.assertEqual(column_hashes(np.array(values)).tolist(), [murmurhash64a(v) for v in values])
+
+    def test_masked_values_are_skipped(self):
+        values = np.ma.array(["a", "b", "c"], mask=[False, True, False])
+        self.assertEqual(column_hashes(values).tolist(), [murmurhash64a("a"), murmurhash64a("c")])
+
+    def test_unsupported_dtype(self):
+        with self.assertRaises(TypeError):
+            column_hashes(np.array([1.5, 2.5]))
+
+    @unittest.skipUnless(pa, "pyarrow not installed")
+    def test_arrow_strings_with_nulls_and_slices(self):
+        array = pa.array(["a", None, "ccc", "dé", None, "e"])
+        self.assertEqual(column_hashes(array).tolist(), [murmurhash64a(v) for v in ["a", "ccc", "dé", "e"]])
+        self.assertEqual(column_hashes(array.slice(2, 3)).tolist(), [murmurhash64a(v) for v in ["ccc", "dé"]])
+        chunked = pa.chunked_array([["x", "y"], [None, "z"]], type=pa.large_string())
+        self.assertEqual(column_hashes(chunked).tolist(), [murmurhash64a(v) for v in "xyz"])
+
+    @unittest.skipUnless(pa, "pyarrow not installed")
+    def test_arrow_integers_match_add(self):
+        array = pa.array([1, None, 22, -3], type=pa.int32())
+        self.assertEqual(column_hashes(array).tolist(), [murmurhash64a(str(v)) for v in (1, 22, -3)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -3,7 +3,10 @@ import unittest
 from hyperloglog.core import HyperLogLog
 from hyperloglog.dense import DenseHyperLogLog
 from hyperloglog.sparse import SparseHyperLogLog
-from hyperloglog.compression import pack_registers, compress_sparse_registers
+from hyperloglog.compression import (
+    pack_registers, compress_sparse_registers,
+    compress_dense_registers, decompress_dense_registers,
+)
 
 class TestCompression(unittest.TestCase):
     def test_dense_packing_roundtrip(self):
@@ -26,5 +29,18 @@ class TestCompression(unittest.TestCase):
         data = compress_sparse_registers(hll.impl.registers, hll.b)
         self.assertIsInstance(data, bytes)
 
+    def test_dense_entropy_coding_roundtrip(self):
+        registers = [7, 8, 9, 7, 12, 7, 10, 8] * 64
+        data = compress_dense_registers(registers)
+        self.assertEqual(data[0], 7)  # minimum stored up front
+        self.assertEqual(decompress_dense_registers(data, len(registers)), registers)
+
+    def test_dense_entropy_coding_rejects_wrong_size(self):
+        data = compress_dense_registers([1, 2, 3, 4])
+        with self.assertRaises(ValueError):
+            decompress_dense_registers(data, 8)
+        with self.assertRaises(ValueError):
+            decompress_dense_registers(data[:1] + b"garbage", 4)
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import unittest
+from hyperloglog.core import HyperLogLog
+from hyperloglog.dataframe import approx_nunique, groupby_sketch, series_sketch
+
+try:
+    import pandas as pd
+except ImportError:  # optional dependency
+    pd = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+
+def eager(values, b=12):
+    hll = HyperLogLog(b=b)
+    for value in values:
+        hll.add(value)
+    return hll
+
+
+@unittest.skipUnless(pd, "pandas not installed")
+class TestDataFrameIntegration(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "country": ["de", "fr", None, "de", "us"] * 400,
+            "user": [f"u{i % 700}" for i in range(2000)],
+            "n": range(2000),
+        })
+        self.df.loc[3, "user"] = None
+
+    def test_approx_nunique_matches_add(self):
+        users = self.df["user"]
+        self.assertEqual(approx_nunique(users, b=12), eager(users.dropna()).estimate())
+        self.assertEqual(series_sketch(self.df["n"], b=12).impl.registers,
+                         eager(range(2000)).impl.registers)
+
+    @unittest.skipUnless(pa, "pyarrow not installed")
+    def test_arrow_backed_series_match_add(self):
+        users = self.df["user"]
+        expected = eager(users.dropna()).impl.registers
+        for dtype in ("string[pyarrow]", pd.ArrowDtype(pa.string())):
+            with self.subTest(dtype=str(dtype)):
+                self.assertEqual(series_sketch(users.astype(dtype), b=12).impl.registers, expected)
+
+    def test_series_sketch_goes_through_the_wrapper(self):
+        from hyperloglog import instrumentation
+        instrumentation.enable()
+        self.addCleanup(instrumentation.disable)
+        hll = series_sketch(self.df["n"], b=12)
+        self.assertEqual(hll.counters.as_dict()["adds"], 2000)
+
+    def test_groupby_sketch_matches_per_group_add(self):
+        groups = groupby_sketch(self.df, "country", "user", b=12)
+        self.assertEqual(set(groups), {"de", "fr", "us"})
+        for country, hll in groups.items():
+            rows = self.df[self.df["country"] == country]["user"].dropna()
+            self.assertEqual(hll.impl.registers, eager(rows).impl.registers)
+
+    def test_chunks_merge_to_the_same_sketches(self):
+        whole = groupby_sketch(self.df, "country", "user", b=12)
+        chunked = None
+        for start in range(0, len(self.df), 300):
+            chunked = groupby_sketch(self.df.iloc[start:start + 300], "country", "user", b=12, into=chunked)
+        small_chunks = groupby_sketch(self.df, "country", "user", b=12, chunk_rows=128)
+        self.assertEqual(chunked.estimates(), whole.estimates())
+        self.assertEqual(small_chunks.estimates(), whole.estimates())
+
+    def test_multi_column_keys_to_series(self):
+        self.df["even"] = self.df["n"] % 2 == 0
+        series = groupby_sketch(self.df, ["country", "even"], "n", b=12).to_series(name="approx")
+        exact = self.df.dropna(subset=["country"]).groupby(["country", "even"])["n"].nunique()
+        self.assertEqual(series.name, "approx")
+        for key, count in exact.items():
+            self.assertAlmostEqual(series[key], count, delta=0.05 * count)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
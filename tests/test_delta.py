@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+
+
+def _entries(delta):
+    return (len(delta) - 9) // 4
+
+
+class TestDeltaSerialization(unittest.TestCase):
+    def assertSameRegisters(self, a, b):
+        self.assertEqual(a._register_image().tolist(), b._register_image().tolist())
+
+    def test_first_delta_is_full_then_only_changes(self):
+        hll = HyperLogLog(b=12, mode='dense')
+        hll.add_many(range(1000))
+        full = hll.to_delta_bytes()
+        self.assertEqual(_entries(full), len(hll._register_arrays()[0]))
+        self.assertEqual(_entries(hll.to_delta_bytes()), 0)
+        hll.add("new item")
+        self.assertLessEqual(_entries(hll.to_delta_bytes()), 1)
+
+    def test_replica_follows_every_mode(self):
+        for mode in ('explicit', 'sparse', 'dense', 'dense4'):
+            with self.subTest(mode=mode):
+                source = HyperLogLog(b=10, mode=mode)
+                replica = HyperLogLog(b=10)
+                for start in range(0, 3000, 300):  # crosses explicit -> sparse -> dense
+                    source.add_many(range(start, start + 300))
+                    replica.apply_delta(source.to_delta_bytes())
+                self.assertSameRegisters(source, replica)
+
+    def test_replay_and_reordering_are_harmless(self):
+        source = HyperLogLog(b=10)
+        deltas = []
+        for start in range(0, 2000, 500):
+            source.add_many(range(start, start + 500))
+            deltas.append(source.to_delta_bytes())
+        replica = HyperLogLog(b=10)
+        for delta in reversed(deltas + deltas):
+            replica.apply_delta(delta)
+        self.assertSameRegisters(source, replica)
+
+    def test_merges_and_bulk_adds_are_tracked(self):
+        source = HyperLogLog(b=10, mode='dense', buffer_size=64)
+        replica = HyperLogLog(b=10)
+        replica.apply_delta(source.to_delta_bytes())
+        other = HyperLogLog(b=10)
+        other.add_many(range(50))
+        source.merge(other)
+        source.add_many(range(5000, 5100))
+        source.add_array(np.arange(9000, 9100))
+        replica.apply_delta(source.to_delta_bytes())
+        self.assertSameRegisters(source, replica)
+
+    def test_replica_forwards_applied_changes(self):
+        source, middle, leaf = HyperLogLog(b=10), HyperLogLog(b=10), HyperLogLog(b=10)
+        middle.to_delta_bytes()  # start tracking on the relay
+        source.add_many(range(400))
+        middle.apply_delta(source.to_delta_bytes())
+        leaf.apply_delta(middle.to_delta_bytes())
+        self.assertSameRegisters(source, leaf)
+
+    def test_precision_change_sends_a_full_delta(self):
+        hll = HyperLogLog(b=12)
+        hll.add_many(range(100))
+        hll.to_delta_bytes()
+        low = HyperLogLog(b=10)
+        low.add("x")
+        hll.merge(low, auto_reduce=True)
+        delta = hll.to_delta_bytes()
+        self.assertEqual(delta[4], 10)
+        self.assertEqual(_entries(delta), len(hll._register_arrays()[0]))
+
+    def test_invalid_deltas(self):
+        hll = HyperLogLog(b=10)
+        delta = HyperLogLog(b=12).to_delta_bytes()
+        with self.assertRaisesRegex(ValueError, "different precision"):
+            hll.apply_delta(delta)
+        with self.assertRaisesRegex(ValueError, "too short"):
+            hll.apply_delta(b"HLD1")
+        with self.assertRaisesRegex(ValueError, "magic"):
+            hll.apply_delta(b"XXXX" + delta[4:])
+        with self.assertRaisesRegex(ValueError, "length"):
+            hll.apply_delta(hll.to_delta_bytes() + b"\x00")
+        with self.assertRaisesRegex(ValueError, "register index"):
+            hll.apply_delta(b"HLD1\x0a\x00\x00\x00\x01" + (1 << 20 | 1).to_bytes(4, "big"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
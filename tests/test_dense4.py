@@ -0,0 +1,106 @@
+import struct
+import unittest
+from hyperloglog.core import HyperLogLog
+from hyperloglog.dense4 import Dense4HyperLogLog
+
+
+class TestDense4(unittest.TestCase):
+    def _filled(self, b, mode, n, start=0):
+        hll = HyperLogLog(b=b, mode=mode)
+        for i in range(start, start + n):
+            hll.add(f"item{i}")
+        return hll
+
+    def test_registers_match_six_bit_dense(self):
+        # b=4 with many items pushes the base offset up and fills the aux map
+        dense = self._filled(4, 'dense', 20000)
+        dense4 = self._filled(4, 'dense4', 20000)
+
+        self.assertIsInstance(dense4.impl, Dense4HyperLogLog)
+        self.assertGreater(dense4.impl.cur_min, 0)
+        self.assertEqual(list(dense4.impl.registers), dense.impl.registers)
+        self.assertAlmostEqual(dense4.estimate(), dense.estimate())
+
+    def test_aux_overflow_values(self):
+        hll = HyperLogLog(b=6, mode='dense4')
+        hll.impl.update(3, 40)
+        hll.impl.update(5, 2)
+
+        self.assertEqual(hll.impl.aux, {3: 40})
+        self.assertEqual(hll.impl.get(3), 40)
+        self.assertEqual(hll.impl.get(5), 2)
+        self.assertFalse(hll.impl.update(3, 39))
+
+    def test_registers_are_read_only(self):
+        hll = self._filled(8, 'dense4', 500)
+        hll.impl.update(9, 45)
+        with self.assertRaises(TypeError):
+            hll.impl.registers[0] = 30
+        values = hll.impl.values()
+        with self.assertRaises(ValueError):
+            values[0] = 30
+        self.assertEqual(values.tolist(), [hll.impl.get(i) for i in range(hll.m)])
+        self.assertEqual(values[9], 45)
+
+    def test_registers_tuple_is_reused_until_a_change(self):
+        hll = self._filled(8, 'dense4', 500)
+        registers = hll.impl.registers
+        self.assertIs(hll.impl.registers, registers)
+        hll.impl.update(3, 50)
+        self.assertIsNot(hll.impl.registers, registers)
+        self.assertEqual(hll.impl.registers[3], 50)
+
+    def test_malformed_payloads(self):
+        hll = self._filled(6, 'dense4', 200)
+        hll.impl.update(7, 45)
+        payload = hll.impl.to_payload()
+        half = 32
+        aux = 5 + half
+        bad_index = payload[:aux] + struct.pack(">IB", 64, 45)
+        bad_value = payload[:aux] + struct.pack(">IB", 7, 70)
+        missing = payload[:1 + half] + struct.pack(">I", 0)
+        bad_base = bytes([64]) + payload[1:]
+        for bad in (bad_index, bad_value, missing, bad_base):
+            with self.assertRaises(ValueError):
+                Dense4HyperLogLog(6, bad)
+        self.assertEqual(Dense4HyperLogLog(6, payload).registers, hll.impl.registers)
+
+    def test_merge_with_dense_and_sparse(self):
+        dense4 = self._filled(10, 'dense4', 3000)
+        dense = self._filled(10, 'dense', 3000, start=1000)
+        sparse = self._filled(10, 'sparse', 50, start=9000)
+
+        dense4.merge(dense).merge(sparse)
+
+        expected = self._filled(10, 'dense', 4000)
+        expected.merge(sparse)
+        self.assertEqual(list(dense4.impl.registers), expected.impl.registers)
+
+    def test_dense_merges_dense4(self):
+        dense = self._filled(10, 'dense', 2000)
+        sparse = self._filled(10, 'sparse', 20)
+        dense4 = self._filled(10, 'dense4', 2000, start=1000)
+
+        dense.merge(dense4)
+        sparse.merge(dense4)
+
+        expected = self._filled(10, 'dense', 3000)
+        self.assertEqual(dense.impl.registers, expected.impl.registers)
+        self.assertEqual(sparse.mode, 'dense')
+
+    def test_to_bytes_round_trip_and_size(self):
+        hll = self._filled(16, 'dense4', 5000)
+        hll.impl.update(7, 45)  # force an aux entry
+
+        blob = hll.to_bytes()
+        restored = HyperLogLog.from_bytes(blob)
+
+        self.assertEqual(restored.mode, 'dense4')
+        self.assertEqual(restored.impl.registers, hll.impl.registers)
+        self.assertEqual(restored.impl.num_at_cur_min, hll.impl.num_at_cur_min)
+        self.assertAlmostEqual(restored.estimate(), hll.estimate())
+        self.assertLess(len(blob), len(self._filled(16, 'dense', 10).to_bytes()) * 2 // 3 + 64)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,98 @@
+import struct
+import unittest
+from hyperloglog.core import HyperLogLog
+
+
+class TestExplicitMode(unittest.TestCase):
+    def test_exact_counts(self):
+        hll = HyperLogLog(b=14, mode='explicit')
+        for item in ["a", "b", "c", "a", 1, "1"]:
+            hll.add(item)
+        self.assertEqual(hll.mode, 'explicit')
+        self.assertEqual(hll.estimate(), 4.0)
+
+    def test_promotes_to_sparse_with_same_registers(self):
+        items = [f"item{i}" for i in range(200)]
+        explicit = HyperLogLog(b=14, mode='explicit')
+        sparse = HyperLogLog(b=14)
+        for item in items:
+            explicit.add(item)
+            sparse.add(item)
+        self.assertEqual(explicit.mode, 'sparse')
+        self.assertEqual(explicit.impl.registers, sparse.impl.registers)
+        self.assertEqual(explicit.estimate(), sparse.estimate())
+
+    def test_promotes_through_to_dense(self):
+        hll = HyperLogLog(b=6, mode='explicit', explicit_budget=2048)
+        hll.add_many(f"item{i}" for i in range(400))
+        self.assertEqual(hll.mode, 'dense')
+
+    def test_merge_is_set_union(self):
+        left = HyperLogLog(b=12, mode='explicit')
+        right = HyperLogLog(b=12, mode='explicit')
+        left.add_many(["a", "b", "c"])
+        right.add_many(["c", "d"])
+        left.merge(right)
+        self.assertEqual(left.mode, 'explicit')
+        self.assertEqual(left.estimate(), 4.0)
+
+    def test_merge_with_sparse_either_side(self):
+        explicit = HyperLogLog(b=12, mode='explicit')
+        explicit.add_many(["a", "b"])
+        sparse = HyperLogLog(b=12)
+        sparse.add_many(["b", "c"])
+        expected = HyperLogLog(b=12)
+        expected.add_many(["a", "b", "c"])
+
+        into_sparse = HyperLogLog.from_bytes(sparse.to_bytes()).merge(explicit)
+        into_explicit = HyperLogLog.from_bytes(explicit.to_bytes()).merge(sparse)
+
+        self.assertEqual(into_sparse.impl.registers, expected.impl.registers)
+        self.assertEqual(into_explicit.mode, 'sparse')
+        self.assertEqual(into_explicit.impl.registers, expected.impl.registers)
+
+    def test_bytes_roundtrip(self):
+        hll = HyperLogLog(b=14, mode='explicit')
+        hll.add_many([f"user{i}" for i in range(40)])
+        blob = hll.to_bytes()
+        restored = HyperLogLog.from_bytes(blob)
+        self.assertEqual(restored.mode, 'explicit')
+        self.assertEqual(restored.estimate(), 40.0)
+        self.assertEqual(len(blob), 10 + 8 * 40)
+        self.assertEqual(HyperLogLog.from_bytes(hll.to_bytes('zlib')).estimate(), 40.0)
+
+    def test_bytes_roundtrip_keeps_budget(self):
+        hll = HyperLogLog(b=14, mode='explicit', explicit_budget=8 * 300)
+        hll.add_many(range(200))
+        for encoding in ('packed', 'zlib'):
+            restored = HyperLogLog.from_bytes(hll.to_bytes(encoding))
+            self.assertEqual(restored.impl.budget, 8 * 300)
+            restored.add_many(range(200, 300))
+            self.assertEqual(restored.mode, 'explicit')
+            restored.add(300)
+            self.assertEqual(restored.mode, 'sparse')
+        # The default budget keeps the original header
+        self.assertEqual(HyperLogLog(mode='explicit').to_bytes()[5], 3)
+
+    def test_budget_is_validated(self):
+        for budget in (0, -8, 1 << 33, 8.0):
+            with self.subTest(budget=budget):
+                with self.assertRaises(ValueError):
+                    HyperLogLog(mode='explicit', explicit_budget=budget)
+        # A forged blob holding more hashes than its own budget
+        hll = HyperLogLog(b=14, mode='explicit', explicit_budget=8 * 60)
+        hll.add_many(range(50))
+        blob = bytearray(hll.to_bytes())
+        blob[10:14] = struct.pack(">I", 16)
+        with self.assertRaisesRegex(ValueError, "exceeds its budget"):
+            HyperLogLog.from_bytes(bytes(blob))
+
+    def test_buffered_explicit(self):
+        hll = HyperLogLog(b=14, mode='explicit', buffer_size=16)
+        for i in range(50):
+            hll.add(i)
+        self.assertEqual(hll.estimate(), 50.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
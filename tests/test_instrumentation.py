@@ -0,0 +1,76 @@
+import unittest
+from hyperloglog import instrumentation
+from hyperloglog.core import HyperLogLog
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+        self.events = []
+        self.hook = lambda event, ns: self.events.append((event, ns))
+        instrumentation.add_timing_hook(self.hook)
+
+    def tearDown(self):
+        instrumentation.remove_timing_hook(self.hook)
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_by_default_is_plain_add(self):
+        instrumentation.disable()
+        self.assertIs(HyperLogLog.add, HyperLogLog._add_plain)
+        hll = HyperLogLog(b=8)
+        hll.add("foo")
+        hll.estimate()
+        self.assertIsNone(hll.counters)
+        self.assertEqual(instrumentation.snapshot()["adds"], 0)
+
+    def test_counts_adds_changes_and_promotions(self):
+        hll = HyperLogLog(b=6)
+        for i in range(200):
+            hll.add(f"item{i}")
+        hll.add("item0")  # duplicate never changes a register
+        hll.add_many(["a", "b"])
+
+        stats = hll.stats()
+        self.assertEqual(stats["adds"], 203)
+        self.assertEqual(stats["promotions"], 1)
+        self.assertGreater(stats["register_changes"], 0)
+        self.assertLess(stats["register_changes"], 200)
+        self.assertEqual(instrumentation.snapshot()["adds"], 203)
+
+    def test_merges_by_mode_and_serialized_bytes(self):
+        dense = HyperLogLog(b=8, mode='dense')
+        sparse = HyperLogLog(b=8)
+        sparse.add("x")
+        dense.merge(sparse)
+        sparse.merge(HyperLogLog(b=8))
+
+        blob = dense.to_bytes()
+        HyperLogLog.from_bytes(blob)
+
+        snap = instrumentation.snapshot()
+        self.assertEqual(snap["merges"], 2)
+        self.assertEqual(snap["merges_by_mode"], {"dense+sparse": 1, "sparse+sparse": 1})
+        self.assertEqual(snap["bytes_serialized"], len(blob))
+        self.assertEqual(snap["bytes_deserialized"], len(blob))
+        self.assertTrue(snap["enabled"])
+
+    def test_timing_hooks(self):
+        hll = HyperLogLog(b=10)
+        for i in range(300):
+            hll.add(f"item{i}")
+        hll.estimate()
+        hll.merge(HyperLogLog(b=10, mode='dense'))
+        HyperLogLog.from_bytes(hll.to_bytes())
+        HyperLogLog.union([hll, HyperLogLog(b=10)])
+
+        names = {event for event, _ in self.events}
+        for expected in ("estimate", "bias_estimate", "merge", "union", "convert_to_dense",
+                         "to_bytes", "from_bytes"):
+            self.assertIn(expected, names)
+        self.assertTrue(all(isinstance(ns, int) and ns >= 0 for _, ns in self.events))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
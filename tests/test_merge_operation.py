@@ -68,5 +68,57 @@ class TestMergeOperations(unittest.TestCase):
         self.assertEqual(hll1.impl.registers, expected)
         self.assertGreaterEqual(hll1.estimate(), max(card1_pre, card2_pre))
 
+
+class TestUnion(unittest.TestCase):
+    def _sketch(self, mode, start, count, b=10):
+        hll = HyperLogLog(b=b, mode=mode)
+        hll.add_many(range(start, start + count))
+        return hll
+
+    def _chained(self, sketches):
+        result = HyperLogLog(b=sketches[0].b, mode=sketches[0].mode)
+        for hll in sketches:
+            result.merge(hll, auto_reduce=True)
+        return result
+
+    def test_matches_chained_merges(self):
+        mixes = [('sparse',) * 8, ('explicit', 'sparse', 'explicit'), ('sparse', 'dense', 'sparse'),
+                 ('dense4', 'sparse', 'explicit'), ('dense', 'dense')]
+        for modes in mixes:
+            with self.subTest(modes=modes):
+                sketches = [self._sketch(mode, 37 * i, 60) for i, mode in enumerate(modes)]
+                union = HyperLogLog.union(sketches)
+                chained = self._chained(sketches)
+                self.assertEqual(union._register_image().tolist(), chained._register_image().tolist())
+                self.assertEqual(union.estimate(), chained.estimate())
+
+    def test_result_mode(self):
+        small = [self._sketch('sparse', 100 * i, 20) for i in range(10)]
+        self.assertEqual(HyperLogLog.union(small).mode, 'sparse')
+        many = [self._sketch('sparse', 100 * i, 100) for i in range(40)]  # 4000 items > m // 4 registers
+        self.assertEqual(HyperLogLog.union(many).mode, 'dense')
+        explicit = [self._sketch('explicit', 10 * i, 10) for i in range(3)]
+        union = HyperLogLog.union(explicit)
+        self.assertEqual(union.mode, 'explicit')
+        self.assertEqual(union.estimate(), 30)
+        self.assertEqual(HyperLogLog.union([self._sketch('dense', 0, 5), *small]).mode, 'dense')
+
+    def test_inputs_are_unchanged(self):
+        sketches = [self._sketch('sparse', 100 * i, 50) for i in range(5)]
+        before = [hll.to_bytes() for hll in sketches]
+        HyperLogLog.union(sketches)
+        self.assertEqual([hll.to_bytes() for hll in sketches], before)
+
+    def test_precision(self):
+        high, low = self._sketch('sparse', 0, 500, b=12), self._sketch('sparse', 300, 500, b=10)
+        with self.assertRaises(ValueError):
+            HyperLogLog.union([high, low])
+        union = HyperLogLog.union([high, low], auto_reduce=True)
+        self.assertEqual(union.b, 10)
+        self.assertEqual(union._register_image().tolist(), self._chained([low, high])._register_image().tolist())
+        with self.assertRaises(ValueError):
+            HyperLogLog.union([])
+
+
 if __name__ == "__main__":
-    unittest.main(verbosity=2)
\ No newline at end of file
+    unittest.main(verbosity=2)
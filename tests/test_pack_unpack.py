@@ -1,7 +1,9 @@
 import unittest
 import random
 from typing import List
-from hyperloglog.compression import unpack_registers, pack_registers
+from hyperloglog.compression import (
+    unpack_registers, pack_registers, pack_dense_registers, unpack_dense_registers,
+)
 
 
 class TestRegisterPacking(unittest.TestCase):
@@ -222,6 +224,30 @@ class TestRegisterPacking(unittest.TestCase):
                 unpacked = unpack_registers(packed, register_count, binbits)
                 self.assertEqual(unpacked, registers)
 
+    def test_dense_fast_path_matches_generic(self):
+        """The vectorized 6-bit path must be byte-identical to pack_registers."""
+        random.seed(7)
+        for count in (1, 3, 4, 5, 16, 1000, 4097):
+            with self.subTest(count=count):
+                registers = [random.randint(0, 63) for _ in range(count)]
+                packed = pack_dense_registers(registers)
+                self.assertEqual(packed, pack_registers(registers, 6))
+                self.assertEqual(unpack_dense_registers(packed, count), registers)
+                self.assertEqual(unpack_registers(packed, count, 6), registers)
+
+    def test_dense_fast_path_large_precision(self):
+        """b=18 exceeds the generic size guard but packs fine on the fast path."""
+        registers = [i % 64 for i in range(1 << 18)]
+        packed = pack_dense_registers(registers)
+        self.assertEqual(len(packed), (1 << 18) * 6 // 8)
+        self.assertEqual(unpack_dense_registers(packed, 1 << 18), registers)
+
+    def test_dense_fast_path_errors(self):
+        with self.assertRaises(ValueError):
+            pack_dense_registers([64])
+        with self.assertRaisesRegex(ValueError, "Insufficient data: need 3 bytes, got 2"):
+            unpack_dense_registers(b'\x00\x00', 4)
+
 
 if __name__ == '__main__':
     # Run with verbose output
@@ -0,0 +1,65 @@
+import pickle
+import unittest
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.dense import DenseHyperLogLog
+from hyperloglog.sparse import SparseHyperLogLog
+
+
+def _sketch(mode, items, **kwargs):
+    hll = HyperLogLog(b=12, mode=mode, **kwargs)
+    hll.add_many(range(items))
+    return hll
+
+
+class TestPickle(unittest.TestCase):
+    def test_round_trip_all_modes_and_protocols(self):
+        for mode, items in (("explicit", 20), ("sparse", 300), ("dense", 20000), ("dense4", 20000)):
+            hll = _sketch(mode, items)
+            for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+                with self.subTest(mode=mode, protocol=protocol):
+                    copy = pickle.loads(pickle.dumps(hll, protocol=protocol))
+                    self.assertEqual(copy.mode, hll.mode)
+                    self.assertEqual(copy.to_bytes(), hll.to_bytes())
+
+    def test_compact_form_is_smaller_than_registers(self):
+        dense = _sketch("dense", 20000)
+        self.assertLessEqual(len(pickle.dumps(dense, protocol=5)), (1 << 12) * 6 // 8 + 200)
+
+    def test_out_of_band_buffers(self):
+        for mode, items in (("sparse", 300), ("dense", 20000)):
+            with self.subTest(mode=mode):
+                hll = _sketch(mode, items)
+                buffers = []
+                data = pickle.dumps(hll, protocol=5, buffer_callback=buffers.append)
+                self.assertEqual(len(buffers), 1)
+                self.assertLess(len(data), 200)
+                copy = pickle.loads(data, buffers=buffers)
+                self.assertEqual(copy.to_bytes(), hll.to_bytes())
+
+    def test_buffered_sketch_keeps_buffer(self):
+        hll = HyperLogLog(b=12, buffer_size=64)
+        hll.add_many(range(10))  # still pending in the buffer
+        copy = pickle.loads(pickle.dumps(hll, protocol=5))
+        self.assertEqual(copy.to_bytes(), _sketch("sparse", 10).to_bytes())
+        copy.add("more")
+        self.assertEqual(copy._buffered, 1)
+
+    def test_unpickled_sketch_keeps_promoting(self):
+        copy = pickle.loads(pickle.dumps(_sketch("sparse", 100)))
+        copy.add_many(range(100, 20000))
+        self.assertEqual(copy.mode, "dense")
+        self.assertEqual(copy.to_bytes(), _sketch("sparse", 20000).to_bytes())
+
+    def test_impl_round_trip(self):
+        sparse = SparseHyperLogLog(12, sparse_threshold=50)
+        sparse.add("a")
+        copy = pickle.loads(pickle.dumps(sparse))
+        self.assertEqual((copy.registers, copy.sparse_threshold), (sparse.registers, 50))
+        dense = DenseHyperLogLog(12)
+        dense.add("a")
+        self.assertEqual(pickle.loads(pickle.dumps(dense)).registers, dense.registers)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
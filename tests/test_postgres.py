@@ -0,0 +1,147 @@
+import csv
+import os
+import struct
+import unittest
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.hash_utils import murmurhash64a
+from hyperloglog import postgres
+
+VECTORS = os.path.join(os.path.dirname(__file__), "data", "postgresql_hll")
+# Parameters the published vectors were generated with (see data/postgresql_hll/README.txt)
+VECTOR_PARAMS = dict(expthresh=128, max_sparse=512)
+
+
+def _vector_rows(name):
+    with open(os.path.join(VECTORS, name), newline="") as f:
+        return list(csv.reader(f))[1:]
+
+
+def _blob(text):
+    return bytes.fromhex(text[2:])  # "\x..." as printed by psql
+
+
+class TestPostgresHll(unittest.TestCase):
+    def test_empty_vector(self):
+        hll = HyperLogLog.from_postgres_hll(bytes.fromhex("118b7f"))
+        self.assertEqual(hll.b, 11)
+        self.assertEqual(hll.estimate(), 0.0)
+        self.assertEqual(HyperLogLog(b=11, placement='postgres').to_postgres_hll(), bytes.fromhex("118b7f"))
+
+    def test_explicit_vector_matches_mmh3(self):
+        # hll_hash_integer(1) hashes the 4-byte little-endian int with MurmurHash3 x64-128
+        vector = bytes.fromhex("128b7f8895a3f5af28cafe")
+        self.assertEqual(murmurhash64a(struct.pack("<i", 1)), 0x8895a3f5af28cafe)
+
+        hll = HyperLogLog.from_postgres_hll(vector)
+
+        self.assertEqual(hll.mode, 'explicit')
+        self.assertEqual(hll.estimate(), 1.0)
+        self.assertEqual(hll.to_postgres_hll(), vector)
+
+    def test_explicit_sorted_as_signed(self):
+        hll = HyperLogLog(b=11, mode='explicit')
+        hll.add_many(["a", "b", "c", "d"])
+        parsed = postgres.decode(hll.to_postgres_hll())
+        signed = parsed["hashes"].view("int64").tolist()
+        self.assertEqual(signed, sorted(signed))
+
+    def test_sparse_bit_layout(self):
+        # register 1 = 1 at log2m=11, regwidth=5: one 16-bit chunk 1 << 5 | 1, MSB-first
+        hll = HyperLogLog.from_postgres_hll(bytes.fromhex("138b7f0021"))
+        self.assertEqual(hll.impl.registers, {1: 1})
+        self.assertEqual(hll.to_postgres_hll(), bytes.fromhex("138b7f0021"))
+
+    def test_full_bit_layout(self):
+        hll = HyperLogLog(b=4, mode='dense', placement='postgres')
+        hll.impl.registers[0] = 31
+        hll.impl.registers[15] = 40  # clamped to 2**5 - 1
+        for idx in range(1, 15):
+            hll.impl.registers[idx] = 1
+        blob = hll.to_postgres_hll()
+        self.assertEqual(blob[:3], bytes([0x14, 0x84, 0x7f]))
+        self.assertEqual(blob[3:], bytes.fromhex("f8") + bytes.fromhex("4210842108421084") + bytes.fromhex("3f"))
+
+    def test_register_roundtrip(self):
+        for n in (100, 5000):
+            hll = HyperLogLog(b=11, placement='postgres')
+            hll.add_many(range(n))
+            restored = HyperLogLog.from_postgres_hll(hll.to_postgres_hll())
+            self.assertEqual(restored.mode, hll.mode)
+            self.assertEqual(restored.estimate(), hll.estimate())
+
+    def test_published_cumulative_add_vectors(self):
+        for name, mode, first in (("cumulative_add_comprehensive_promotion.csv", 'explicit', 0),
+                                  ("cumulative_add_sparse_step.csv", 'sparse', 1),
+                                  ("cumulative_add_sparse_edge.csv", 'sparse', 1)):
+            hll = HyperLogLog(b=11, mode=mode, placement='postgres')
+            checked = 0
+            for i, (_, raw, multiset) in enumerate(_vector_rows(name)):
+                if i:
+                    hll.add_hashes(np.array([int(raw)], dtype=np.int64).view(np.uint64))
+                if multiset and i >= first:  # the sparse files start from an empty SPARSE, not EMPTY
+                    with self.subTest(name=name, row=i):
+                        self.assertEqual(hll.to_postgres_hll(**VECTOR_PARAMS), _blob(multiset))
+                    checked += 1
+            self.assertGreater(checked, 8)
+
+    def test_published_cumulative_union_vectors(self):
+        union = HyperLogLog.from_postgres_hll(bytes.fromhex("118b48"))
+        for i, (_, multiset, _, expected) in enumerate(_vector_rows("cumulative_union_explicit_promotion.csv")):
+            union.merge(HyperLogLog.from_postgres_hll(_blob(multiset)))
+            if expected:
+                with self.subTest(row=i):
+                    self.assertEqual(union.to_postgres_hll(**VECTOR_PARAMS), _blob(expected))
+
+    def test_items_land_in_the_extensions_registers(self):
+        items = [f"user-{i}" for i in range(3000)]
+        hll = HyperLogLog(b=11, placement='postgres')
+        hll.add_many(items)
+        parsed = postgres.decode(hll.to_postgres_hll())
+        expected = {}
+        for item in items:
+            raw = murmurhash64a(item)
+            rest = raw >> 11
+            if rest:
+                idx, value = raw & 2047, min((rest & -rest).bit_length(), 31)
+                expected[idx] = max(expected.get(idx, 0), value)
+        self.assertEqual(dict(zip(parsed["indices"].tolist(), parsed["values"].tolist())), expected)
+
+        # A native sketch exports while explicit, with its hashes placed the extension's way
+        native = HyperLogLog(b=11, mode='explicit', explicit_budget=8 * 3000)
+        native.add_many(items)
+        self.assertEqual(native.to_postgres_hll(), hll.to_postgres_hll())
+
+    def test_mixed_placements_are_rejected(self):
+        native = HyperLogLog(b=11)
+        native.add_many(range(1000))
+        from_db = HyperLogLog.from_postgres_hll(bytes.fromhex("138b7f0021"))
+        with self.assertRaises(ValueError):
+            native.to_postgres_hll()
+        with self.assertRaises(ValueError):
+            from_db.merge(native)
+        with self.assertRaises(ValueError):
+            HyperLogLog.union([native, from_db])
+        restored = HyperLogLog.from_bytes(from_db.to_bytes())
+        self.assertEqual(restored.placement, 'postgres')
+        self.assertEqual(restored.to_postgres_hll(), from_db.to_postgres_hll())
+
+    def test_header_parameters(self):
+        blob = HyperLogLog(b=14, mode='explicit').to_postgres_hll(regwidth=6, expthresh=256, sparseon=False)
+        parsed = postgres.decode(blob)
+        self.assertEqual((parsed["log2m"], parsed["regwidth"], parsed["expthresh"], parsed["sparseon"]),
+                         (14, 6, 256, False))
+
+    def test_invalid_blobs(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_postgres_hll(bytes.fromhex("218b7f"))  # schema version 2
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_postgres_hll(bytes.fromhex("128b7f0102"))  # truncated hash
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_postgres_hll(bytes.fromhex("11837f"))  # log2m 3
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.query import UnionQueryEngine
+
+DAYS, REGIONS = range(10), ("eu", "us", "ap")
+
+
+def _sketch(day, region, b=10):
+    hll = HyperLogLog(b=b)
+    hll.add_many(f"{region}-{day}-{i}" for i in range(day * 37, day * 37 + 200))
+    return hll
+
+
+class TestUnionQueryEngine(unittest.TestCase):
+    def setUp(self):
+        self.sketches = {(d, r): _sketch(d, r) for d in DAYS for r in REGIONS}
+        self.blobs = {key: hll.to_bytes() for key, hll in self.sketches.items()}
+        self.loads = []
+
+    def loader(self, key):
+        self.loads.append(key)
+        return self.blobs.get(key)
+
+    def merged(self, keys):
+        result = HyperLogLog(b=10)
+        for key in keys:
+            result.merge(self.sketches[key])
+        return result
+
+    def test_matches_merge(self):
+        engine = UnionQueryEngine(self.loader, b=10)
+        keys = [(d, r) for d in range(3, 8) for r in ("eu", "us")]
+        union = engine.union(keys)
+        self.assertEqual(union._register_image().tolist(), self.merged(keys)._register_image().tolist())
+        self.assertEqual(engine.estimate(keys), self.merged(keys).estimate())
+
+    def test_overlapping_queries_reuse_cache(self):
+        engine = UnionQueryEngine(self.loader, b=10, group_by=lambda key: key[1])
+        first = [(d, r) for d in range(7) for r in REGIONS]
+        engine.registers(first)
+        self.assertEqual(len(self.loads), len(first))
+        second = [(d, r) for d in range(7) for r in ("eu", "ap")]
+        result = engine.registers(second)
+        self.assertEqual(len(self.loads), len(first))  # answered from the two regional partials
+        self.assertEqual(engine.stats()["partial_hits"], 2)
+        self.assertEqual(result.tolist(), self.merged(second)._register_image().tolist())
+        engine.registers(second)
+        self.assertEqual(engine.stats()["query_hits"], 1)
+
+    def test_subset_cover_without_groups(self):
+        engine = UnionQueryEngine(self.loader, b=10)
+        week = [(d, "eu") for d in range(7)]
+        engine.registers(week)
+        loads = len(self.loads)
+        longer = week + [(7, "eu"), (8, "eu")]
+        result = engine.registers(longer)
+        self.assertEqual(sorted(self.loads[loads:]), [(7, "eu"), (8, "eu")])
+        self.assertEqual(engine.stats()["sketch_hits"], 0)  # the week came from its cached union
+        self.assertEqual(result.tolist(), self.merged(longer)._register_image().tolist())
+
+    def test_byte_bound_and_eviction(self):
+        engine = UnionQueryEngine(self.loader, b=10, max_bytes=5 * 1024)
+        engine.registers([(d, "us") for d in DAYS])
+        stats = engine.stats()
+        self.assertLessEqual(stats["cached_bytes"], 5 * 1024)
+        self.assertGreater(stats["evictions"], 0)
+
+    def test_missing_keys_and_invalidate(self):
+        engine = UnionQueryEngine(self.loader, b=10)
+        self.assertEqual(engine.estimate([("nope", "eu")]), 0.0)
+        engine.registers([(0, "eu"), (1, "eu")])
+        engine.invalidate((0, "eu"))
+        self.assertEqual(engine.stats()["cached_entries"], 2)  # the nope union and (1, eu)
+
+    def test_missing_keys_are_loaded_once(self):
+        engine = UnionQueryEngine(self.loader, b=10)
+        engine.registers([(0, "eu"), ("nope", "eu")])
+        engine.registers([(1, "eu"), ("nope", "eu")])
+        self.assertEqual(self.loads.count(("nope", "eu")), 1)
+        self.assertEqual(engine.stats()["sketch_loads"], 3)
+        engine.invalidate(("nope", "eu"))
+        engine.registers([(1, "eu"), ("nope", "eu")])
+        self.assertEqual(self.loads.count(("nope", "eu")), 2)
+
+    def test_foreign_placement_is_rejected(self):
+        foreign = HyperLogLog(b=10, placement='postgres')
+        foreign.add_many(range(100))
+        for loaded in (foreign, foreign.to_bytes()):
+            with self.subTest(type=type(loaded).__name__):
+                engine = UnionQueryEngine(lambda key: loaded if key == "pg" else self.blobs[key], b=10)
+                with self.assertRaisesRegex(ValueError, "placement"):
+                    engine.registers([(0, "eu"), "pg"])
+
+    def test_precision(self):
+        engine = UnionQueryEngine(lambda key: _sketch(1, "eu", b=12), b=10)
+        np.testing.assert_array_equal(engine.registers(["x"]),
+                                      _sketch(1, "eu", b=12).reduce_precision(10)._register_image())
+        with self.assertRaises(ValueError):
+            UnionQueryEngine(lambda key: _sketch(1, "eu", b=8), b=10).registers(["x"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
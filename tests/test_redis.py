@@ -0,0 +1,122 @@
+import struct
+import unittest
+from hyperloglog.core import HyperLogLog
+from hyperloglog import redis
+
+EMPTY = b"HYLL\x01\x00\x00\x00" + bytes(8) + b"\x7f\xff"  # fresh PFADD key
+STALE = b"\x00" * 7 + b"\x80"
+
+# GET after PFADD of "event-0" .. "event-99" on Redis 6.2 (cardinality cache stale)
+PFADD_0_100 = bytes.fromhex(
+    "48594c4c010000000000000000000080406c804096804064802080436084098c844231803580208c4058801688416588"
+    "398c404e804050804075840884406c8840ee803f8840a18042178840e8800984413d80406b804087800380404e803d80"
+    "4070802284415c801b8c40e78442af84406e80419e84188014800480088040bf88058040a48040628040db8441df8433"
+    "8c40e98403801a8040a58c0d8c2c8040db8040949440da8001884097803f842a80427a80412d80407480423e8840b080"
+    "404588404a8834844138883c8040f6802e804099804056800d8840478040768041d380406e8002804057844088803580"
+    "412f8440ea8040798040d08441058840bb842090410b904052802580228038881f8042b684416e"
+)
+# GET after PFADD of "event-0" .. "event-149" and a PFCOUNT (cached cardinality 151)
+PFADD_0_150 = bytes.fromhex(
+    "48594c4c010000009700000000000000038c1f88404680409680406480208040408440d78c40758041ce84098c844048"
+    "8441198040cc803580208c4058801688416588398c404e8040458c098040758405880184406c8840ee803f8840a1803e"
+    "8440a5803a8040448440ae884054844092800984413d80406b804087800380404e803d80407080228440e7844073801b"
+    "8c40a9803c84428a802384406e8041418c405b8418801480048008802f80408e88058040a480405c880480406e84406b"
+    "841a80415a80406784338c409a84404d840380108008801d8040868c0d8c2c8040db80409494405a8036882e80168001"
+    "88406c8029802a8013842a8040ab8440bf80410c80412d8040748033800490417684406c981d8840b080404588404a88"
+    "348440f8803e883c8040f6802e8030844046841f804056800d88404780407680418e88404380404d801f800280405784"
+    "40548c0790298035802888409780406c8440ea804040843780408084404e8441058840bb842090158840f49040528025"
+    "80228038881f8042b4900084416e"
+)
+
+
+class TestRedisHll(unittest.TestCase):
+    def test_empty_fixture(self):
+        hll = HyperLogLog.from_redis(EMPTY)
+        self.assertEqual(hll.b, 14)
+        self.assertEqual(hll.estimate(), 0.0)
+        self.assertEqual(HyperLogLog(placement='redis').to_redis(cache_cardinality=True), EMPTY)
+        self.assertEqual(HyperLogLog(placement='redis').to_redis()[8:16], STALE)
+
+    def test_sparse_opcodes_fixture(self):
+        # VAL(1) x1, ZERO x3, VAL(32) x4, XZERO for the rest
+        blob = b"HYLL\x01\x00\x00\x00" + STALE + bytes([0x80, 0x02, 0xFF]) + bytes([0x7F, 0xF7])
+        parsed = redis.decode(blob)
+        self.assertIsNone(parsed["cardinality"])
+        self.assertEqual(parsed["indices"].tolist(), [0, 4, 5, 6, 7])
+        self.assertEqual(parsed["values"].tolist(), [1, 32, 32, 32, 32])
+
+        hll = HyperLogLog.from_redis(blob)
+        self.assertEqual(hll.impl.registers, {0: 1, 4: 32, 5: 32, 6: 32, 7: 32})
+        self.assertEqual(hll.to_redis(), blob)
+
+    def test_dense_fixture(self):
+        # registers[0] = 1, registers[1] = 2: 6-bit fields, LSB-first
+        payload = bytearray(12288)
+        payload[0] = 0x81
+        blob = b"HYLL\x00\x00\x00\x00" + struct.pack("<Q", 2) + bytes(payload)
+        parsed = redis.decode(blob)
+        self.assertEqual(parsed["cardinality"], 2)
+        self.assertEqual(dict(zip(parsed["indices"].tolist(), parsed["values"].tolist())), {0: 1, 1: 2})
+        self.assertEqual(HyperLogLog.from_redis(blob).to_redis(encoding='dense')[16:], bytes(payload))
+
+    def test_roundtrip_both_encodings(self):
+        for n in (1000, 100000):
+            hll = HyperLogLog(placement='redis')
+            hll.add_many(range(n))
+            blob = hll.to_redis()
+            self.assertEqual(blob[4], redis.SPARSE if n == 1000 else redis.DENSE)
+            restored = HyperLogLog.from_redis(blob)
+            self.assertEqual(restored.estimate(), hll.estimate())
+
+    def test_large_values_force_dense(self):
+        hll = HyperLogLog(mode='dense', placement='redis')
+        hll.impl.registers[3] = 40
+        self.assertEqual(hll.to_redis()[4], redis.DENSE)
+        with self.assertRaises(ValueError):
+            hll.to_redis(encoding='sparse')
+
+    def test_redis_hash(self):
+        # MurmurHash64A with seed 0xadc83b19, as in Redis' hyperloglog.c
+        self.assertEqual(redis.redis_hash(""), 0xd8dfea6585bc9732)
+        self.assertEqual(redis.redis_hash("event-0"), 0x203f747dbf190c5d)
+        self.assertEqual(redis.redis_hash(b"abcdefghij"), 0xce00afbfdbd6efc4)
+
+    def test_placement_matches_pfadd(self):
+        hll = HyperLogLog(placement='redis')
+        hll.add_many(f"event-{i}" for i in range(100))
+        self.assertEqual(hll.to_redis(), PFADD_0_100)
+        single = HyperLogLog(placement='redis')
+        for i in range(100):
+            single.add(f"event-{i}")
+        self.assertEqual(single.to_redis(), PFADD_0_100)
+
+    def test_merge_with_pfadd_key_does_not_double_count(self):
+        merged = HyperLogLog.from_redis(PFADD_0_100)
+        local = HyperLogLog(placement='redis')
+        local.add_many(f"event-{i}" for i in range(50, 150))  # overlaps the Redis key by 50 events
+        merged.merge(local)
+        self.assertEqual(merged.to_redis()[16:], PFADD_0_150[16:])
+        self.assertEqual(redis.decode(PFADD_0_150)["cardinality"], 151)
+        self.assertAlmostEqual(merged.estimate(), 150, delta=3)
+
+    def test_placement_is_required(self):
+        native = HyperLogLog()
+        native.add_many(range(500))
+        with self.assertRaises(ValueError):
+            native.to_redis()
+        with self.assertRaises(ValueError):
+            native.merge(HyperLogLog.from_redis(PFADD_0_100))
+        with self.assertRaises(ValueError):
+            HyperLogLog(b=12, placement='redis')
+
+    def test_invalid_strings(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_redis(b"HYLX" + EMPTY[4:])
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_redis(EMPTY[:-1] + b"\xfe")  # one register short
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_redis(b"HYLL\x00\x00\x00\x00" + STALE + bytes(10))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
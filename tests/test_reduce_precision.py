@@ -0,0 +1,74 @@
+import unittest
+from hyperloglog.core import HyperLogLog
+
+
+class TestReducePrecision(unittest.TestCase):
+    def _filled(self, b, mode, n, start=0):
+        hll = HyperLogLog(b=b, mode=mode)
+        for i in range(start, start + n):
+            hll.add(f"item{i}")
+        return hll
+
+    def test_dense_reduction_matches_direct_build(self):
+        high = self._filled(14, 'dense', 5000)
+        low = self._filled(10, 'dense', 5000)
+
+        reduced = high.reduce_precision(10)
+
+        self.assertEqual(reduced.b, 10)
+        self.assertEqual(reduced.impl.registers, low.impl.registers)
+        self.assertEqual(len(high.impl.registers), 1 << 14)  # original untouched
+
+    def test_sparse_reduction_matches_direct_build(self):
+        high = self._filled(14, 'sparse', 200)
+        low = self._filled(12, 'sparse', 200)
+
+        reduced = high.reduce_precision(12)
+
+        self.assertEqual(reduced.mode, 'sparse')
+        self.assertEqual(reduced.impl.registers, low.impl.registers)
+
+    def test_sparse_reduction_promotes_past_threshold(self):
+        high = self._filled(12, 'sparse', 900)
+        self.assertEqual(high.mode, 'sparse')
+
+        reduced = high.reduce_precision(8)
+
+        self.assertEqual(reduced.mode, 'dense')
+        self.assertEqual(reduced.impl.registers, self._filled(8, 'dense', 900).impl.registers)
+
+    def test_invalid_target_precision(self):
+        hll = HyperLogLog(b=10)
+        with self.assertRaises(ValueError):
+            hll.reduce_precision(12)
+        with self.assertRaises(ValueError):
+            hll.reduce_precision(3)
+
+    def test_merge_requires_opt_in(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(b=14).merge(HyperLogLog(b=12))
+
+    def test_merge_auto_reduces_self(self):
+        hot = self._filled(14, 'dense', 3000)
+        cold = self._filled(12, 'dense', 3000, start=2000)
+
+        hot.merge(cold, auto_reduce=True)
+
+        expected = self._filled(12, 'dense', 5000)
+        self.assertEqual(hot.b, 12)
+        self.assertEqual(hot.impl.registers, expected.impl.registers)
+
+    def test_merge_auto_reduces_other(self):
+        cold = self._filled(12, 'sparse', 100)
+        hot = self._filled(16, 'sparse', 100, start=50)
+
+        cold.merge(hot, auto_reduce=True)
+
+        expected = self._filled(12, 'sparse', 150)
+        self.assertEqual(cold.b, 12)
+        self.assertEqual(hot.b, 16)
+        self.assertEqual(cold.impl.registers, expected.impl.registers)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.hash_utils import (RHO_MAX, index_and_rho, index_and_rho_scalar, murmurhash128,
+                                    murmurhash64a)
+
+
+class TestRhoKernel(unittest.TestCase):
+    def test_nonzero_suffix_is_clz_plus_one(self):
+        b = 14
+        for i in range(1000):
+            low, high = murmurhash128(str(i))
+            w = (low << b) & ((1 << 64) - 1)
+            idx, rho = index_and_rho_scalar(low, high, b)
+            self.assertEqual(idx, low >> (64 - b))
+            self.assertEqual(rho, 64 - w.bit_length() + 1)
+
+    def test_zero_suffix_continues_into_high_word(self):
+        b = 12
+        low = 0xABC << 52  # index 0xABC, all-zero suffix
+        self.assertEqual(index_and_rho_scalar(low, 1 << 63, b), (0xABC, 53))
+        self.assertEqual(index_and_rho_scalar(low, 1 << 60, b), (0xABC, 56))
+        self.assertEqual(index_and_rho_scalar(low, 0, b), (0xABC, RHO_MAX))
+
+    def test_vectorized_matches_scalar(self):
+        b = 12
+        pairs = [murmurhash128(str(i)) for i in range(2000)]
+        pairs += [(0xABC << 52, 1 << 63), (5 << 52, 1 << 40), (0, 0), (1, 0)]
+        lows = np.array([low for low, _ in pairs], dtype=np.uint64)
+        highs = np.array([high for _, high in pairs], dtype=np.uint64)
+        idx, rho = index_and_rho(lows, b, highs)
+        expected = [index_and_rho_scalar(low, high, b) for low, high in pairs]
+        self.assertEqual(list(zip(idx.tolist(), rho.tolist())), expected)
+
+    def test_empty_string_is_consistent_without_high_word(self):
+        # "" hashes to (0, 0): every path agrees on RHO_MAX in register 0
+        self.assertEqual(murmurhash64a(""), 0)
+        self.assertEqual(index_and_rho(np.zeros(1, dtype=np.uint64), 14)[1][0], RHO_MAX)
+        for mode in ("dense", "sparse", "dense4"):
+            hll = HyperLogLog(b=14, mode=mode)
+            hll.add("")
+            bulk = HyperLogLog(b=14, mode=mode)
+            bulk.add_hashes(np.zeros(1, dtype=np.uint64))
+            self.assertEqual(hll._register_arrays()[1].tolist(), [RHO_MAX])
+            self.assertEqual(bulk._register_arrays()[1].tolist(), [RHO_MAX])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
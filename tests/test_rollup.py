@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.rollup import ALL, At, Hierarchy, RollupCube
+
+# 4 days x 6 hours, 2 countries x 2 regions x 2 cities
+HOURS = [f"d{d}h{h}" for d in range(4) for h in range(6)]
+CITIES = [f"{c}{r}{i}" for c in "AB" for r in "xy" for i in "12"]
+TIME = Hierarchy("time", ["hour", "day", "week"], [lambda h: h.split("h")[0], lambda d: f"w{int(d[1:]) // 2}"])
+GEO = Hierarchy("geo", ["city", "region", "country"], [lambda c: c[:2], lambda r: r[:1]])
+
+
+def _leaf(hour, city, b=10):
+    hll = HyperLogLog(b=b)
+    hll.add_many(f"{city}-{i}" for i in range(HOURS.index(hour) * 5, HOURS.index(hour) * 5 + 40))
+    return hll
+
+
+class TestRollupCube(unittest.TestCase):
+    def setUp(self):
+        self.leaves = {(h, c): _leaf(h, c) for h in HOURS for c in CITIES}
+        self.cube = RollupCube([TIME, GEO], b=10).build(self.leaves, workers=2)
+
+    def expected(self, hours, cities):
+        result = HyperLogLog(b=10)
+        for h in hours:
+            for c in cities:
+                result.merge(self.leaves[(h, c)])
+        return result._register_image()
+
+    def test_materializes_every_cuboid(self):
+        self.assertEqual(len(self.cube.cells), 4 * 4)
+        self.assertEqual(set(self.cube.cells[(3, 3)]), {(ALL, ALL)})
+        np.testing.assert_array_equal(self.cube.cells[(3, 3)][(ALL, ALL)], self.expected(HOURS, CITIES))
+        np.testing.assert_array_equal(self.cube.cells[(1, 2)][("d2", "B")],
+                                      self.expected(HOURS[12:18], CITIES[4:]))
+
+    def test_cover_collapses_complete_groups(self):
+        # Days 0-2 for region Ax: week w0 (days 0, 1) plus day 2
+        cover = self.cube.cover({"time": HOURS[:18], "geo": At("region", ["Ax"])})
+        self.assertEqual(sorted(cover), [((1, 1), ("d2", "Ax")), ((2, 1), ("w0", "Ax"))])
+        self.assertEqual(self.cube.cover({}), [((3, 3), (ALL, ALL))])
+        hours, cities = HOURS[3:18], CITIES[:3]
+        np.testing.assert_array_equal(self.cube.registers({"time": hours, "geo": cities}),
+                                      self.expected(hours, cities))
+
+    def test_update_raises_only_ancestors(self):
+        extra = HyperLogLog(b=10)
+        extra.add_many(f"new-{i}" for i in range(300))
+        untouched = self.cube.cells[(1, 1)][("d0", "Ay")].copy()
+        self.cube.update(("d0h0", "Ax1"), extra)
+        self.leaves[("d0h0", "Ax1")].merge(extra)
+        np.testing.assert_array_equal(self.cube.cells[(1, 1)][("d0", "Ay")], untouched)
+        for selection, (hours, cities) in (({}, (HOURS, CITIES)),
+                                           ({"time": At("day", ["d0"])}, (HOURS[:6], CITIES))):
+            np.testing.assert_array_equal(self.cube.registers(selection), self.expected(hours, cities))
+
+    def test_new_leaf_values_join_the_hierarchy(self):
+        sketch = _leaf("d0h0", "Bx1")
+        self.cube.update(("d5h0", "Cz1"), sketch)
+        cover = self.cube.cover({"geo": At("country", ["C"])})
+        self.assertEqual(cover, [((3, 2), (ALL, "C"))])
+        np.testing.assert_array_equal(self.cube.registers({"geo": At("country", ["C"])}),
+                                      sketch._register_image())
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.cube.cover({"color": ["red"]})
+        with self.assertRaises(ValueError):
+            self.cube.cover({"time": At("month", ["m1"])})
+        with self.assertRaises(ValueError):
+            RollupCube([TIME, GEO], b=10).registers({})
+        with self.assertRaises(ValueError):
+            Hierarchy("bad", ["a", "b"], [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,8 +1,11 @@
 '''to run without moving the hyerloglog folder use command
 python -m unittest tests.test_serialization'''
+import io
+import struct
 import unittest
+import zlib
 from hyperloglog.core import HyperLogLog
-from hyperloglog.serialization import serialize_hll, deserialize_hll
+from hyperloglog.serialization import serialize_hll, deserialize_hll, dump, load, dumps_many, loads_many
 
 class TestSerialization(unittest.TestCase):
     def test_round_trip(self):
@@ -13,5 +16,91 @@ class TestSerialization(unittest.TestCase):
         hll2 = deserialize_hll(b64)
         self.assertAlmostEqual(hll.estimate(), hll2.estimate(), delta=1)
 
+    def test_zlib_encoding_dense(self):
+        hll = HyperLogLog(b=14, mode='dense')
+        for i in range(200000):
+            hll.add(f"item{i}")
+        packed = hll.to_bytes()
+        encoded = hll.to_bytes(encoding='zlib')
+
+        restored = HyperLogLog.from_bytes(encoded)
+        self.assertEqual(restored.mode, 'dense')
+        self.assertEqual(restored.impl.registers, hll.impl.registers)
+        self.assertLess(len(encoded), len(packed) * 0.55)
+
+    def test_zlib_encoding_other_modes(self):
+        for mode in ('sparse', 'dense4'):
+            with self.subTest(mode=mode):
+                hll = HyperLogLog(b=12, mode=mode)
+                for i in range(300):
+                    hll.add(f"item{i}")
+                restored = HyperLogLog.from_bytes(hll.to_bytes(encoding='zlib'))
+                self.assertEqual(restored.mode, mode)
+                self.assertEqual(restored.impl.registers, hll.impl.registers)
+
+    def test_zlib_bomb_is_rejected_without_inflating(self):
+        bomb = zlib.compress(bytes(64 << 20), 9)  # ~64 KB inflating to 64 MB
+        for mode_flag, payload in ((0x10, b"\x00" + bomb), (0x11, bomb), (0x12, bomb), (0x13, bomb)):
+            with self.subTest(mode_flag=mode_flag):
+                blob = b"HLL1" + bytes([10, mode_flag]) + struct.pack(">I", len(payload)) + payload
+                with self.assertRaisesRegex(ValueError, "inflates past"):
+                    HyperLogLog.from_bytes(blob)
+
+    def test_explicit_budget_cannot_raise_the_inflation_cap(self):
+        bomb = struct.pack(">I", 0xFFFFFFF8) + zlib.compress(bytes(64 << 20), 9)
+        blob = b"HLL1" + bytes([10, 0x93]) + struct.pack(">I", len(bomb)) + bomb
+        with self.assertRaisesRegex(ValueError, "budget"):
+            HyperLogLog.from_bytes(blob)
+        # The largest acceptable budget still bounds the output
+        bomb = struct.pack(">I", 8 << 18) + bomb[4:]
+        blob = b"HLL1" + bytes([10, 0x93]) + struct.pack(">I", len(bomb)) + bomb
+        with self.assertRaisesRegex(ValueError, "inflates past"):
+            HyperLogLog.from_bytes(blob)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(b=14).to_bytes(encoding='brotli')
+
+    def test_dump_load_file_objects(self):
+        sketches = []
+        for mode in ('sparse', 'dense', 'dense4'):
+            hll = HyperLogLog(b=10, mode=mode)
+            for i in range(500):
+                hll.add(f"{mode}{i}")
+            sketches.append(hll)
+
+        buf = io.BytesIO()
+        for hll in sketches:
+            dump(hll, buf)
+        buf.seek(0)
+
+        for hll in sketches:
+            restored = load(buf)
+            self.assertEqual(restored.mode, hll.mode)
+            self.assertEqual(restored.impl.registers, hll.impl.registers)
+        with self.assertRaises(EOFError):
+            load(buf)
+
+    def test_dumps_many_round_trip(self):
+        sketches = [HyperLogLog(b=12) for _ in range(20)]
+        for n, hll in enumerate(sketches):
+            for i in range(n * 10):
+                hll.add(f"k{n}-{i}")
+
+        restored = loads_many(dumps_many(sketches, encoding='zlib'))
+
+        self.assertEqual(len(restored), len(sketches))
+        for original, copy in zip(sketches, restored):
+            self.assertEqual(copy.impl.registers, original.impl.registers)
+
+    def test_loads_many_rejects_truncation(self):
+        data = dumps_many([HyperLogLog(b=12, mode='dense')])
+        with self.assertRaises(ValueError):
+            loads_many(data[:-1])
+        with self.assertRaises(ValueError):
+            loads_many(b"XXXX" + data[4:])
+        with self.assertRaises(ValueError):
+            loads_many(data + b"\x00")
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
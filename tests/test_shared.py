@@ -0,0 +1,64 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.columnar import column_hashes
+from hyperloglog.shared import SharedDenseHyperLogLog
+
+
+def _ingest(sketch, start, stop):
+    sketch.add_hashes(column_hashes(np.arange(start, stop)))
+    sketch.close()
+
+
+class TestSharedDenseHyperLogLog(unittest.TestCase):
+    def setUp(self):
+        self.sketch = SharedDenseHyperLogLog(b=12, stripes=16)
+        self.addCleanup(self.sketch.unlink)
+
+    def test_matches_dense_sketch(self):
+        reference = HyperLogLog(b=12, mode='dense')
+        for i in range(3000):
+            self.sketch.add(i)
+            reference.add(i)
+        self.sketch.add_hashes(column_hashes(np.arange(3000, 20000)))
+        reference.add_array(np.arange(3000, 20000))
+        self.assertEqual(self.sketch.registers.tolist(), reference.impl.registers)
+        self.assertEqual(self.sketch.estimate(), reference.estimate())
+        self.assertEqual(self.sketch.to_hyperloglog().to_bytes(), reference.to_bytes())
+
+    def test_concurrent_processes(self):
+        bounds = [(0, 25000), (15000, 40000), (40000, 60000), (0, 60000)]
+        workers = [multiprocessing.Process(target=_ingest, args=(self.sketch, *b)) for b in bounds]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        reference = HyperLogLog(b=12, mode='dense')
+        reference.add_array(np.arange(60000))
+        self.assertEqual(self.sketch.registers.tolist(), reference.impl.registers)
+
+    def test_spawned_process_attaches_by_name(self):
+        ctx = multiprocessing.get_context('spawn')
+        sketch = SharedDenseHyperLogLog(b=12, stripes=16, ctx=ctx)
+        self.addCleanup(sketch.unlink)
+        worker = ctx.Process(target=_ingest, args=(sketch, 0, 5000))
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        reference = HyperLogLog(b=12, mode='dense')
+        reference.add_array(np.arange(5000))
+        self.assertEqual(sketch.registers.tolist(), reference.impl.registers)
+
+    def test_invalid_stripes(self):
+        with self.assertRaises(ValueError):
+            SharedDenseHyperLogLog(b=12, stripes=3)
+        with self.assertRaises(ValueError):
+            SharedDenseHyperLogLog(b=4, stripes=32)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,131 @@
+import pickle
+import queue
+import threading
+import unittest
+
+from hyperloglog import instrumentation
+from hyperloglog.core import HyperLogLog, HyperLogLogSnapshot
+
+MODES = ('explicit', 'sparse', 'dense', 'dense4')
+
+
+class TestCachedEstimate(unittest.TestCase):
+    def assertFresh(self, hll):
+        # The cached value must equal a recomputation from the registers
+        if hll.mode != 'explicit':
+            self.assertEqual(hll.estimate(), hll.impl._estimate())
+
+    def test_cache_survives_adds_that_raise_nothing(self):
+        for mode in ('sparse', 'dense', 'dense4'):
+            with self.subTest(mode=mode):
+                hll = HyperLogLog(b=10, mode=mode)
+                hll.add_many(range(500))
+                first = hll.estimate()
+                cached = hll.impl.cached_estimate
+                hll.add_many(range(500))  # duplicates
+                hll.add_hashes(hll._register_arrays()[0][:0])
+                self.assertIs(hll.impl.cached_estimate, cached)
+                self.assertEqual(hll.estimate(), first)
+
+    def test_every_write_path_invalidates(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                hll = HyperLogLog(b=10, mode=mode)
+                hll.add("a")
+                self.assertFresh(hll)
+                hll.add_many(range(100))
+                self.assertFresh(hll)
+                hll.add_array([f"x{i}" for i in range(100)])
+                self.assertFresh(hll)
+                for other_mode in MODES:
+                    other = HyperLogLog(b=10, mode=other_mode)
+                    other.add_many(range(1000 * len(other_mode), 1000 * len(other_mode) + 400))
+                    hll.merge(other)
+                    self.assertFresh(hll)
+                source = HyperLogLog(b=10)
+                source.add_many(range(20000, 23000))
+                hll.apply_delta(source.to_delta_bytes())
+                self.assertFresh(hll)
+
+    def test_buffered_estimates_see_pending_hashes(self):
+        hll = HyperLogLog(b=10, mode='dense', buffer_size=64)
+        hll.add_many(range(10))
+        low = hll.estimate()
+        hll.add_many(range(10, 1000))
+        self.assertGreater(hll.estimate(), low)
+        self.assertFresh(hll)
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_snapshot_keeps_its_registers(self):
+        for mode in MODES:
+            for buffer_size in (0, 32):
+                with self.subTest(mode=mode, buffer_size=buffer_size):
+                    hll = HyperLogLog(b=10, mode=mode, buffer_size=buffer_size)
+                    hll.add_many(range(200))
+                    blob = hll.to_bytes()
+                    snap = hll.snapshot()
+                    expected = hll._register_image().tolist()
+                    self.assertIs(snap.impl, hll.impl)  # nothing copied yet
+                    hll.add_many(range(200, 5000))  # promotes sparse and explicit
+                    other = HyperLogLog(b=10)
+                    other.add("merged")
+                    hll.merge(other)
+                    self.assertEqual(snap._register_image().tolist(), expected)
+                    self.assertEqual(snap.to_bytes(), blob)
+                    self.assertGreater(hll.estimate(), snap.estimate())
+
+    def test_snapshot_is_read_only(self):
+        snap = HyperLogLog(b=10).snapshot()
+        self.assertIsInstance(snap, HyperLogLogSnapshot)
+        for call in (lambda: snap.add(1), lambda: snap.add_many([1]), lambda: snap.merge(HyperLogLog(b=10)),
+                     lambda: snap.to_delta_bytes(), lambda: snap.convert_to_dense()):
+            with self.assertRaises(TypeError):
+                call()
+
+    def test_snapshot_reads_like_a_sketch(self):
+        hll = HyperLogLog(b=10)
+        hll.add_many(range(300))
+        snap = hll.snapshot()
+        copy = pickle.loads(pickle.dumps(snap))
+        self.assertIs(type(copy), HyperLogLog)
+        copy.add("writable again")
+        target = HyperLogLog(b=10)
+        target.merge(snap)
+        self.assertEqual(target.estimate(), snap.estimate())
+        self.assertEqual(snap.reduce_precision(8).estimate(), hll.reduce_precision(8).estimate())
+
+    def test_reader_thread_while_writing(self):
+        hll = HyperLogLog(b=12, mode='dense')
+        handoff, estimates = queue.Queue(), []
+
+        def reader():
+            for snap, expected in iter(handoff.get, None):
+                estimates.append((snap.estimate(), expected))
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for start in range(0, 50000, 5000):
+            hll.add_many(range(start, start + 5000))
+            handoff.put((hll.snapshot(), hll.impl._estimate()))
+        handoff.put(None)
+        thread.join()
+        self.assertEqual(len(estimates), 10)
+        for got, expected in estimates:
+            self.assertEqual(got, expected)
+
+    def test_instrumented_writer_keeps_its_counters(self):
+        instrumentation.enable()
+        try:
+            hll = HyperLogLog(b=10, mode='dense')
+            hll.add("a")
+            snap = hll.snapshot()
+            snap.estimate()
+            hll.add("b")
+            self.assertIs(hll.impl.counters, hll.counters)
+            self.assertEqual(hll.stats()["adds"], 2)
+        finally:
+            instrumentation.disable()
+
+if __name__ == '__main__':
+    unittest.main()
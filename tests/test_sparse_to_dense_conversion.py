@@ -31,5 +31,30 @@ class TestSparseToDenseConversion(unittest.TestCase):
         # After merge, it should have converted to dense
         self.assertEqual(hll1.mode, 'dense')
 
+    def test_conversion_preserves_registers(self):
+        entries = {0: 3, 5: 1, 17: 9, self.m - 1: 2}
+        hll = self.make_sparse(entries)
+
+        hll.convert_to_dense()
+
+        expected = [0] * self.m
+        for idx, rho in entries.items():
+            expected[idx] = rho
+        self.assertEqual(hll.mode, 'dense')
+        self.assertEqual(hll.impl.registers, expected)
+
+    def test_conversion_at_max_precision(self):
+        # b=18 used to overflow the pack/unpack round-trip during promotion
+        hll = HyperLogLog(b=18, mode='sparse')
+        for i in range(100):
+            hll.add(f"item{i}")
+        before = hll.estimate()
+
+        hll.convert_to_dense()
+
+        self.assertEqual(hll.mode, 'dense')
+        self.assertEqual(len(hll.impl.registers), 1 << 18)
+        self.assertAlmostEqual(hll.estimate(), before, delta=1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import sqlite3
+import unittest
+from hyperloglog.core import HyperLogLog
+from hyperloglog import sqlite
+
+
+class TestSqliteFunctions(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        sqlite.register(self.conn, b=12)
+        self.conn.execute("CREATE TABLE events (country TEXT, user_id INTEGER)")
+        rows = [("de" if i % 3 else "fr", i % 500) for i in range(3000)]
+        rows.append(("de", None))
+        self.conn.executemany("INSERT INTO events VALUES (?, ?)", rows)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_group_by_matches_python(self):
+        result = dict(self.conn.execute(
+            "SELECT country, hll_cardinality(hll_add(user_id)) FROM events GROUP BY country"))
+        for country in ("de", "fr"):
+            expected = HyperLogLog(b=12)
+            expected.add_many(u for c, u in self.conn.execute("SELECT country, user_id FROM events")
+                              if c == country and u is not None)
+            self.assertEqual(result[country], expected.estimate())
+
+    def test_blobs_are_to_bytes_format(self):
+        (blob,) = self.conn.execute("SELECT hll_add(user_id) FROM events").fetchone()
+        hll = HyperLogLog.from_bytes(blob)
+        self.assertEqual(hll.b, 12)
+        self.assertAlmostEqual(hll.estimate(), 500, delta=25)
+
+    def test_union_of_stored_sketches(self):
+        self.conn.execute("CREATE TABLE daily AS SELECT country, hll_add(user_id) AS users FROM events GROUP BY country")
+        (union,) = self.conn.execute("SELECT hll_cardinality(hll_union(users)) FROM daily").fetchone()
+        (direct,) = self.conn.execute("SELECT hll_cardinality(hll_add(user_id)) FROM events").fetchone()
+        self.assertEqual(union, direct)
+
+    def test_nulls_and_empty_input(self):
+        # Like SUM(), the aggregates are NULL over no rows
+        (empty,) = self.conn.execute("SELECT hll_cardinality(hll_add(user_id)) FROM events WHERE 0").fetchone()
+        self.assertIsNone(empty)
+        self.assertIsNone(self.conn.execute("SELECT hll_cardinality(NULL)").fetchone()[0])
+
+    def test_all_null_arguments(self):
+        # ... and over rows whose argument is always NULL
+        self.assertIsNone(self.conn.execute(
+            "SELECT hll_add(user_id) FROM events WHERE user_id IS NULL").fetchone()[0])
+        self.assertIsNone(self.conn.execute("SELECT hll_union(NULL)").fetchone()[0])
+        self.assertIsNone(self.conn.execute(
+            "SELECT hll_union(users) FROM (SELECT hll_add(user_id) AS users FROM events"
+            " WHERE user_id IS NULL)").fetchone()[0])
+        (total,) = self.conn.execute("SELECT SUM(user_id) FROM events WHERE user_id IS NULL").fetchone()
+        self.assertIsNone(total)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from hyperloglog.core import HyperLogLog
+from hyperloglog.store import SketchStore, read_records
+
+
+class TestSketchStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = tmp.name
+
+    def expected(self, items, b=10):
+        hll = HyperLogLog(b=b)
+        hll.add_many(items)
+        return hll
+
+    def assertSameRegisters(self, a, b):
+        self.assertEqual(a._register_image().tolist(), b._register_image().tolist())
+
+    def test_recovers_checkpointed_state(self):
+        with SketchStore(self.path, b=10) as store:
+            for start in range(0, 3000, 500):
+                store.add_many("a", range(start, start + 500))
+                store.add("b", start)
+                store.checkpoint()
+        store = SketchStore(self.path, b=10)
+        self.addCleanup(store.close)
+        self.assertEqual(sorted(store.keys()), ["a", "b"])
+        self.assertSameRegisters(store.get("a"), self.expected(range(3000)))
+        self.assertSameRegisters(store.get("b"), self.expected(range(0, 3000, 500)))
+
+    def test_uncheckpointed_adds_are_lost_but_nothing_else(self):
+        store = SketchStore(self.path, b=10)
+        store.add_many("a", range(100))
+        store.checkpoint()
+        store.add_many("a", range(100, 200))
+        store._active.close()  # simulate a crash: no final checkpoint
+        recovered = SketchStore(self.path, b=10)
+        self.addCleanup(recovered.close)
+        self.assertSameRegisters(recovered.get("a"), self.expected(range(100)))
+
+    def test_torn_tail_is_ignored_and_truncated(self):
+        store = SketchStore(self.path, b=10)
+        store.add_many("a", range(100))
+        store.checkpoint()
+        store.add_many("a", range(100, 200))
+        store.checkpoint()
+        segment = store._active.name
+        store._active.close()
+        with open(segment, "r+b") as f:
+            f.truncate(os.path.getsize(segment) - 3)
+        recovered = SketchStore(self.path, b=10)
+        self.addCleanup(recovered.close)
+        self.assertSameRegisters(recovered.get("a"), self.expected(range(100)))
+        self.assertEqual(read_records(segment)[1], os.path.getsize(segment))
+
+    def test_corrupt_record_ends_replay(self):
+        store = SketchStore(self.path, b=10)
+        store.add_many("a", range(100))
+        store.checkpoint()
+        segment = store._active.name
+        store._active.close()
+        with open(segment, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\xff")
+        self.assertEqual(read_records(segment)[0], [])
+
+    def test_corrupt_record_in_a_sealed_segment_raises(self):
+        with SketchStore(self.path, b=10, compact_bytes=None) as store:
+            store.add_many("a", range(100))
+            store.add_many("b", range(100))
+            sealed = store._active.name
+        with SketchStore(self.path, b=10, compact_bytes=None) as store:  # starts a new segment
+            store.add_many("a", range(100, 200))
+        # Bit rot in the first of two records, not a torn tail
+        with open(sealed, "r+b") as f:
+            f.seek(20)
+            byte = f.read(1)
+            f.seek(20)
+            f.write(bytes([byte[0] ^ 0xff]))
+        size = os.path.getsize(sealed)
+        with self.assertRaises(ValueError):
+            SketchStore(self.path, b=10)
+        self.assertEqual(os.path.getsize(sealed), size)
+
+    def test_compaction_refuses_a_corrupt_sealed_segment(self):
+        store = SketchStore(self.path, b=10, compact_bytes=None)
+        for key in ("a", "b", "c"):
+            store.add_many(key, range(100))
+        store.checkpoint()
+        segment = store._active.name
+        with open(segment, "r+b") as f:
+            f.seek(20)
+            byte = f.read(1)
+            f.seek(20)
+            f.write(bytes([byte[0] ^ 0xff]))
+        with self.assertRaises(RuntimeError):
+            store.compact()
+        store._active.close()
+        self.assertTrue(os.path.exists(segment))
+        self.assertFalse(any(n.endswith(".snap") for n in os.listdir(self.path)))
+
+    def test_new_segments_are_made_durable(self):
+        with mock.patch("hyperloglog.store._fsync_dir") as fsync_dir:
+            with SketchStore(self.path, b=10, compact_bytes=None) as store:
+                self.assertEqual(fsync_dir.call_count, 1)
+                store.add_many("a", range(100))
+                store.compact()
+            self.assertGreaterEqual(fsync_dir.call_count, 2)
+            fsync_dir.reset_mock()
+            with SketchStore(self.path, b=10, fsync=False):
+                fsync_dir.assert_not_called()
+
+    def test_compaction_replaces_history_with_a_snapshot(self):
+        with SketchStore(self.path, b=10, compact_bytes=None) as store:
+            for start in range(0, 5000, 250):
+                store.add_many("a", range(start, start + 250))
+                store.checkpoint()
+            store.compact()
+            store.add_many("a", range(5000, 5100))
+        names = sorted(os.listdir(self.path))
+        self.assertEqual(len([n for n in names if n.endswith(".snap")]), 1)
+        self.assertEqual(len([n for n in names if n.endswith(".seg")]), 1)
+        recovered = SketchStore(self.path, b=10)
+        self.addCleanup(recovered.close)
+        self.assertSameRegisters(recovered.get("a"), self.expected(range(5100)))
+
+    def test_automatic_background_compaction(self):
+        with SketchStore(self.path, b=10, compact_bytes=2000) as store:
+            for start in range(0, 20000, 1000):
+                store.add_many(f"k{start % 3}", range(start, start + 1000))
+                store.checkpoint()
+        self.assertTrue(any(n.endswith(".snap") for n in os.listdir(self.path)))
+        recovered = SketchStore(self.path, b=10)
+        self.addCleanup(recovered.close)
+        for k in range(3):
+            items = [i for s in range(0, 20000, 1000) if s % 3 == k for i in range(s, s + 1000)]
+            self.assertSameRegisters(recovered.get(f"k{k}"), self.expected(items))
+
+    def test_leftovers_of_an_interrupted_compaction(self):
+        with SketchStore(self.path, b=10, compact_bytes=None) as store:
+            store.add_many("a", range(300))
+            store.checkpoint()
+            sealed = store._active.name
+            with open(sealed, "rb") as f:
+                old_segment = f.read()
+            store.compact()
+        # Crash before the sealed segment was deleted, plus a half-written snapshot
+        with open(sealed, "wb") as f:
+            f.write(old_segment)
+        with open(os.path.join(self.path, "00000099.snap.tmp"), "wb") as f:
+            f.write(b"HLG1\x00")
+        recovered = SketchStore(self.path, b=10)
+        self.addCleanup(recovered.close)
+        self.assertSameRegisters(recovered.get("a"), self.expected(range(300)))
+        self.assertFalse(os.path.exists(sealed))
+        self.assertFalse(any(n.endswith(".tmp") for n in os.listdir(self.path)))
+
+    def test_merged_down_precision_survives_replay(self):
+        with SketchStore(self.path, b=12) as store:
+            store.add_many("a", range(200))
+            store.checkpoint()
+            store.merge("a", self.expected(range(200, 400), b=10))
+        recovered = SketchStore(self.path, b=12)
+        self.addCleanup(recovered.close)
+        self.assertEqual(recovered.get("a").b, 10)
+        self.assertSameRegisters(recovered.get("a"), self.expected(range(400)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
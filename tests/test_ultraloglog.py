@@ -0,0 +1,135 @@
+import io
+import struct
+import unittest
+import zlib
+
+import numpy as np
+
+from hyperloglog import HyperLogLog, UltraLogLog
+from hyperloglog.hash_utils import murmurhash64a
+from hyperloglog.serialization import dump, load, dumps_many, loads_many, serialize_hll, deserialize_hll
+
+
+def _u(ull):
+    return (np.frombuffer(ull.registers, dtype=np.uint8) >> 2).tolist()
+
+
+class TestUltraLogLog(unittest.TestCase):
+    def setUp(self):
+        self.items = [f"user-{i}" for i in range(20000)]
+
+    def test_u_part_equals_hyperloglog_registers(self):
+        ull = UltraLogLog(b=10)
+        ull.add_many(self.items)
+        hll = HyperLogLog(b=10, mode='dense')
+        hll.add_many(self.items)
+        self.assertEqual(_u(ull), hll.impl.registers)
+        self.assertEqual(ull.to_hyperloglog().impl.registers, hll.impl.registers)
+
+    def test_bulk_add_matches_add(self):
+        single = UltraLogLog(b=10)
+        single.add_many(self.items)
+        bulk = UltraLogLog(b=10)
+        hashes = np.array([murmurhash64a(item) for item in self.items], dtype=np.uint64)
+        for part in np.array_split(hashes, 7):
+            bulk.add_hashes(part)
+        self.assertEqual(bulk.registers, single.registers)
+
+    def test_merge_is_the_union(self):
+        whole = UltraLogLog(b=10)
+        whole.add_many(self.items)
+        left, right = UltraLogLog(b=10), UltraLogLog(b=10)
+        left.add_many(self.items[:12000])
+        right.add_many(self.items[8000:])
+        merged = UltraLogLog(b=10).merge(right).merge(left).merge(right)
+        self.assertEqual(merged.registers, whole.registers)
+        self.assertEqual(merged.estimate(), whole.estimate())
+        with self.assertRaises(ValueError):
+            left.merge(UltraLogLog(b=11))
+
+    def test_accuracy(self):
+        rng = np.random.default_rng(7)
+        errors = []
+        for _ in range(30):
+            ull = UltraLogLog(b=12)
+            ull.add_hashes(rng.integers(0, 2 ** 64, size=50000, dtype=np.uint64))
+            errors.append(ull.estimate() / 50000 - 1)
+        self.assertLess(float(np.sqrt(np.mean(np.square(errors)))), 0.02)  # ~0.78 / sqrt(4096) = 1.2%
+        self.assertEqual(UltraLogLog(b=12).estimate(), 0.0)
+
+    def test_estimate_is_cached_until_a_register_changes(self):
+        ull = UltraLogLog(b=10)
+        ull.add_many(self.items[:1000])
+        first = ull.estimate()
+        ull.add_many(self.items[:1000])
+        self.assertEqual(ull.cached_estimate, first)
+        ull.add_many(self.items[1000:])
+        self.assertGreater(ull.estimate(), first)
+
+
+class TestHyperLogLogConversion(unittest.TestCase):
+    def test_round_trip_from_every_mode(self):
+        for mode in ('explicit', 'sparse', 'dense', 'dense4'):
+            with self.subTest(mode=mode):
+                hll = HyperLogLog(b=10, mode=mode)
+                hll.add_many(range(3000))
+                ull = UltraLogLog.from_hyperloglog(hll)
+                self.assertFalse(ull.history)
+                self.assertEqual(ull.to_hyperloglog()._register_image().tolist(),
+                                 hll._register_image().tolist())
+                self.assertAlmostEqual(ull.estimate() / hll.estimate(), 1, delta=0.05)
+
+    def test_converted_sketches_ignore_history(self):
+        hll = HyperLogLog(b=10)
+        hll.add_many(range(5000))
+        native = UltraLogLog(b=10)
+        native.add_many(range(5000, 10000))
+        native.merge(hll)
+        self.assertFalse(native.history)
+        self.assertAlmostEqual(native.estimate() / 10000, 1, delta=0.1)
+        self.assertFalse(UltraLogLog.from_bytes(native.to_bytes()).history)
+
+
+class TestUltraLogLogSerialization(unittest.TestCase):
+    def setUp(self):
+        self.ull = UltraLogLog(b=8)
+        self.ull.add_many(range(500))
+
+    def test_round_trip(self):
+        for encoding in ('packed', 'zlib'):
+            with self.subTest(encoding=encoding):
+                blob = self.ull.to_bytes(encoding)
+                copy = UltraLogLog.from_bytes(blob)
+                self.assertEqual(copy.registers, self.ull.registers)
+                self.assertTrue(copy.history)
+        self.assertEqual(len(self.ull.to_bytes()), 10 + 256)
+        self.assertEqual(UltraLogLog.from_base64(self.ull.to_base64()).registers, self.ull.registers)
+
+    def test_malformed(self):
+        blob = self.ull.to_bytes()
+        for bad in (blob[:5], b"HLL1" + blob[4:], blob[:-1], blob[:5] + b"\x22" + blob[6:]):
+            with self.assertRaises(ValueError):
+                UltraLogLog.from_bytes(bad)
+
+    def test_zlib_bomb_is_rejected(self):
+        bomb = zlib.compress(bytes(16 << 20), 9)
+        blob = b"ULL1" + bytes([8, 0x10]) + struct.pack(">I", len(bomb)) + bomb
+        with self.assertRaisesRegex(ValueError, "inflates past"):
+            UltraLogLog.from_bytes(blob)
+
+    def test_serialization_helpers_accept_both_types(self):
+        hll = HyperLogLog(b=8)
+        hll.add_many(range(100))
+        stream = io.BytesIO()
+        dump(self.ull, stream)
+        dump(hll, stream)
+        stream.seek(0)
+        self.assertIsInstance(load(stream), UltraLogLog)
+        self.assertIsInstance(load(stream), HyperLogLog)
+        kinds = [type(sketch) for sketch in loads_many(dumps_many([hll, self.ull]))]
+        self.assertEqual(kinds, [HyperLogLog, UltraLogLog])
+        self.assertEqual(deserialize_hll(serialize_hll(self.ull)).registers, self.ull.registers)
+
+
+if __name__ == '__main__':
+    unittest.main()